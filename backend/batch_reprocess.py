@@ -0,0 +1,100 @@
+"""
+Nightly reprocessing of the paired depo-summaries tree with Bedrock batch inference.
+
+Nugget generation and evaluation run as they do for the API, but their bulk
+calls are first answered by batch jobs (see utils/batch_inference.py), so the
+results in results/nuggets and results/evaluation are assembled from the
+response cache at the batch price.
+
+    python -m backend.batch_reprocess [--runner local] [--only-nuggets]
+"""
+import argparse
+import logging
+from pathlib import Path
+
+# Same module names as the pipeline's own imports, so CONFIG and token_tracker are the pipeline's
+from config import CONFIG
+from transcript_analysis.models.TokenTracker import token_tracker
+from transcript_analysis.qa_fact_generation.utils.batch_inference import get_batch_runner, run_batch
+from src.vanilla_nugget_generation.DepositionNuggetGeneration import DepositionNuggetGenerator, run_generators_batched
+from src.vanilla_nuggetbased_evaluation.predefined_nuggetbased_evaluation import EnhancedSummaryEvaluator
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path("./paird depo-summaries")
+NUGGETS_DIR = Path("./results/nuggets")
+EVALUATION_DIR = Path("./results/evaluation")
+
+
+def find_pairs(base_dir: Path):
+    """(deposition path, [summary paths]) per case directory, like /api/file-pairs."""
+    for case_dir in sorted(p for p in base_dir.iterdir() if p.is_dir()):
+        depositions = sorted(f for f in case_dir.glob("*.txt") if f.is_file())
+        summary_dir = case_dir / "summaries"
+        summaries = sorted(summary_dir.glob("*.txt")) if summary_dir.exists() else []
+        for deposition in depositions:
+            yield deposition, summaries
+
+
+def nuggets_path_for(deposition: Path, mode: str) -> Path:
+    suffix = "_hierarchical.json" if mode == "consolidated" else ".json"
+    return NUGGETS_DIR / f"{deposition.stem}{suffix}"
+
+
+def main():
+    parser = argparse.ArgumentParser("Reprocess the depo-summaries tree with Bedrock batch inference")
+    parser.add_argument("--base-dir", type=Path, default=BASE_DIR, help="paired depo-summaries directory")
+    parser.add_argument("--mode", type=str, default="mapping", help="nugget mode: mapping or consolidated")
+    parser.add_argument("--runner", type=str, default=None, help="bedrock (model invocation jobs) or local (run the manifest here)")
+    parser.add_argument("--only-nuggets", action="store_true", help="skip summary evaluation")
+    parser.add_argument("--metrics-output", type=str, default=None, help=".json path to export per-stage latency/token metrics")
+    args = parser.parse_args()
+    if args.runner:
+        CONFIG.batch_runner = args.runner
+    runner = get_batch_runner(CONFIG)
+
+    NUGGETS_DIR.mkdir(parents=True, exist_ok=True)
+    EVALUATION_DIR.mkdir(parents=True, exist_ok=True)
+    pairs = list(find_pairs(args.base_dir))
+
+    generators = [
+        DepositionNuggetGenerator(
+            input_path=str(deposition),
+            output_path=str(NUGGETS_DIR / f"{deposition.stem}.json"),
+            mode=args.mode,
+        )
+        for deposition, _ in pairs
+    ]
+    run_generators_batched(generators, job_name="nuggets", runner=runner)
+
+    if not args.only_nuggets:
+        evaluator = EnhancedSummaryEvaluator()
+        jobs = [
+            (deposition, nuggets_path_for(deposition, args.mode), summary)
+            for deposition, summaries in pairs
+            for summary in summaries
+            if nuggets_path_for(deposition, args.mode).exists()
+        ]
+        requests = []
+        for _, nuggets_path, summary in jobs:
+            requests.extend(evaluator.batch_requests(str(nuggets_path), str(summary), mode=args.mode))
+        logger.info(f"Batch results: {run_batch(requests, CONFIG, 'evaluation', runner)}")
+        for deposition, nuggets_path, summary in jobs:
+            try:
+                evaluator.evaluate_summary(
+                    deposition_file_path=str(deposition),
+                    nuggets_file=str(nuggets_path),
+                    summary_path=str(summary),
+                    output_path=str(EVALUATION_DIR / f"{summary.name}.json"),
+                    mode=args.mode,
+                )
+            except Exception as e:
+                logger.error(f"Evaluation of {summary} failed: {e}")
+
+    token_tracker.summary()
+    if args.metrics_output:
+        token_tracker.export_json(args.metrics_output)
+
+
+if __name__ == "__main__":
+    main()
@@ -26,29 +26,3 @@ def log_pipeline_run(deposition_name, summary_name, depo_word_count, summary_wor
             step1_run,
             step2_run,
         ])
-        writer.writerow([
-            "Date and Time",
-            "call description",
-            "number of calls",
-            "calls input tokens",
-            "calls output tokens",
-            "calls cost",
-            "total calls time"
-        ])
-
-def log_each_generation(call_description, number_of_calls, calls_input_tokens, calls_output_tokens, calls_cost, total_calls_time, CSV_LOG_PATH):
-    log_exists = os.path.exists(CSV_LOG_PATH)
-    if log_exists:
-        with open(CSV_LOG_PATH, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            call_description,
-            number_of_calls,
-            calls_input_tokens,
-            calls_output_tokens,
-            calls_cost,
-            total_calls_time
-            
-        ])
-
@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 from backend.log_pipeline import log_pipeline_run
 from src.citation_retriever.citation_linker import CitationLinker
@@ -14,12 +15,17 @@ from fastapi.staticfiles import StaticFiles
 import subprocess
 import os
 import tempfile
+import threading
+import time
 import shutil
 from pathlib import Path
 import json
 
 from src.transcript_analysis.qa_fact_generation.utils.file_utils import read_transcript_file
-from src.vanilla_nugget_generation.DepositionNuggetGeneration import DepositionNuggetGenerator
+# Same module names as the pipeline's own imports, so the warmed model is the one QAExtractor uses
+from config import CONFIG
+from transcript_analysis.qa_fact_generation.utils.nlp_registry import get_nlp
+from src.vanilla_nugget_generation.DepositionNuggetGeneration import DepositionNuggetGenerator, estimate_nugget_count
 from src.vanilla_nuggetbased_evaluation.predefined_nuggetbased_evaluation import EnhancedSummaryEvaluator
 
 app = FastAPI()
@@ -72,6 +78,24 @@ NUGGETS_DIR.mkdir(parents=True, exist_ok=True)
 EVALUATION_DIR.mkdir(parents=True, exist_ok=True)
 
 
+@app.on_event("startup")
+def warm_ner_model():
+    """Load the speaker-name NER model in the background so the first evaluation does not wait for it."""
+    if not CONFIG.only_A_detection:
+        return
+
+    def load():
+        start = time.perf_counter()
+        try:
+            nlp = get_nlp(CONFIG)
+        except OSError as e:
+            print(f"NER model not loaded at startup: {e}")
+            return
+        print(f"NER model {nlp.meta['lang']}_{nlp.meta['name']} loaded in {time.perf_counter() - start:.1f}s")
+
+    threading.Thread(target=load, name="ner-warmup", daemon=True).start()
+
+
 
 
 app.mount("/annotations", StaticFiles(directory="annotations"), name="annotations")
@@ -205,7 +229,7 @@ async def process_deposition(request: ProcessDepositionRequest):
                 input_path=str(deposition_path),
                 output_path=str(nuggets_path)
             )
-            generator.run()
+            await generator.arun()
             logs.append(f"Nuggets generated successfully at: {nuggets_path}")
             with open(nuggets_path, 'r', encoding='utf-8') as f:
                 nuggets_data = json.load(f)
@@ -334,7 +358,49 @@ async def process_pair(request: ProcessPairRequest = Body(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/plan-pair")
+async def plan_pair(request: ProcessPairRequest = Body(...)):
+    """Predict LLM calls, tokens, cost and wall time of generating nuggets for and evaluating a pair, without running it."""
+    deposition_path = BASE_DIR / request.case_name / request.deposition_filename
+    summary_path = BASE_DIR / request.case_name / "summaries" / request.summary_filename
+    if not deposition_path.exists():
+        raise HTTPException(status_code=404, detail=f"Deposition file {request.deposition_filename} not found in case {request.case_name}")
+    if not summary_path.exists():
+        raise HTTPException(status_code=404, detail=f"Summary file {request.summary_filename} not found in case {request.case_name}/summaries")
+
+    stem = request.deposition_filename.replace('.txt', '')
+    nuggets_path = NUGGETS_DIR / f"{stem}.json" if MODE=="mapping" else NUGGETS_DIR / f"{stem}_hierarchical.json"
+    nuggets_exist = nuggets_path.exists()
+    try:
+        # Parsing, chunking and citation linking are CPU-bound; keep them off the event loop
+        plans = await asyncio.to_thread(_plan_pair, deposition_path, summary_path, nuggets_path, stem, nuggets_exist)
+        return {"status": "success", "nuggets_exist": nuggets_exist, "plans": plans}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
+def _plan_pair(deposition_path: Path, summary_path: Path, nuggets_path: Path, stem: str, nuggets_exist: bool) -> dict:
+    """Generation plan (if the nuggets are missing) and evaluation plan of a pair."""
+    plans = {}
+    expected_nuggets = 0
+    if not nuggets_exist:
+        generator = DepositionNuggetGenerator(
+            input_path=str(deposition_path),
+            output_path=str(NUGGETS_DIR / f"{stem}.json"),
+            mode=MODE,
+        )
+        generation = generator.plan()
+        plans["generation"] = generation.to_dict()
+        # Evaluation scores the nuggets generation will write; estimate their number from its plan
+        expected_nuggets = estimate_nugget_count(generation, MODE)
+    plans["evaluation"] = EnhancedSummaryEvaluator().plan(
+        deposition_file_path=str(deposition_path),
+        nuggets_file=str(nuggets_path) if nuggets_exist else None,
+        summary_path=str(summary_path),
+        mode=MODE,
+        expected_nuggets=expected_nuggets,
+    ).to_dict()
+    return plans
 
 
 class AnnotationSaveRequest(BaseModel):
@@ -465,7 +531,7 @@ async def run_pipeline(
                         input_path=str(deposition_path),
                         output_path=str(nuggets_path))
 
-            generator.run()
+            await generator.arun()
             
             
             logs.append("Nugget generation completed successfully")
@@ -473,7 +539,7 @@ async def run_pipeline(
             # Step 2: Run evaluation
             logs.append("=== STARTING EVALUATION ===")
             evaluator = EnhancedSummaryEvaluator()
-            evaluation_result = evaluator.evaluate_summary(
+            evaluation_result = await evaluator.aevaluate_summary(
                 deposition_file_path=str(deposition_path),
                 nuggets_file=str(nuggets_path) if MODE=="mapping" else str(nuggets_path).replace(".json", "_hierarchical.json"),
                 summary_path=str(summary_path),
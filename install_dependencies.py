@@ -25,7 +25,7 @@ def main():
     dependencies = [
         ("pip install -e .", "NextPoint package"),
         ("pip install boto3 botocore", "AWS SDK"),
-        ("pip install pydantic tenacity", "Core utilities"),
+        ("pip install pydantic", "Core utilities"),
         ("pip install fastapi uvicorn", "Web framework"),
         ("pip install python-multipart", "File upload support"),
         ("pip install spacy", "NLP library"),
@@ -1,6 +1,6 @@
 from typing import List, Dict, Tuple, Optional
-import re
-from transcript_analysis.qa_fact_generation.utils.file_utils import read_transcript_file
+from transcript_analysis.qa_fact_generation.utils.parse_cache import get_parsed_transcript
+from transcript_analysis.qa_fact_generation.utils.transcript_index import get_transcript_index
 
 class DepositionProcessor:
     def __init__(self, deposition_path: str):
@@ -9,48 +9,16 @@ class DepositionProcessor:
 
     def load_transcript(self):
         """Load deposition transcript and store lines with page and line metadata."""
-        lines = read_transcript_file(self.deposition_path)
-        current_page = 0
-        for i, line in enumerate(lines, 1):
-            if '\f' in line:
-                number_match = re.search(r'(\d+)', line.split('\f', 1)[-1])
-                if number_match:
-                    current_page = int(number_match.group(1))
-            elif re.match(r"^\s*\d+\s+", line.strip()):
-                line_number_match = re.match(r"^\s*(\d+)", line.strip())
-                if line_number_match:
-                    line_number = int(line_number_match.group(1))
-                    self.lines_with_metadata.append((current_page, line_number, line.strip()))
-            else:
-                self.lines_with_metadata.append((current_page, None, line.strip()))
+        # Decoded once per transcript and shared by every processor (evaluation, backend) in the process
+        self.lines_with_metadata.extend(get_parsed_transcript(self.deposition_path).line_metadata)
 
     def retrieve_text_for_range(self, start_page: int, end_page: Optional[int], start_line: Optional[int], end_line: Optional[int]) -> Dict:
         """Retrieve transcript text for a given page/line range."""
-        if not self.lines_with_metadata:
-            self.load_transcript()
-
         end_page = end_page or start_page
         citation_id = f"citation_{start_page}_{start_line if start_line is not None else 'page'}_{end_page}_{end_line if end_line is not None else 'page'}"
 
-        def in_line_range(pg, ln):
-            if ln is None:
-                return False
-            if pg == start_page and start_line is not None and ln < start_line:
-                return False
-            if pg == end_page and end_line is not None and ln > end_line:
-                return False
-            return True
-
-        matching_lines = []
-        for pg, ln, line in self.lines_with_metadata:
-            if not (start_page <= pg <= end_page):
-                continue
-
-            if start_line is not None or end_line is not None:
-                if in_line_range(pg, ln):
-                    matching_lines.append((pg, ln, line))
-            else:
-                matching_lines.append((pg, ln, line))
+        # Only the lines of the cited pages are decoded, straight from the memory-mapped transcript
+        matching_lines = get_transcript_index(self.deposition_path).range_lines(start_page, end_page, start_line, end_line)
 
         formatted_text = "\n".join(line for _, _, line in matching_lines) if matching_lines else "No text found for this range."
 
@@ -4,6 +4,21 @@ from typing import Optional, Any
 
 from transcript_analysis.models.pymodels import Conversation
 
+_TRUE = ("1", "true", "yes")
+_FALSE = ("0", "false", "no")
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Boolean environment variable: 1/0, true/false or yes/no (any case); default if unset or empty."""
+    value = os.getenv(name, "").strip().lower()
+    if not value:
+        return default
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(f"{name}={os.getenv(name)!r} is not a boolean (use one of {_TRUE + _FALSE})")
+
 
 class AppConfig(BaseModel):
     # AWS settings
@@ -22,6 +37,8 @@ class AppConfig(BaseModel):
     fix_a: bool = True
     only_A_detection: bool = True
     conversation: Conversation  = Conversation()
+    spacy_model: str = os.getenv("SPACY_MODEL", "en_core_web_trf")  # NER model for speaker names
+    spacy_fast: bool = _env_flag("SPACY_FAST", False)  # use en_core_web_sm when installed
 
 
     # General settings
@@ -36,6 +53,98 @@ class AppConfig(BaseModel):
         "/Users/nfarzi/Documents/nextpoint/deposition-pipeline-ui_/public/results/evaluation/evaluation_report.html"
     )
 
+    # Token counting: "approx_bpe" (offline BPE approximation), "chars" (len // 4) or "tiktoken"
+    token_counter: str = os.getenv("TOKEN_COUNTER", "approx_bpe")
+
+    # Inference profile ARNs are resolved lazily and cached on disk per (region, model)
+    inference_profile_cache_path: str = os.getenv(
+        "INFERENCE_PROFILE_CACHE_PATH",
+        os.path.join(os.path.expanduser("~"), ".cache", "nextpoint", "inference_profiles.json")
+    )
+    inference_profile_cache_ttl_hours: float = 24.0
+
+    # Stream converse output so off-schema tool input is abandoned early (per call: stream=True)
+    bedrock_streaming: bool = _env_flag("BEDROCK_STREAMING", False)
+
+    # Retry policy shared by every Bedrock call (see utils/retry_policy.py)
+    retry_max_attempts: int = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "4"))  # per call, including the first attempt
+    retry_base_delay: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "2.0"))  # seconds; full-jitter exponential backoff
+    retry_max_delay: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "30.0"))
+    retry_run_budget: int = int(os.getenv("LLM_RETRY_RUN_BUDGET", "100"))  # retries across all calls in one run
+
+    # Hedged requests: past the stage's latency percentile, duplicate a call to a second region/profile
+    # (non-streaming calls only) and keep the first tool response
+    hedging_enabled: bool = _env_flag("LLM_HEDGING", False)
+    hedge_region: str = os.getenv("HEDGE_REGION", "us-west-2")
+    hedge_model_path: Optional[str] = os.getenv("HEDGE_MODEL_PATH")  # defaults to the primary model
+    hedge_percentile: float = float(os.getenv("HEDGE_PERCENTILE", "95"))
+    hedge_min_deadline: float = 2.0  # seconds; never hedge faster calls
+    hedge_max_rate: float = float(os.getenv("HEDGE_MAX_RATE", "0.1"))  # at most this fraction of calls is hedged
+    hedge_min_samples: int = 20  # latencies a stage needs before its calls are hedged
+
+    # Model cascade: call sites declare a tier ("fast", "standard", "heavy"); with LLM_MODEL_CASCADE=true a call
+    # starts on the cheapest model of its tier and escalates up the ladder only on invalid output or low confidence
+    model_cascade_enabled: bool = _env_flag("LLM_MODEL_CASCADE", False)
+    model_tier_fast: str = os.getenv("MODEL_TIER_FAST", "amazon.nova-lite-v1:0")  # comma-separated, cheapest first
+    model_tier_standard: str = os.getenv("MODEL_TIER_STANDARD", "")  # empty: model_path
+    model_tier_heavy: str = os.getenv("MODEL_TIER_HEAVY", "anthropic.claude-3-5-sonnet-20240620-v1:0")
+    cascade_attempts_per_model: int = int(os.getenv("CASCADE_ATTEMPTS_PER_MODEL", "2"))  # before escalating; the last model gets retry_max_attempts
+
+    # Concurrency settings
+    singleflight_enabled: bool = _env_flag("LLM_SINGLEFLIGHT", True)  # share identical in-flight calls
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))  # in-flight Bedrock calls for the async adapter
+    bedrock_requests_per_minute: int = int(os.getenv("BEDROCK_RPM", "200"))  # set to the account's on-demand quota
+    bedrock_tokens_per_minute: int = int(os.getenv("BEDROCK_TPM", "400000"))
+    completeness_batch_size: int = int(os.getenv("COMPLETENESS_BATCH_SIZE", "15"))  # nuggets per presence call; 1 disables batching
+
+    # Bedrock client mode: "live", "record" (live + tape) or "replay" (tape only, no AWS)
+    bedrock_mode: str = os.getenv("BEDROCK_MODE", "live")
+    bedrock_tape_path: str = os.getenv("BEDROCK_TAPE_PATH", "bedrock_tape.jsonl")
+    bedrock_replay_latency: Optional[float] = (
+        float(os.getenv("BEDROCK_REPLAY_LATENCY")) if os.getenv("BEDROCK_REPLAY_LATENCY") else None
+    )  # None replays the recorded latency
+    bedrock_replay_jitter: float = float(os.getenv("BEDROCK_REPLAY_JITTER", "0"))
+    bedrock_replay_throttle_rate: float = float(os.getenv("BEDROCK_REPLAY_THROTTLE_RATE", "0"))
+
+    # Bedrock prompt caching (cachePoint blocks after the invariant prompt prefix)
+    prompt_caching_enabled: bool = _env_flag("BEDROCK_PROMPT_CACHING", True)
+    prompt_cache_min_tokens: int = 1024  # prefixes shorter than this are not cacheable
+
+    # Run ledger: every Bedrock call is queued to a background writer that batches it into SQLite
+    run_ledger_enabled: bool = _env_flag("RUN_LEDGER", True)
+    run_ledger_path: str = os.getenv(
+        "RUN_LEDGER_PATH",
+        os.path.join(os.path.expanduser("~"), ".cache", "nextpoint", "run_ledger.sqlite")
+    )
+
+    # Batch inference: bulk runs submit their calls as one Bedrock model invocation job (see utils/batch_inference.py)
+    batch_runner: str = os.getenv("BEDROCK_BATCH_RUNNER", "bedrock")  # "bedrock" or "local" (runs the manifest here)
+    batch_s3_uri: str = os.getenv("BEDROCK_BATCH_S3_URI", "")  # s3://bucket/prefix for manifests and job output
+    batch_role_arn: str = os.getenv("BEDROCK_BATCH_ROLE_ARN", "")  # service role Bedrock assumes to read/write S3
+    batch_work_dir: str = os.getenv(
+        "BEDROCK_BATCH_WORK_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "nextpoint", "batch")
+    )
+    batch_poll_seconds: float = float(os.getenv("BEDROCK_BATCH_POLL_SECONDS", "60"))
+
+    # Parse cache: Q&A pairs, introductory lines and detected speakers per transcript (see utils/parse_cache.py)
+    parse_cache_enabled: bool = _env_flag("PARSE_CACHE", True)  # off: share parses within the process only
+    parse_cache_dir: str = os.getenv(
+        "PARSE_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "nextpoint", "parses")
+    )
+    parse_cache_max_transcripts: int = int(os.getenv("PARSE_CACHE_MAX_TRANSCRIPTS", "32"))  # held in memory; evicted ones reload from disk
+
+    # Response cache settings
+    response_cache_enabled: bool = _env_flag("BEDROCK_RESPONSE_CACHE", True)
+    response_cache_path: str = os.getenv(
+        "BEDROCK_RESPONSE_CACHE_PATH",
+        os.path.join(os.path.expanduser("~"), ".cache", "nextpoint", "bedrock_responses.sqlite")
+    )
+    response_cache_max_mb: int = 512
+    response_cache_max_age_days: float = 30.0
+    prompt_version: str = os.getenv("PROMPT_VERSION", "v1")  # bump to invalidate cached responses after prompt edits
+
     def get(self, key: str, default: Any = None) -> Any:
         if key in self.model_fields:
             return getattr(self, key)
@@ -1,6 +1,7 @@
 # from outlines import models, generate
 from typing import List
 from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import generate_structured_output
+from transcript_analysis.qa_fact_generation.utils.model_cascade import STANDARD
 import logging
 import json
 from transcript_analysis.models.pymodels import Fact, FactAnnotation, FactAnnotationList, AnnotatedFact
@@ -84,6 +85,7 @@ def generate_segments_for_all_pairs(
         tool_schema_name="assign_segment_for_pairs",
         description="Tool for assigning segment_id, segment topic and reasoning for each Q&A pair",
         model_id=CONFIG.model_path,
+        tier=STANDARD,
         obj=FactAnnotationList,
         max_tokens=CONFIG.max_tokens,
         print_usage=print_usage
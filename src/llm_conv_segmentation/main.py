@@ -9,8 +9,6 @@ from config import CONFIG
 import boto3
 from botocore.exceptions import ClientError
 import sys
-from tenacity import RetryError
-import torch
 
 import logging
 
@@ -20,21 +18,7 @@ logging.basicConfig(level = logging.INFO)
 def handle_aws_error(error):
     """Handle AWS errors with clean user messages and exit."""
     
-    # Handle RetryError wrapping ClientError
-    if isinstance(error, RetryError):
-        if hasattr(error, 'last_attempt') and error.last_attempt.exception():
-            original_error = error.last_attempt.exception()
-            if isinstance(original_error, ClientError):
-                error_code = original_error.response['Error']['Code']
-                if error_code == 'ExpiredTokenException':
-                    print("Error: Your AWS credentials have expired.")
-                    print("Please refresh your AWS credentials and try again.")
-                    sys.exit(1)
-        print("Error: Failed to process transcript. Please try again.")
-        sys.exit(1)
-    
-    # Handle direct ClientError
-    elif isinstance(error, ClientError):
+    if isinstance(error, ClientError):
         error_code = error.response['Error']['Code']
         if error_code == 'ExpiredTokenException':
             print("Error: Your AWS credentials have expired.")
@@ -45,14 +29,11 @@ def handle_aws_error(error):
 
 def initialize_bedrock_model(CONFIG):
     try:
-        from src.utils.aws_session import create_bedrock_client
+        from src.utils.aws_session import get_bedrock_runtime_client
         
         print(f"CONFIG REGION NAME:{CONFIG}")
-        # Use the new utility that handles both SSO and regular credentials
-        bedrock = create_bedrock_client(
-            profile_name=CONFIG.sso_profile if CONFIG.sso_profile != "default" else None,
-            region_name=CONFIG.aws_region
-        )
+        # Shared per (profile, region): handles SSO and regular credentials, pool sized to LLM_MAX_CONCURRENCY
+        bedrock = get_bedrock_runtime_client(CONFIG)
         
         print("✓ AWS Bedrock client initialized successfully")
         return bedrock
@@ -67,7 +48,7 @@ def main():
     parser.add_argument("--input",type=str, required=True, help="input .jsonl.gz file to read the Q&A pairs from")
     parser.add_argument("-o","--output", type=str, required=True, help="jsonl.gz file to store new facts with segment id and cofidence level")
     parser.add_argument("--model-id", type=str, required=False)
-    parser.add_argument("--chunk-size", type=int, required=False, default=6000)
+    parser.add_argument("--chunk-size", type=int, required=False, default=2250, help="chunk size in tokens")
     parser.add_argument(
         "--logger-level",
         default="info",
@@ -96,6 +77,7 @@ def main():
     CONFIG.update_from_args(args)
     # print(CONFIG)
     # Set random seed
+    import torch  # only needed for seeding here; keeps imports of initialize_bedrock_model light
     torch.random.manual_seed(CONFIG.seed)
 
     # Initialize models
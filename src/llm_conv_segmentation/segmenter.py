@@ -240,7 +240,7 @@ def save_annotated_facts(annotated_facts: List[AnnotatedFact], output_path: str)
 
 
 def annotate_facts(input_path: str, output_path: str, bedrock_client, CONFIG, 
-                  print_usage: bool, chunk_size: int = 6000, overlap: int = 5):
+                  print_usage: bool, chunk_size: int = 2250, overlap: int = 5):
     """
     Main function to annotate facts with segment information.
     
@@ -1,12 +1,29 @@
+import json
+import logging
+import os
+import re
+import time
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
 import boto3
 
-def retrieve_or_create_inference_profile(config):
+logger = logging.getLogger(__name__)
+
+
+def _profile_name(model_path: str) -> str:
+    """Per-model inference profile name (letters, digits, ':' '.' and single '-' separators, max 64 chars)."""
+    name = re.sub(r"[^0-9a-zA-Z:.]+", "-", f"summary_evaluation-{model_path}").strip("-")
+    return name[:64].rstrip("-")
+
+
+def retrieve_or_create_inference_profile(config, model_path: Optional[str] = None):
     aws_region: str = config.aws_region
-    model_path: str = config.model_path
+    model_path: str = model_path or config.model_path
     sso_profile: str = config.sso_profile
 
-    from src.utils.aws_session import create_aws_session
-    session = create_aws_session(profile_name=sso_profile if sso_profile != "default" else None, region_name=aws_region)
+    from src.utils.aws_session import get_aws_session
+    session = get_aws_session(profile_name=sso_profile if sso_profile != "default" else None, region_name=aws_region)
     bedrock = session.client('bedrock')
     resource_groups = session.client('resourcegroupstaggingapi')
 
@@ -30,7 +47,7 @@ def retrieve_or_create_inference_profile(config):
 
     # Step 2: If not found, create a new one with required tags
     response = bedrock.create_inference_profile(
-        inferenceProfileName='summary_evaluation',
+        inferenceProfileName=_profile_name(model_path),
         modelSource={
             'copyFrom': f'arn:aws:bedrock:{aws_region}::foundation-model/{model_path}'
         },
@@ -44,3 +61,82 @@ def retrieve_or_create_inference_profile(config):
     profile_arn = response['inferenceProfileArn']
     print(f"Created New Profile: {profile_arn}")
     return profile_arn
+
+
+_profile_arns: Dict[Tuple[str, str], str] = {}
+_profile_lock = Lock()
+
+
+def _read_profile_cache(path: str) -> Dict[str, Dict]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_profile_cache(path: str, entries: Dict[str, Dict]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entries, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def get_inference_profile_arn(config, model_path: Optional[str] = None) -> str:
+    """
+    Resolve the inference profile ARN for (region, model) on first use.
+
+    ARNs are memoized in-process and persisted to config.inference_profile_cache_path
+    for config.inference_profile_cache_ttl_hours, so only the first run after the TTL
+    expires pays for the tagging/STS round-trips.
+    """
+    model_path = model_path or config.model_path
+    key = (config.aws_region, model_path)
+    with _profile_lock:
+        if key in _profile_arns:
+            return _profile_arns[key]
+
+        cache_key = f"{config.aws_region}|{model_path}"
+        entries = _read_profile_cache(config.inference_profile_cache_path)
+        entry = entries.get(cache_key)
+        max_age = config.inference_profile_cache_ttl_hours * 3600
+        if entry and time.time() - entry.get("resolved_at", 0) < max_age:
+            _profile_arns[key] = entry["arn"]
+            return entry["arn"]
+
+        arn = retrieve_or_create_inference_profile(config, model_path)
+        entries[cache_key] = {"arn": arn, "resolved_at": time.time()}
+        try:
+            _write_profile_cache(config.inference_profile_cache_path, entries)
+        except OSError as e:
+            logger.warning(f"Could not persist inference profile cache: {e}")
+        _profile_arns[key] = arn
+        return arn
+
+
+def model_for_inference_profile(config, arn: str) -> Optional[str]:
+    """The model an inference profile ARN was resolved for (the reverse of get_inference_profile_arn), if known."""
+    with _profile_lock:
+        for (_, model_path), known_arn in _profile_arns.items():
+            if known_arn == arn:
+                return model_path
+        for cache_key, entry in _read_profile_cache(config.inference_profile_cache_path).items():
+            if entry.get("arn") == arn:
+                return cache_key.split("|", 1)[1]
+    return None
+
+
+def invalidate_inference_profile(config, model_path: Optional[str] = None) -> None:
+    """Forget a cached ARN (e.g. after the profile was deleted) so the next call re-resolves it."""
+    model_path = model_path or config.model_path
+    with _profile_lock:
+        _profile_arns.pop((config.aws_region, model_path), None)
+        entries = _read_profile_cache(config.inference_profile_cache_path)
+        if entries.pop(f"{config.aws_region}|{model_path}", None) is not None:
+            try:
+                _write_profile_cache(config.inference_profile_cache_path, entries)
+            except OSError as e:
+                logger.warning(f"Could not update inference profile cache: {e}")
@@ -1,10 +1,16 @@
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
+import json
 import logging
+import math
 from threading import Lock
+from typing import Deque, Dict, Iterable, List, Optional
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Recent calls per stage kept for the latency/token percentiles
+STAGE_WINDOW = 1000
 
 
 @dataclass
@@ -17,6 +23,125 @@ class TokenUsage:
     call_count: int = 0
     min_time: float = float('inf')  # Fastest call
     max_time: float = 0.0  # Slowest call
+    cache_hits: int = 0  # Calls answered from the response cache
+    cache_misses: int = 0  # Calls that had to go to Bedrock
+    prompt_cache_read_tokens: int = 0  # Input tokens served from the Bedrock prompt cache
+    prompt_cache_write_tokens: int = 0  # Input tokens written to the Bedrock prompt cache
+    prompt_cache_hits: int = 0  # Calls that read at least one cached prompt token
+    coalesced_calls: int = 0  # Calls that shared an identical in-flight request instead of calling Bedrock
+    hedged_calls: int = 0  # Calls duplicated to the hedge region/profile
+    hedge_wins: int = 0  # Hedged calls answered first by the hedge
+    hedge_wasted_cost: float = 0.0  # Cost of the losing side of hedged calls (included in total_cost)
+    escalations: int = 0  # Model-cascade escalations to a larger model
+    output_repairs: int = 0  # Invalid tool outputs fixed locally instead of calling again
+    output_recalls: int = 0  # Calls made again because the tool output was invalid or off-schema
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values (0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _distribution(values: Iterable[float], count: int, total: float) -> Dict[str, float]:
+    """count, total and mean over all calls; percentiles and max over the recent window values."""
+    values = list(values)
+    return {
+        "count": count,
+        "total": total,
+        "mean": total / count if count else 0.0,
+        "p50": _percentile(values, 50),
+        "p90": _percentile(values, 90),
+        "p99": _percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def _window() -> Deque:
+    return deque(maxlen=STAGE_WINDOW)
+
+
+@dataclass
+class StageMetrics:
+    """
+    Per-stage call metrics; one instance per stage name (e.g. a tool schema name).
+
+    Totals cover every call. Latencies and token counts are kept only for the last
+    STAGE_WINDOW calls, so the percentiles describe recent calls and a long-running
+    backend does not grow them without bound.
+    """
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    coalesced: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    hedge_wasted_cost: float = 0.0
+    escalations: int = 0
+    repairs: int = 0
+    recalls: int = 0
+    total_cost: float = 0.0
+    total_time: float = 0.0
+    total_input_tokens: int = 0
+    total_output_tokens: int = 0
+    latencies: Deque[float] = field(default_factory=_window)
+    input_tokens: Deque[int] = field(default_factory=_window)
+    output_tokens: Deque[int] = field(default_factory=_window)
+
+    def add(self, call_time: float, input_tokens: int, output_tokens: int) -> None:
+        self.total_time += call_time
+        self.total_input_tokens += input_tokens
+        self.total_output_tokens += output_tokens
+        self.latencies.append(call_time)
+        self.input_tokens.append(input_tokens)
+        self.output_tokens.append(output_tokens)
+
+    def to_dict(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "coalesced": self.coalesced,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_wasted_cost": self.hedge_wasted_cost,
+            "escalations": self.escalations,
+            "repairs": self.repairs,
+            "recalls": self.recalls,
+            "total_cost": self.total_cost,
+            "total_time": self.total_time,
+            "latency_seconds": _distribution(self.latencies, self.calls, self.total_time),
+            "input_tokens": _distribution(self.input_tokens, self.calls, self.total_input_tokens),
+            "output_tokens": _distribution(self.output_tokens, self.calls, self.total_output_tokens),
+        }
+
+
+@dataclass
+class TierMetrics:
+    """Per-tier accounting for the model cascade; one instance per tier name."""
+    calls: int = 0  # Bedrock calls made on behalf of this tier, on any model
+    escalations: int = 0  # Times a call of this tier moved up to a larger model
+    total_cost: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    answered_by: Dict[str, int] = field(default_factory=dict)  # model id -> calls it answered
+
+    def to_dict(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "escalations": self.escalations,
+            "total_cost": self.total_cost,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "answered_by": dict(self.answered_by),
+        }
+
 
 class TokenTracker:
     _instance = None
@@ -33,14 +158,44 @@ class TokenTracker:
         if hasattr(self, '_initialized') and self._initialized:
             return
         self.usage = TokenUsage()
+        self.stages: Dict[str, StageMetrics] = {}
+        self.tiers: Dict[str, TierMetrics] = {}
         self.lock = Lock()
         self._initialized = True
 
 
 
-    def update(self, input_tokens: int, output_tokens: int, cost: float, call_time: float) -> None:
+    def _stage(self, stage: Optional[str]) -> StageMetrics:
+        # Callers hold self.lock
+        name = stage or "unlabelled"
+        if name not in self.stages:
+            self.stages[name] = StageMetrics()
+        return self.stages[name]
+
+    def _tier(self, tier: str) -> TierMetrics:
+        # Callers hold self.lock
+        if tier not in self.tiers:
+            self.tiers[tier] = TierMetrics()
+        return self.tiers[tier]
+
+    def update(self, input_tokens: int, output_tokens: int, cost: float, call_time: float,
+               cache_read_tokens: int = 0, cache_write_tokens: int = 0,
+               stage: Optional[str] = None, retries: int = 0, error: bool = False,
+               tier: Optional[str] = None) -> None:
         """Update token usage and timing metrics."""
         with self.lock:
+            if tier is not None:
+                tier_metrics = self._tier(tier)
+                tier_metrics.calls += 1
+                tier_metrics.total_cost += cost
+                tier_metrics.input_tokens += input_tokens
+                tier_metrics.output_tokens += output_tokens
+            stage_metrics = self._stage(stage)
+            stage_metrics.calls += 1
+            stage_metrics.errors += int(error)
+            stage_metrics.retries += retries
+            stage_metrics.total_cost += cost
+            stage_metrics.add(call_time, input_tokens, output_tokens)
             self.usage.total_input_tokens += input_tokens
             self.usage.total_output_tokens += output_tokens
             self.usage.total_cost += cost
@@ -48,7 +203,112 @@ class TokenTracker:
             self.usage.call_count += 1
             self.usage.min_time = min(self.usage.min_time, call_time)
             self.usage.max_time = max(self.usage.max_time, call_time)
+            self.usage.prompt_cache_read_tokens += cache_read_tokens
+            self.usage.prompt_cache_write_tokens += cache_write_tokens
+            if cache_read_tokens:
+                self.usage.prompt_cache_hits += 1
     
+    def record_cache_hit(self, stage: Optional[str] = None) -> None:
+        """Count a call served from the response cache."""
+        with self.lock:
+            self.usage.cache_hits += 1
+            self._stage(stage).cache_hits += 1
+
+    def record_cache_miss(self, stage: Optional[str] = None) -> None:
+        """Count a cacheable call that was not in the response cache."""
+        with self.lock:
+            self.usage.cache_misses += 1
+            self._stage(stage).cache_misses += 1
+
+    def record_coalesced(self, stage: Optional[str] = None) -> None:
+        """Count a call that was answered by an identical in-flight request."""
+        with self.lock:
+            self.usage.coalesced_calls += 1
+            self._stage(stage).coalesced += 1
+
+    def record_hedge(self, stage: Optional[str] = None, won: bool = False) -> None:
+        """Count a hedged call and whether the hedge answered first."""
+        with self.lock:
+            self.usage.hedged_calls += 1
+            self.usage.hedge_wins += int(won)
+            stage_metrics = self._stage(stage)
+            stage_metrics.hedges += 1
+            stage_metrics.hedge_wins += int(won)
+
+    def record_hedge_waste(self, stage: Optional[str] = None, cost: float = 0.0) -> None:
+        """Add the cost of the losing side of a hedged call."""
+        with self.lock:
+            self.usage.hedge_wasted_cost += cost
+            self.usage.total_cost += cost
+            stage_metrics = self._stage(stage)
+            stage_metrics.hedge_wasted_cost += cost
+            stage_metrics.total_cost += cost
+
+    def record_repair(self, stage: Optional[str] = None) -> None:
+        """Count an invalid tool output that was repaired locally."""
+        with self.lock:
+            self.usage.output_repairs += 1
+            self._stage(stage).repairs += 1
+
+    def record_recall(self, stage: Optional[str] = None) -> None:
+        """Count a call made again because its tool output was invalid."""
+        with self.lock:
+            self.usage.output_recalls += 1
+            self._stage(stage).recalls += 1
+
+    def record_escalation(self, tier: str, stage: Optional[str] = None) -> None:
+        """Count a cascade escalation of a call of tier to the next model."""
+        with self.lock:
+            self.usage.escalations += 1
+            self._tier(tier).escalations += 1
+            self._stage(stage).escalations += 1
+
+    def record_tier_answer(self, tier: str, model_id: str) -> None:
+        """Count the model that answered a call of tier."""
+        with self.lock:
+            answered_by = self._tier(tier).answered_by
+            answered_by[model_id] = answered_by.get(model_id, 0) + 1
+
+    def tier_metrics(self) -> Dict[str, Dict]:
+        """Per-tier metrics as plain dicts."""
+        with self.lock:
+            return {name: metrics.to_dict() for name, metrics in self.tiers.items()}
+
+    def stage_metrics(self) -> Dict[str, Dict]:
+        """Per-stage metrics as plain dicts, slowest stage (by total time) first."""
+        with self.lock:
+            stages = {name: metrics.to_dict() for name, metrics in self.stages.items()}
+        return dict(sorted(stages.items(), key=lambda item: item[1]["total_time"], reverse=True))
+
+    def to_dict(self) -> Dict:
+        """Totals and per-stage metrics, JSON-serializable."""
+        with self.lock:
+            totals = {
+                "call_count": self.usage.call_count,
+                "total_input_tokens": self.usage.total_input_tokens,
+                "total_output_tokens": self.usage.total_output_tokens,
+                "total_cost": self.usage.total_cost,
+                "total_time": self.usage.total_time,
+                "cache_hits": self.usage.cache_hits,
+                "cache_misses": self.usage.cache_misses,
+                "coalesced_calls": self.usage.coalesced_calls,
+                "hedged_calls": self.usage.hedged_calls,
+                "hedge_wins": self.usage.hedge_wins,
+                "hedge_wasted_cost": self.usage.hedge_wasted_cost,
+                "escalations": self.usage.escalations,
+                "output_repairs": self.usage.output_repairs,
+                "output_recalls": self.usage.output_recalls,
+                "prompt_cache_read_tokens": self.usage.prompt_cache_read_tokens,
+                "prompt_cache_write_tokens": self.usage.prompt_cache_write_tokens,
+            }
+        return {"totals": totals, "stages": self.stage_metrics(), "tiers": self.tier_metrics()}
+
+    def export_json(self, path: str) -> None:
+        """Write to_dict() to path."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        logger.info(f"Wrote Bedrock usage metrics to {path}")
+
     def summary(self) -> None:
         """Log cumulative token usage, cost, and timing summary."""
         with self.lock:
@@ -68,11 +328,58 @@ class TokenTracker:
             if self.usage.call_count > 0:
                 logger.info(f"Fastest Call: {self.usage.min_time:.2f} seconds")
                 logger.info(f"Slowest Call: {self.usage.max_time:.2f} seconds")
-            logger.info("="*60)
+            logger.info("-" * 60)
+            logger.info("RESPONSE CACHE:")
+            logger.info(f"Cache Hits: {self.usage.cache_hits}")
+            logger.info(f"Cache Misses: {self.usage.cache_misses}")
+            logger.info(f"Coalesced In-Flight Calls: {self.usage.coalesced_calls}")
+            logger.info("-" * 60)
+            logger.info("STRUCTURED OUTPUT:")
+            logger.info(f"Repaired Locally: {self.usage.output_repairs}")
+            logger.info(f"Re-called (invalid output): {self.usage.output_recalls}")
+            if self.usage.hedged_calls:
+                logger.info("-" * 60)
+                logger.info("HEDGED REQUESTS:")
+                logger.info(f"Hedged Calls: {self.usage.hedged_calls} (hedge answered first: {self.usage.hedge_wins})")
+                logger.info(f"Wasted Cost: ${self.usage.hedge_wasted_cost:.4f}")
+            logger.info("-" * 60)
+            logger.info("PROMPT CACHE:")
+            logger.info(f"Calls With Cache Reads: {self.usage.prompt_cache_hits}")
+            logger.info(f"Cache Read Tokens: {self.usage.prompt_cache_read_tokens:,}")
+            logger.info(f"Cache Write Tokens: {self.usage.prompt_cache_write_tokens:,}")
+        tiers = self.tier_metrics()
+        if tiers:
+            logger.info("-" * 60)
+            logger.info(f"PER-TIER METRICS (escalations: {self.usage.escalations}):")
+            for name, metrics in tiers.items():
+                answered_by = ", ".join(f"{model_id} {count}" for model_id, count in metrics["answered_by"].items())
+                logger.info(
+                    f"{name}: {metrics['calls']} calls, {metrics['escalations']} escalations, "
+                    f"tokens in/out {metrics['input_tokens']:,}/{metrics['output_tokens']:,}, "
+                    f"cost ${metrics['total_cost']:.4f}, answered by: {answered_by or 'n/a'}"
+                )
+        stages = self.stage_metrics()
+        if stages:
+            logger.info("-" * 60)
+            logger.info("PER-STAGE METRICS (slowest first):")
+            for name, metrics in stages.items():
+                latency = metrics["latency_seconds"]
+                logger.info(
+                    f"{name}: {metrics['calls']} calls, {metrics['total_time']:.2f}s total, "
+                    f"latency p50/p90/p99 {latency['p50']:.2f}/{latency['p90']:.2f}/{latency['p99']:.2f}s, "
+                    f"input tokens p50/p90 {metrics['input_tokens']['p50']:.0f}/{metrics['input_tokens']['p90']:.0f}, "
+                    f"output tokens p50/p90 {metrics['output_tokens']['p50']:.0f}/{metrics['output_tokens']['p90']:.0f}, "
+                    f"retries {metrics['retries']}, errors {metrics['errors']}, "
+                    f"repairs {metrics['repairs']}, re-calls {metrics['recalls']}, "
+                    f"cache hits {metrics['cache_hits']}, coalesced {metrics['coalesced']}, cost ${metrics['total_cost']:.4f}"
+                )
+        logger.info("="*60)
     
     def reset(self) -> None:
         """Reset token tracker for a new session."""
         with self.lock:
             self.usage = TokenUsage()
+            self.stages = {}
+            self.tiers = {}
     
 token_tracker = TokenTracker()
\ No newline at end of file
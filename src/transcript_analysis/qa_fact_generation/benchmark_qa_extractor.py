@@ -0,0 +1,84 @@
+"""
+Throughput benchmark of QAExtractor on a synthetic transcript.
+
+Builds a transcript in the usual layout (a form feed and page number, then
+numbered Q/A lines with continuations and colloquy) and times classify_lines
+and QAExtractor.extract_qa_pairs over it:
+
+    python -m transcript_analysis.qa_fact_generation.benchmark_qa_extractor --pages 1000
+"""
+import argparse
+import logging
+import random
+import time
+from typing import List
+
+from transcript_analysis.qa_fact_generation.utils.QA_extractor import QAExtractor, classify_lines
+
+logger = logging.getLogger(__name__)
+
+LINES_PER_PAGE = 25
+_WORDS = (
+    "the accident report vehicle intersection signal morning office contract payment meeting "
+    "document email witness company invoice doctor injury building manager shipment"
+).split()
+
+
+def synthetic_transcript(pages: int = 1000, seed: int = 0) -> List[str]:
+    """Lines of a deposition transcript with `pages` pages of LINES_PER_PAGE numbered lines."""
+    rng = random.Random(seed)
+
+    def sentence() -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 12))).capitalize() + "."
+
+    lines = [
+        "                 UNITED STATES DISTRICT COURT\n",
+        "              DEPOSITION OF JOHN DOE, a witness\n",
+    ]
+    for page in range(1, pages + 1):
+        lines.append(f"\f                                                    {page}\n")
+        speaker = "Q"
+        for number in range(1, LINES_PER_PAGE + 1):
+            roll = rng.random()
+            if roll < 0.05:
+                text = f"MR. SMITH:  Objection.  {sentence()}"
+            elif roll < 0.45:
+                text = f"{speaker}    {sentence()}"
+                speaker = "A" if speaker == "Q" else "Q"
+            else:
+                text = sentence()
+            lines.append(f"   {number:>2}   {text}\n")
+    return lines
+
+
+def _best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser("QAExtractor throughput on a synthetic transcript")
+    parser.add_argument("--pages", type=int, default=1000, help="pages in the synthetic transcript")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs; the fastest is reported")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    logger.setLevel(logging.INFO)
+
+    lines = synthetic_transcript(args.pages)
+    classify = _best_of(args.repeat, lambda: sum(1 for _ in classify_lines(lines)))
+    extract = _best_of(args.repeat, lambda: QAExtractor().extract_qa_pairs(lines))
+    qa_pairs, _ = QAExtractor().extract_qa_pairs(lines)
+
+    logger.info(f"Synthetic transcript: {args.pages} pages, {len(lines):,} lines, {len(qa_pairs):,} Q/A pairs")
+    for name, seconds in (("classify_lines", classify), ("extract_qa_pairs", extract)):
+        logger.info(
+            f"{name}: {seconds * 1000:.1f} ms, {len(lines) / seconds:,.0f} lines/s, {args.pages / seconds:,.0f} pages/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
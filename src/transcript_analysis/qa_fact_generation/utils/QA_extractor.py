@@ -1,23 +1,97 @@
+import itertools
 import re
-from typing import List, Tuple, Optional
+from typing import Iterable, Iterator, List, Sequence, Tuple, Optional
 import logging
 
 from config import CONFIG
 from transcript_analysis.qa_fact_generation.utils.conversation_utils import update_conversation
 from transcript_analysis.qa_fact_generation.utils.fact_creation import create_speaker_annotated_qa
+from transcript_analysis.qa_fact_generation.utils.file_utils import iter_transcript_lines
 from transcript_analysis.qa_fact_generation.utils.llm import generate_speakers
+from transcript_analysis.qa_fact_generation.utils.nlp_registry import get_nlp
+from transcript_analysis.qa_fact_generation.utils.qa_pair_table import QAPairTable
 from transcript_analysis.qa_fact_generation.utils.speaker_detection import NER_for_speaker_detection
 from transcript_analysis.models.pymodels import Conversation
-import spacy
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever classify_lines or iter_qa_pairs change their output: it keys the parse cache (utils/parse_cache.py)
+PARSER_VERSION = 1
+
+# Line tags assigned by classify_lines
+PAGE_BREAK = "page_break"
+QUESTION = "Q"
+ANSWER = "A"
+CONTINUATION = "continuation"
+COLLOQUY = "colloquy"
+OTHER = "other"
+
+# Stripped numbered line: "<line number><separator>" then an optional Q/A marker
+_NUMBERED_LINE = re.compile(r"(\d+)([:.\s]+)(?:([QA])\b)?")
+# After a form feed without a page number, the first "<number> <text>" line is transcript text again
+_PAGE_RESUME = re.compile(r"\d+\s+\w")
+_DIGITS = re.compile(r"\d+")
+_COLLOQUY_SPEAKER = re.compile(r"(?:(?:MR|MS|MRS|DR)\.\s+[A-Z][\w'-]*|THE\s+[A-Z]+)\s*:")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def classify_lines(lines: Iterable[str]) -> Iterator[Tuple[str, int, int, str, str]]:
+    """
+    Tag every transcript line once, in a single pass.
+
+    Yields (tag, page, line_number, content, line):
+        tag: PAGE_BREAK (form feed or the page number after it), QUESTION, ANSWER,
+             CONTINUATION, COLLOQUY (a numbered "MR. X:" / "THE WITNESS:" line) or OTHER.
+        page: Page the line is on.
+        line_number: The transcript's own line number, 0 for PAGE_BREAK and OTHER.
+        content: Stripped text after the line number and Q/A marker (the stripped line for PAGE_BREAK and OTHER).
+        line: The line as read.
+    """
+    page = 0
+    waiting_for_page_number = False
+    for line in lines:
+        if "\f" in line:
+            number = _DIGITS.search(line, line.index("\f") + 1)
+            if number:
+                page = int(number.group())
+            waiting_for_page_number = number is None
+            yield PAGE_BREAK, page, 0, line.strip(), line
+            continue
+
+        stripped = line.strip()
+        if waiting_for_page_number:
+            if _PAGE_RESUME.match(stripped):
+                waiting_for_page_number = False
+            else:
+                number = _DIGITS.search(line)
+                if number:
+                    page = int(number.group())
+                    waiting_for_page_number = False
+                yield PAGE_BREAK, page, 0, stripped, line
+                continue
+
+        match = _NUMBERED_LINE.match(stripped)
+        if match is None:
+            yield OTHER, page, 0, stripped, line
+            continue
+        line_number, separator, marker = match.groups()
+        if marker:
+            # The marker is only dropped when whitespace alone separates it from the line number
+            content = stripped[match.end():].lstrip() if separator.isspace() else stripped
+            yield (QUESTION if marker == "Q" else ANSWER), page, int(line_number), content, line
+        elif separator[0].isspace():
+            content = stripped[match.end(1):].lstrip()
+            tag = COLLOQUY if _COLLOQUY_SPEAKER.match(content) else CONTINUATION
+            yield tag, page, int(line_number), content, line
+        else:
+            yield OTHER, page, 0, stripped, line
+
 
 class QAExtractor:
     """Extracts Q&A pairs from transcript lines with page and line tracking."""
     
     def __init__(self, bedrock_client = None):
-        self.qa_pairs = [] #qa pairs with context - List of Q&A pairs as (question, answer, qpage, qline_number, apage, aline_number)
+        self.qa_pairs = QAPairTable() #qa pairs with context - sequence of Q&A pairs as (question, answer, qpage, qline_number, apage, aline_number)
         self.introductory_lines = []
         self.in_intro = True
         self.current_question = []
@@ -26,12 +100,14 @@ class QAExtractor:
         self.current_page = 0
         self.question_line_number = 0
         self.question_page_number = 0  # Page where the question started
+        self.answer_line_number = 0
+        self.answer_page_number = 0
         self.bedrock_client = bedrock_client
 
 
 
     
-    def detect_speaker_names(self, config, number_of_first_qa_pairs: int = 2, nlp="en_core_web_trf", print_usage: bool = False) -> Conversation:
+    def detect_speaker_names(self, config, number_of_first_qa_pairs: int = 2, nlp: Optional[str] = None, print_usage: bool = False) -> Conversation:
         """
         Detect speaker names for a deposition using LLM-based speaker detection.
         
@@ -41,27 +117,20 @@ class QAExtractor:
             introductory_lines: List of introductory lines for context.
             qa_pairs: List of Q&A pairs for context (each tuple: question, answer, _, _).
             number_of_first_qa_pairs: Number of Q&A pairs to use for context.
-            nlp: The spaCy model to use for processing.
+            nlp: The spaCy model to use for processing (default config.spacy_model).
             print_usage: Whether to print usage information.
         
         Returns:
             Conversation object containing detected speaker information (e.g., A_SPEAKER).
         """
         bedrock_client = self.bedrock_client
-        introductory_lines = self.introductory_lines
-        qa_pairs = self.qa_pairs
 
-        nlp = spacy.load(nlp)
+        nlp = get_nlp(config, nlp)
         conversation = Conversation()
         
         if config.only_A_detection:
-            # Build context from intro and up to number_of_first_qa_pairs
-            context_pairs = qa_pairs[:min(number_of_first_qa_pairs, len(qa_pairs))]
-            intro_context = "".join(introductory_lines).strip()
-            full_context = f"{intro_context}\n" + "\n".join([f"Q: {q}\nA: {a}" for q, a, _, _,_,_ in context_pairs])
-            
             # Call LLM to detect speakers
-            new_conversation = generate_speakers(bedrock_client, config, full_context, print_usage)
+            new_conversation = generate_speakers(bedrock_client, config, self.speaker_context(number_of_first_qa_pairs), print_usage)
             if new_conversation:
                 conversation = update_conversation(conversation, new_conversation, nlp, config)
         
@@ -70,27 +139,60 @@ class QAExtractor:
         config.conversation = conversation
         return conversation
  
-    def extract_qa_pairs(self, lines: List[str]) -> Tuple[List[Tuple[str, str, int, int, int, int]], List[str]]:
-        """Extract all Q&A pairs from the transcript with page and line numbers."""
-        self._reset_state()
-        
-        for i, line in enumerate(lines, 1):
-            logger.debug(line)
-            
-            if self._handle_page_number(line, i):
-                continue
-                
-            self._process_line(line, i)
-        
-        self._flush_current_pair()
+    def speaker_context(self, number_of_first_qa_pairs: int = 2) -> str:
+        """Speaker-detection context: the introductory lines and the first Q&A pairs."""
+        context_pairs = self.qa_pairs[:min(number_of_first_qa_pairs, len(self.qa_pairs))]
+        intro_context = "".join(self.introductory_lines).strip()
+        return f"{intro_context}\n" + "\n".join([f"Q: {q}\nA: {a}" for q, a, _, _,_,_ in context_pairs])
+
+    def extract_qa_pairs(self, lines: Iterable[str]) -> Tuple[QAPairTable, List[str]]:
+        """Extract all Q&A pairs from the transcript with page and line numbers, stored column-wise."""
+        qa_pairs = QAPairTable.from_pairs(self.iter_qa_pairs(lines))
+        self.qa_pairs = qa_pairs
         logger.info(f"Extracted {len(self.qa_pairs)} Q/A pairs")
         logger.debug("INTRODUCTORY LINES:\n")
         logger.debug(self.introductory_lines)
         return self.qa_pairs, self.introductory_lines
 
+    def iter_qa_pairs(self, lines: Iterable[str]) -> Iterator[Tuple[str, str, int, int, int, int]]:
+        """
+        Yield Q&A pairs as (question, answer, qpage, qline_number, apage, aline_number) as soon as each one ends.
+
+        Lines are consumed lazily and the pairs are not kept; introductory_lines is complete
+        once the first pair is yielded.
+        """
+        self._reset_state()
+        debug = logger.isEnabledFor(logging.DEBUG)
+
+        for i, (tag, page, line_number, content, line) in enumerate(classify_lines(lines), 1):
+            self.current_page = page
+            if tag == QUESTION:
+                # Only start a new question if we saw an answer or this is the first question
+                if self.in_intro or self.mode == "A" or not self.current_question:
+                    qa_pair = self._flush_current_pair(debug)
+                    if qa_pair:
+                        yield qa_pair
+                    self._handle_question_line(line_number, content, i, debug)
+                else:
+                    # Treat this Q line as a continuation of the current question
+                    self.current_question.append(content)
+                    if debug:
+                        logger.debug(f"Appended to question at line {i}: {content}")
+            elif self.in_intro:
+                self.introductory_lines.append(content if tag == PAGE_BREAK else line)
+            elif tag == ANSWER:
+                self._handle_answer_line(line_number, content, i, debug)
+            elif tag in (CONTINUATION, COLLOQUY):
+                # Colloquy on the record stays with the open question or answer
+                self._handle_continuation_line(content, i, debug)
+
+        qa_pair = self._flush_current_pair(debug)
+        if qa_pair:
+            yield qa_pair
+
     def _reset_state(self):
         """Reset the extractor state for a new extraction."""
-        self.qa_pairs = []
+        self.qa_pairs = QAPairTable()
         self.introductory_lines = []
         self.in_intro = True
         self.current_question = []
@@ -101,158 +203,59 @@ class QAExtractor:
         self.question_page_number = 0
         self.answer_line_number = 0
         self.answer_page_number = 0
-        
-    def _handle_page_number(self, line: str, line_index: int) -> bool:
-        """
-        Handle page number detection and update current page.
-        Returns True if line was a page number and should be skipped, False otherwise.
-        """
-        if not hasattr(self, 'waiting_for_page_number'):
-            self.waiting_for_page_number = False
-        
-        page_related = False
-        
-        if '\f' in line:
-            self.waiting_for_page_number = True
-            page_related = True
-            
-            after_f = line.split('\f', 1)[-1]
-            number_match = re.search(r'(\d+)', after_f)
-            if number_match:
-                try:
-                    self.current_page = int(number_match.group(1))
-                    self.waiting_for_page_number = False
-                    logger.debug(f"Updated page number to {self.current_page} (same line as \\f)")
-                except ValueError:
-                    pass
-        
-        elif self.waiting_for_page_number:
-            if re.match(r"^\s*\d+\s+(Q|A|\w)", line.strip()):
-                self.waiting_for_page_number = False
-                return False
-            
-            page_related = True
-            
-            number_match = re.search(r'(\d+)', line)
-            if number_match:
-                try:
-                    self.current_page = int(number_match.group(1))
-                    self.waiting_for_page_number = False
-                    logger.debug(f"Updated page number to {self.current_page} (line after \\f)")
-                except ValueError:
-                    pass
-        
-        if not page_related:
-            return False
-        
-        if self.in_intro:
-            logger.debug(f"line:{line} added to INTRO")
-            self.introductory_lines.append(line.strip())
-        
-        return True
-
-    def _process_line(self, line: str, line_index: int):
-        """Process each line for Q&A content or introductory material."""
-        if self.in_intro:
-            if self._is_question_line(line):
-                self.in_intro = False
-                self._handle_question_line(line, line_index)
-            else:
-                self.introductory_lines.append(line)
-        elif self._is_question_line(line):
-            # Only start a new question if we saw an answer or this is the first question
-            if self.mode == "A" or not self.current_question:
-                self._handle_question_line(line, line_index)
-            else:
-                # Treat this Q line as a continuation of the current question
-                content = re.sub(r"^\s*\d+\s+Q\b\s*", "", line.strip())
-                self.current_question.append(content)
-                logger.debug(f"Appended to question at line {line_index}: {content}")
-        elif self._is_answer_line(line):
-            self._handle_answer_line(line, line_index)
-        elif self._is_continuation_line(line):
-            self._handle_continuation_line(line, line_index)
-
-    def _is_question_line(self, line: str) -> bool:
-        """Check if line starts a new question."""
-        regex = r"^\s*\d+[:.\s]+\s*Q\b"
-        return bool(re.match(regex, line.strip()))
-
-    def _is_answer_line(self, line: str) -> bool:
-        """Check if line starts a new answer."""
-        regex = r"^\s*\d+[:.\s]+\s*A\b"
-        return bool(re.match(regex, line.strip()))
-
-    def _is_continuation_line(self, line: str) -> bool:
-        """Check if line is a continuation of current Q or A."""
-        return bool(re.match(r"^\s*\d+\s+", line.strip())) and not self._is_question_line(line) and not self._is_answer_line(line)
-
-    def _handle_question_line(self, line: str, line_index: int):
+
+    def _handle_question_line(self, line_number: int, content: str, line_index: int, debug: bool = False):
         """Handle the start of a new question."""
         self.in_intro = False
-        self._flush_current_pair()
-        
-        line_number_match = re.match(r"^\s*(\d+)", line.strip())
-        if line_number_match:
-            self.question_line_number = int(line_number_match.group(1))
-        
+        self.question_line_number = line_number
         self.question_page_number = self.current_page
-        
-        question_content = re.sub(r"^\s*\d+\s+Q\b\s*", "", line.strip())
-        self.current_question = [question_content]
+        self.current_question = [content]
         self.current_answer = []
         self.mode = "Q"
-        logger.debug(f"New question at line {line_index}: {line}")
-        logger.debug(f"Question starts on page {self.question_page_number}")
+        if debug:
+            logger.debug(f"New question at line {line_index}: {content}")
+            logger.debug(f"Question starts on page {self.question_page_number}")
 
-    def _handle_answer_line(self, line: str, line_index: int):
+    def _handle_answer_line(self, line_number: int, content: str, line_index: int, debug: bool = False):
         """Handle the start of a new answer."""
-        line_number_match = re.match(r"^\s*(\d+)", line.strip())
-        if line_number_match:
-            self.answer_line_number = int(line_number_match.group(1))
-        
+        self.answer_line_number = line_number
         self.answer_page_number = self.current_page
-
-        answer_content = re.sub(r"^\s*\d+\s+A\b\s*", "", line.strip())
-        self.current_answer = [answer_content]
+        self.current_answer = [content]
         self.mode = "A"
-        logger.debug(f"New answer at line {line_index}: {line}")
+        if debug:
+            logger.debug(f"New answer at line {line_index}: {content}")
 
-    def _handle_continuation_line(self, line: str, line_index: int):
+    def _handle_continuation_line(self, content: str, line_index: int, debug: bool = False):
         """Handle continuation of current question or answer."""
-        content = re.sub(r"^\s*\d+\s+", "", line.strip())
-        
+        if not content:
+            return
         if self.mode == "Q":
-            if content:
-                self.current_question.append(content)
+            self.current_question.append(content)
+            if debug:
                 logger.debug(f"Appended to question at line {line_index}: {content}")
         elif self.mode == "A":
-            if content:
-                self.current_answer.append(content)
+            self.current_answer.append(content)
+            if debug:
                 logger.debug(f"Appended to answer at line {line_index}: {content}")
 
-    def _flush_current_pair(self):
-        """Flush current Q&A pair to the results list."""
+    def _flush_current_pair(self, debug: bool = False) -> Optional[Tuple[str, str, int, int, int, int]]:
+        """Close the current Q&A pair and return it (None if no question is open)."""
         if not self.current_question:
-            return
+            return None
             
-        question = " ".join(self.current_question).strip()
-        question = re.sub(r'\s+', ' ', question)  # Replace multiple spaces with single space
-        
-        answer = " ".join(self.current_answer).strip() if self.current_answer else ""
-        answer = re.sub(r'\s+', ' ', answer)  # Replace multiple spaces with single space
+        question = _WHITESPACE.sub(' ', " ".join(self.current_question).strip())  # Replace multiple spaces with single space
+        answer = _WHITESPACE.sub(' ', " ".join(self.current_answer).strip()) if self.current_answer else ""
     
         # Ensure answer page/line are set, default to question page/line if no answer found
-        a_page = self.answer_page_number if hasattr(self, 'answer_page_number') and self.answer_page_number > 0 else self.question_page_number
-        a_line = self.answer_line_number if hasattr(self, 'answer_line_number') and self.answer_line_number > 0 else self.question_line_number
+        a_page = self.answer_page_number if self.answer_page_number > 0 else self.question_page_number
+        a_line = self.answer_line_number if self.answer_line_number > 0 else self.question_line_number
         
-        # CHANGE THIS LINE - Create 6-tuple instead of 4-tuple
         qa_pair = (question, answer, self.question_page_number, self.question_line_number, a_page, a_line)
-        self.qa_pairs.append(qa_pair)
         
-        
-        logger.debug(f"Flushed pair: Q='{question}' (page {self.question_page_number}, line {self.question_line_number}), "
-                f"A='{answer}' (page {a_page}, line {a_line})")
+        if debug:
+            logger.debug(f"Flushed pair: Q='{question}' (page {self.question_page_number}, line {self.question_line_number}), "
+                    f"A='{answer}' (page {a_page}, line {a_line})")
+        return qa_pair
 
 
 
@@ -316,7 +319,7 @@ class QAExtractor:
     #         return formatted_qa_pairs
 
     #     return [{"q": q, "a": a} for q, a, _, _ in self.qa_pairs]
-    def format_the_pairs(self, add_witness_name: bool = False, nlp="en_core_web_trf", number_of_first_qa_pairs: int = 2, print_usage: bool = False, annotate_answer_only: bool = True) -> List[dict]:
+    def format_the_pairs(self, add_witness_name: bool = False, nlp: Optional[str] = None, number_of_first_qa_pairs: int = 2, print_usage: bool = False, annotate_answer_only: bool = True) -> Sequence[dict]:
         """
         Format the extracted Q&A pairs into a list of dictionaries with separate location info for questions and answers.
         
@@ -325,60 +328,85 @@ class QAExtractor:
                 'q': question, 'q_page': page, 'q_line': line,
                 'a': answer, 'a_page': page, 'a_line': line
             }
+            Without add_witness_name this is a lazy view over qa_pairs that builds each dict on access.
         """
-        if add_witness_name:
-            nlp = spacy.load(nlp)
-            formatted_qa_pairs = []
-            conversation = Conversation()
-            intro_context = "".join(self.introductory_lines).strip()
-            speakers_detected = False  # Track single detection
-
-            for idx, (question, answer, q_page, q_line, a_page, a_line) in enumerate(self.qa_pairs):
-                question_sa = question
-                answer_sa = answer
-
-                # Perform LLM-based speaker detection once if only_A_detection is True
-                if not speakers_detected and CONFIG.only_A_detection:
-                    # Build context from intro and up to number_of_first_qa_pairs
-                    context_pairs = self.qa_pairs[:min(idx + number_of_first_qa_pairs, len(self.qa_pairs))]
-                    full_context = f"{intro_context}\n" + "\n".join([f"Q: {q}\nA: {a}" for q, a, _, _, _, _ in context_pairs])
-                    
-                    # Call LLM to detect speakers
-                    new_conversation = generate_speakers(self.bedrock_client, CONFIG, full_context, print_usage)
-                    if new_conversation:
-                        speakers_detected = True
-                        conversation = update_conversation(conversation, new_conversation, nlp, CONFIG)
-
-                # Annotate only the answer with speaker
-                question_sa, answer_sa, _ = create_speaker_annotated_qa(
-                    question, answer, conversation, prepend_speakers=True, CONFIG=CONFIG, annotate_answer_only=annotate_answer_only
-                )
-
-                logger.debug(f"Q_SA:{question_sa}\nA_SA:{answer_sa}")
-                # Include separate page and line information for questions and answers
-                formatted_qa_pairs.append({
-                    "q": question_sa, 
+        if not add_witness_name:
+            return self.qa_pairs.dicts()
+        return list(self.iter_formatted_pairs(
+            self.qa_pairs, add_witness_name, nlp, number_of_first_qa_pairs, print_usage, annotate_answer_only
+        ))
+
+    def iter_formatted_pairs(self, qa_pairs: Iterable[Tuple[str, str, int, int, int, int]], add_witness_name: bool = False, nlp: Optional[str] = None, number_of_first_qa_pairs: int = 2, print_usage: bool = False, annotate_answer_only: bool = True, conversation: Optional[Conversation] = None) -> Iterator[dict]:
+        """
+        Streaming form of format_the_pairs over any iterable of Q&A pairs (e.g. iter_qa_pairs).
+
+        Only the pairs needed for the speaker-detection context are read ahead, so the first
+        formatted pair is available before the rest of the transcript is parsed. A given
+        conversation (e.g. from ParsedTranscript.detect_speakers) skips speaker detection.
+        """
+        if not add_witness_name:
+            # For the non-speaker-annotated case, also include separate page and line info
+            for q, a, q_page, q_line, a_page, a_line in qa_pairs:
+                yield {
+                    "q": q, 
                     "q_page": q_page, 
                     "q_line": q_line,
-                    "a": answer_sa, 
+                    "a": a, 
                     "a_page": a_page, 
                     "a_line": a_line
-                })
-            CONFIG.conversation = conversation
-            return formatted_qa_pairs
-
-        # For the non-speaker-annotated case, also include separate page and line info
-        return [{
-            "q": q, 
-            "q_page": q_page, 
-            "q_line": q_line,
-            "a": a, 
-            "a_page": a_page, 
-            "a_line": a_line
-        } for q, a, q_page, q_line, a_page, a_line in self.qa_pairs]
-
-
-def extract_qa_pairs(lines: List[str]) -> Tuple[List[Tuple[str, str, int, int, int, int]], List[str]]:
+                }
+            return
+
+        speakers_detected = conversation is not None  # Track single detection
+        if conversation is None:
+            conversation = Conversation()
+            nlp = get_nlp(CONFIG, nlp)
+        pairs = iter(qa_pairs)
+        read_ahead = []  # pairs read for the detection context, in order; no longer grows once speakers are detected
+        idx = 0
+
+        while True:
+            detecting = not speakers_detected and CONFIG.only_A_detection
+            if detecting:
+                read_ahead.extend(itertools.islice(pairs, max(0, idx + max(1, number_of_first_qa_pairs) - len(read_ahead))))
+            pair = read_ahead[idx] if idx < len(read_ahead) else next(pairs, None)
+            if pair is None:
+                break
+            question, answer, q_page, q_line, a_page, a_line = pair
+
+            # Perform LLM-based speaker detection once if only_A_detection is True
+            if detecting:
+                # Build context from intro and up to number_of_first_qa_pairs
+                context_pairs = read_ahead[:idx + number_of_first_qa_pairs]
+                intro_context = "".join(self.introductory_lines).strip()
+                full_context = f"{intro_context}\n" + "\n".join([f"Q: {q}\nA: {a}" for q, a, _, _, _, _ in context_pairs])
+
+                # Call LLM to detect speakers
+                new_conversation = generate_speakers(self.bedrock_client, CONFIG, full_context, print_usage)
+                if new_conversation:
+                    speakers_detected = True
+                    conversation = update_conversation(conversation, new_conversation, nlp, CONFIG)
+
+            # Annotate only the answer with speaker
+            question_sa, answer_sa, _ = create_speaker_annotated_qa(
+                question, answer, conversation, prepend_speakers=True, CONFIG=CONFIG, annotate_answer_only=annotate_answer_only
+            )
+
+            logger.debug(f"Q_SA:{question_sa}\nA_SA:{answer_sa}")
+            # Include separate page and line information for questions and answers
+            yield {
+                "q": question_sa, 
+                "q_page": q_page, 
+                "q_line": q_line,
+                "a": answer_sa, 
+                "a_page": a_page, 
+                "a_line": a_line
+            }
+            idx += 1
+        CONFIG.conversation = conversation
+
+
+def extract_qa_pairs(lines: Iterable[str]) -> Tuple[QAPairTable, List[str]]:
     """
     Extract all Q&A pairs from the transcript with page and line numbers.
     
@@ -387,9 +415,20 @@ def extract_qa_pairs(lines: List[str]) -> Tuple[List[Tuple[str, str, int, int, i
         
     Returns:
         Tuple containing:
-        - List of Q&A pairs as (question, answer, page, line_number)
+        - QAPairTable of Q&A pairs as (question, answer, q_page, q_line, a_page, a_line)
         - List of introductory lines before first Q&A pair
     """
     extractor = QAExtractor()
     qa_pairs_with_context, intro_lines =  extractor.extract_qa_pairs(lines)
-    return qa_pairs_with_context, intro_lines
\ No newline at end of file
+    return qa_pairs_with_context, intro_lines
+
+
+def iter_qa_pairs(path: str) -> Iterator[Tuple[str, str, int, int, int, int]]:
+    """
+    Stream the Q&A pairs of a transcript file, reading it lazily.
+
+    Yields (question, answer, q_page, q_line, a_page, a_line) as soon as each pair ends, so
+    callers can start on the first pairs while the rest of the file is parsed. Use
+    QAExtractor.iter_qa_pairs to also get the introductory lines.
+    """
+    yield from QAExtractor().iter_qa_pairs(iter_transcript_lines(path))
@@ -0,0 +1,305 @@
+"""
+Offline Bedrock batch inference for bulk structured calls.
+
+Reprocessing a whole depo-summaries tree makes thousands of independent
+generate_structured_output calls (one per deposition chunk, per nugget batch,
+...). run_batch sends them as Bedrock model invocation jobs instead: the
+requests are written to a JSONL manifest in the batch-inference format
+({"recordId", "modelInput"}, where modelInput is the model's native
+InvokeModel body), the job is run, and every answer that validates is stored
+in the response cache under the key generate_structured_output computes for
+the same request.
+
+The regular pipeline then runs unchanged and reassembles the nuggets and
+evaluation JSON files from cache hits; requests the job could not answer are
+simply called live. Runners:
+
+  BedrockBatchRunner  - uploads the manifest to S3, submits a model invocation
+                        job, polls it and downloads the output
+  LocalBatchRunner    - executes the manifest record by record with
+                        invoke_model and writes output in the job's format,
+                        for testing without S3 or a service role
+"""
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from transcript_analysis.models.TokenTracker import token_tracker
+from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import (
+    calculate_cost, converse_request_parts, first_attempt_target, resolve_model_target,
+)
+from transcript_analysis.qa_fact_generation.utils.output_repair import validate_tool_input
+from transcript_analysis.qa_fact_generation.utils.response_cache import get_response_cache, make_cache_key
+from transcript_analysis.qa_fact_generation.utils.run_ledger import get_run_ledger
+
+logger = logging.getLogger(__name__)
+
+# Batch inference is billed at half the on-demand price
+BATCH_PRICE_FACTOR = 0.5
+
+ANTHROPIC_VERSION = "bedrock-2023-05-31"
+
+# generate_structured_output arguments that shape the request (and so the cache key)
+_REQUEST_PARTS = ("tool_schema", "tool_schema_name", "description", "max_tokens", "temp", "top_p")
+
+_TERMINAL_OK = {"Completed", "PartiallyCompleted"}
+_TERMINAL_FAILED = {"Failed", "Stopped", "Expired"}
+
+
+def _model_family(model_id: str) -> str:
+    base_id = model_id.split(".", 1)[1] if model_id.split(".", 1)[0] in ("us", "eu", "apac") else model_id
+    if base_id.startswith("anthropic."):
+        return "anthropic"
+    if base_id.startswith("amazon.nova"):
+        return "nova"
+    raise ValueError(f"Batch inference supports Anthropic Claude and Amazon Nova models, not {model_id}")
+
+
+def _text_blocks(message: Dict[str, Any]) -> List[str]:
+    # cachePoint blocks have no meaning in a batch job
+    return [block["text"] for block in message.get("content", []) if "text" in block]
+
+
+def to_model_input(model_id: str, messages: List[Dict[str, Any]], toolconfig: Dict[str, Any],
+                   inference_config: Dict[str, Any]) -> Dict[str, Any]:
+    """InvokeModel body equivalent to a converse request with a forced tool."""
+    if _model_family(model_id) == "anthropic":
+        tool = toolconfig["tools"][0]["toolSpec"]
+        return {
+            "anthropic_version": ANTHROPIC_VERSION,
+            "max_tokens": inference_config["maxTokens"],
+            "temperature": inference_config["temperature"],
+            "top_p": inference_config["topP"],
+            "messages": [
+                {"role": message["role"], "content": [{"type": "text", "text": text} for text in _text_blocks(message)]}
+                for message in messages
+            ],
+            "tools": [{"name": tool["name"], "description": tool["description"], "input_schema": tool["inputSchema"]["json"]}],
+            "tool_choice": {"type": "tool", "name": tool["name"]},
+        }
+    return {
+        "schemaVersion": "messages-v1",
+        "messages": [
+            {"role": message["role"], "content": [{"text": text} for text in _text_blocks(message)]}
+            for message in messages
+        ],
+        "toolConfig": toolconfig,
+        "inferenceConfig": inference_config,
+    }
+
+
+def parse_model_output(model_id: str, output: Dict[str, Any]) -> Tuple[Optional[Any], int, int]:
+    """(tool input or None, input tokens, output tokens) of an InvokeModel response body."""
+    if _model_family(model_id) == "anthropic":
+        usage = output.get("usage", {})
+        tool_input = next(
+            (block["input"] for block in output.get("content", []) if block.get("type") == "tool_use"), None
+        )
+        return tool_input, usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = output.get("usage", {})
+    content = output.get("output", {}).get("message", {}).get("content", [])
+    tool_input = next((block["toolUse"]["input"] for block in content if "toolUse" in block), None)
+    return tool_input, usage.get("inputTokens", 0), usage.get("outputTokens", 0)
+
+
+def write_manifest(path: str, records: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    """Write (record id, model input) pairs as a batch-inference JSONL manifest; returns the record count."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for record_id, model_input in records:
+            f.write(json.dumps({"recordId": record_id, "modelInput": model_input}) + "\n")
+            count += 1
+    return count
+
+
+def read_output(path: str) -> Iterable[Dict[str, Any]]:
+    """Records of a batch output file ({"recordId", "modelInput", "modelOutput" | "error"})."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class BedrockBatchRunner:
+    """Runs a manifest as a Bedrock model invocation job through S3."""
+
+    # Bedrock rejects jobs with fewer records; smaller groups are left to live calls
+    min_records = 100
+
+    def __init__(self, config):
+        if not config.batch_s3_uri or not config.batch_role_arn:
+            raise ValueError("Bedrock batch jobs need BEDROCK_BATCH_S3_URI and BEDROCK_BATCH_ROLE_ARN")
+        from src.utils.aws_session import get_client
+
+        profile_name = config.sso_profile if config.sso_profile != "default" else None
+        self.config = config
+        self.s3 = get_client("s3", profile_name, config.aws_region)
+        self.bedrock = get_client("bedrock", profile_name, config.aws_region)
+        bucket, _, prefix = config.batch_s3_uri[len("s3://"):].partition("/")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _key(self, *parts: str) -> str:
+        return "/".join(part for part in (self.prefix, *parts) if part)
+
+    def run(self, manifest_path: str, model_id: str, job_name: str) -> str:
+        """Submit the manifest, wait for the job and return the local path of its output."""
+        manifest_name = os.path.basename(manifest_path)
+        input_key = self._key("input", manifest_name)
+        self.s3.upload_file(manifest_path, self.bucket, input_key)
+        job_arn = self.bedrock.create_model_invocation_job(
+            jobName=job_name,
+            roleArn=self.config.batch_role_arn,
+            modelId=model_id,
+            inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{self.bucket}/{input_key}", "s3InputFormat": "JSONL"}},
+            outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"s3://{self.bucket}/{self._key('output')}/"}},
+        )["jobArn"]
+        logger.info(f"Submitted batch job {job_name} ({job_arn})")
+
+        while True:
+            job = self.bedrock.get_model_invocation_job(jobIdentifier=job_arn)
+            status = job["status"]
+            if status in _TERMINAL_OK:
+                break
+            if status in _TERMINAL_FAILED:
+                raise RuntimeError(f"Batch job {job_name} ended with status {status}: {job.get('message', '')}")
+            logger.info(f"Batch job {job_name}: {status}")
+            time.sleep(self.config.batch_poll_seconds)
+
+        # Output lands under <output prefix>/<job id>/<manifest name>.out
+        output_path = f"{manifest_path}.out"
+        job_id = job_arn.rsplit("/", 1)[-1]
+        self.s3.download_file(self.bucket, self._key("output", job_id, f"{manifest_name}.out"), output_path)
+        return output_path
+
+
+class LocalBatchRunner:
+    """Executes a manifest here with invoke_model; output matches a batch job's."""
+
+    min_records = 1
+
+    def __init__(self, config, client=None):
+        from src.utils.aws_session import get_bedrock_runtime_client
+
+        self.config = config
+        self.client = client or get_bedrock_runtime_client(config)
+
+    def _invoke(self, model_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = self.client.invoke_model(
+                modelId=resolve_model_target(model_id, self.config),
+                body=json.dumps(record["modelInput"]),
+                contentType="application/json",
+                accept="application/json",
+            )
+            return {**record, "modelOutput": json.loads(response["body"].read())}
+        except Exception as e:
+            return {**record, "error": {"errorCode": type(e).__name__, "errorMessage": str(e)}}
+
+    def run(self, manifest_path: str, model_id: str, job_name: str) -> str:
+        """Run every record of the manifest and return the path of the output file."""
+        with open(manifest_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        logger.info(f"Running batch job {job_name} locally ({len(records)} records)")
+        with ThreadPoolExecutor(max_workers=self.config.llm_max_concurrency) as executor:
+            outputs = list(executor.map(lambda record: self._invoke(model_id, record), records))
+        output_path = f"{manifest_path}.out"
+        with open(output_path, "w", encoding="utf-8") as f:
+            for output in outputs:
+                f.write(json.dumps(output) + "\n")
+        return output_path
+
+
+def get_batch_runner(config):
+    """Runner for config.batch_runner ("bedrock" or "local")."""
+    if config.batch_runner == "local":
+        return LocalBatchRunner(config)
+    if config.batch_runner == "bedrock":
+        return BedrockBatchRunner(config)
+    raise ValueError(f"Unknown batch runner '{config.batch_runner}'; expected 'bedrock' or 'local'")
+
+
+def run_batch(requests: List[Dict[str, Any]], config, job_name: str, runner=None) -> Dict[str, int]:
+    """
+    Answer requests with batch jobs (one per model) and store the results in the response cache.
+
+    Args:
+        requests: generate_structured_output keyword arguments (without bedrock_client), e.g. from
+            build_chunk_nugget_request
+        config: App config; the response cache must be enabled
+        job_name: Prefix for manifest files and job names
+        runner: BedrockBatchRunner or LocalBatchRunner (defaults to get_batch_runner(config))
+
+    Returns:
+        Counts of requests that were "cached" by the job, "failed" in it, "skipped" (already
+        cached) and "live" (model groups too small for a batch job)
+
+    Raises:
+        ValueError: If the response cache is disabled, since nothing could pick up the results
+    """
+    if not config.response_cache_enabled:
+        raise ValueError("Batch mode hands results to the pipeline through the response cache; enable it")
+    cache = get_response_cache(config)
+    runner = runner or get_batch_runner(config)
+    ledger = get_run_ledger(config) if config.run_ledger_enabled else None
+    counts = {"cached": 0, "failed": 0, "skipped": 0, "live": 0}
+
+    # model id -> cache key -> (request, messages, toolconfig, inference_config); identical requests collapse
+    groups: Dict[str, Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]], Dict[str, Any], Dict[str, Any]]]] = {}
+    for request in requests:
+        model_id, messages = first_attempt_target(request, config)
+        toolconfig, inference_config = converse_request_parts(**{k: request[k] for k in _REQUEST_PARTS if k in request})
+        key = make_cache_key(model_id, messages, toolconfig, inference_config, config.prompt_version)
+        if cache.get(key) is not None:
+            counts["skipped"] += 1
+            continue
+        groups.setdefault(model_id, {})[key] = (request, messages, toolconfig, inference_config)
+
+    for model_id, group in groups.items():
+        if len(group) < runner.min_records:
+            logger.info(f"{len(group)} request(s) for {model_id} are below the batch minimum; they will run live")
+            counts["live"] += len(group)
+            continue
+        name = f"{job_name}-{re.sub(r'[^A-Za-z0-9-]', '-', model_id)}-{time.strftime('%Y%m%d%H%M%S')}"
+        manifest_path = os.path.join(config.batch_work_dir, f"{name}.jsonl")
+        keys = list(group)
+        write_manifest(manifest_path, (
+            (f"{index:011d}", to_model_input(model_id, *group[key][1:])) for index, key in enumerate(keys)
+        ))
+        output_path = runner.run(manifest_path, model_id, name)
+
+        answered = set()
+        for record in read_output(output_path):
+            key = keys[int(record["recordId"])]
+            request = group[key][0]
+            stage = request.get("stage") or request["tool_schema_name"]
+            if "modelOutput" not in record:
+                logger.warning(f"Batch record {record['recordId']} ({stage}) failed: {record.get('error')}")
+                continue
+            tool_input, input_tokens, output_tokens = parse_model_output(model_id, record["modelOutput"])
+            cost = calculate_cost(model_id, input_tokens, output_tokens) * BATCH_PRICE_FACTOR
+            token_tracker.update(input_tokens, output_tokens, cost, 0.0, stage=stage, tier=request.get("tier"))
+            if ledger is not None:
+                ledger.record(stage, request["description"], model_id, input_tokens, output_tokens, cost, 0.0,
+                              error=tool_input is None)
+            try:
+                # Results go straight to the response cache, so truncated lists are never trimmed here
+                tool_input, fixes, _ = validate_tool_input(request["obj"], tool_input, request["tool_schema"])
+            except Exception as e:
+                logger.warning(f"Batch record {record['recordId']} ({stage}) is unusable: {e}")
+                continue
+            if fixes:
+                token_tracker.record_repair(stage)
+            cache.put(key, {"tool_input": tool_input, "input_tokens": input_tokens, "output_tokens": output_tokens})
+            answered.add(key)
+        counts["cached"] += len(answered)
+        counts["failed"] += len(group) - len(answered)
+        logger.info(f"Batch job {name}: {len(answered)}/{len(group)} answers cached")
+    return counts
@@ -1,45 +1,36 @@
 from logging import config
+import asyncio
+import copy
+import functools
+import weakref
 import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 import logging
 import time
 import sys
-from backend.log_pipeline import log_each_generation
-from make_inference_profile import retrieve_or_create_inference_profile
-from src.transcript_analysis.models.TokenTracker import token_tracker
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
-    RetryError
-)
-from typing import Any, Dict, List, Optional, Type
+from make_inference_profile import get_inference_profile_arn, invalidate_inference_profile
+from transcript_analysis.models.TokenTracker import token_tracker
+from transcript_analysis.qa_fact_generation.utils.hedging import get_request_hedger
+from transcript_analysis.qa_fact_generation.utils.model_cascade import get_model_cascade, should_escalate
+from transcript_analysis.qa_fact_generation.utils.output_repair import validate_tool_input
+from transcript_analysis.qa_fact_generation.utils.rate_limiter import estimate_request_tokens, get_rate_limiter
+from transcript_analysis.qa_fact_generation.utils.context_executor import ContextThreadPoolExecutor
+from transcript_analysis.qa_fact_generation.utils.retry_policy import InvalidToolResponse, classify_error, get_retry_policy
+from transcript_analysis.qa_fact_generation.utils.response_cache import get_response_cache, make_cache_key
+from transcript_analysis.qa_fact_generation.utils.run_ledger import get_run_ledger
+from transcript_analysis.qa_fact_generation.utils.singleflight import SingleFlight
+from transcript_analysis.qa_fact_generation.utils.token_counter import count_tokens
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
 from config import CONFIG
+from src.utils.converse_stream import OffSchemaOutput, ToolInputStreamParser, assemble_stream_response
 logger = logging.getLogger(__name__)
-inference_prof = retrieve_or_create_inference_profile(CONFIG)
-CSV_LOG_PATH = "/Users/nfarzi/Documents/nextpoint/deposition-pipeline-ui_/public/evaluation_pipeline_run_log.csv"
 
 
 
 def handle_aws_error(error):
     """Handle AWS errors with clean user messages and exit."""
     
-    # Handle RetryError wrapping ClientError
-    if isinstance(error, RetryError):
-        if hasattr(error, 'last_attempt') and error.last_attempt.exception():
-            original_error = error.last_attempt.exception()
-            if isinstance(original_error, ClientError):
-                error_code = original_error.response['Error']['Code']
-                if error_code == 'ExpiredTokenException':
-                    print("Error: Your AWS credentials have expired.")
-                    print("Please refresh your AWS credentials and try again.")
-                    sys.exit(1)
-        print("Error: Failed to process transcript. Please try again.")
-        sys.exit(1)
-    
-    # Handle direct ClientError
-    elif isinstance(error, ClientError):
+    if isinstance(error, ClientError):
         error_code = error.response['Error']['Code']
         if error_code == 'ExpiredTokenException':
             print("Error: Your AWS credentials have expired.")
@@ -50,15 +41,10 @@ def handle_aws_error(error):
 
 def initialize_bedrock_model(CONFIG: config) -> boto3.client:
     try:
-        # Initialize session with a specific profile
-        print(CONFIG.sso_profile)
-        session = boto3.Session(profile_name=CONFIG.sso_profile)
-        creds = session.get_credentials().get_frozen_credentials()
+        from src.utils.aws_session import get_bedrock_runtime_client
 
-        print("AWS_ACCESS_KEY_ID =", creds.access_key)
-        print("AWS_SECRET_ACCESS_KEY =", creds.secret_key)
-        print("AWS_SESSION_TOKEN =", creds.token)
-        bedrock = session.client("bedrock-runtime", region_name=CONFIG.aws_region, )
+        # Process-wide client: one keep-alive pool sized to CONFIG.llm_max_concurrency
+        bedrock = get_bedrock_runtime_client(CONFIG)
 
         return bedrock
     except Exception as e:
@@ -85,25 +71,234 @@ BEDROCK_PRICING = {
     "amazon.nova-pro-v1:0": {
         'input': 0.0008,   # $0.80 per 1k input tokens
         'output': 0.0032   # $3.20 per 1k output tokens
+    },
+    "amazon.nova-lite-v1:0": {
+        'input': 0.00006,
+        'output': 0.00024
+    },
+    "amazon.nova-micro-v1:0": {
+        'input': 0.000035,
+        'output': 0.00014
+    },
+    'anthropic.claude-3-haiku-20240307-v1:0': {
+        'input': 0.00025,
+        'output': 0.00125
+    },
+    'anthropic.claude-3-5-haiku-20241022-v1:0': {
+        'input': 0.0008,
+        'output': 0.004
     }
 }
 
-def calculate_cost(model_id: str, input_tokens: int, output_tokens: int) -> float:
+# Prompt-cache reads and writes are billed relative to the model's input price
+CACHE_READ_PRICE_FACTOR = 0.1
+CACHE_WRITE_PRICE_FACTOR = 1.25
+
+# Model families that accept Converse cachePoint blocks
+PROMPT_CACHE_MODEL_PREFIXES = (
+    "anthropic.claude-3-5-haiku",
+    "anthropic.claude-3-7-sonnet",
+    "anthropic.claude-sonnet-4",
+    "anthropic.claude-opus-4",
+    "amazon.nova-micro",
+    "amazon.nova-lite",
+    "amazon.nova-pro",
+    "amazon.nova-premier",
+)
+
+def calculate_cost(model_id: str, input_tokens: int, output_tokens: int,
+                   cache_read_tokens: int = 0, cache_write_tokens: int = 0) -> float:
     """Calculate cost based on model pricing"""
     pricing = BEDROCK_PRICING.get(model_id, {'input': 0.001, 'output': 0.005})  # default fallback
     input_cost = (input_tokens / 1000) * pricing['input']
     output_cost = (output_tokens / 1000) * pricing['output']
-    return input_cost + output_cost
+    cache_cost = ((cache_read_tokens * CACHE_READ_PRICE_FACTOR + cache_write_tokens * CACHE_WRITE_PRICE_FACTOR) / 1000) * pricing['input']
+    return input_cost + output_cost + cache_cost
+
+
+def resolve_model_target(model_id: str, config=None) -> str:
+    """modelId to send to Bedrock: the (lazily resolved, cached) inference profile ARN for model_id."""
+    config = config or CONFIG
+    # Replay runs are offline, so there is no inference profile to look up
+    if config.bedrock_mode == "replay":
+        return model_id
+    return get_inference_profile_arn(config, model_id)
+
+
+def supports_prompt_caching(model_id: str) -> bool:
+    """Whether the model accepts Converse cachePoint blocks (cross-region prefixes like 'us.' are ignored)."""
+    base_id = model_id.split(".", 1)[1] if model_id.split(".", 1)[0] in ("us", "eu", "apac") else model_id
+    return base_id.startswith(PROMPT_CACHE_MODEL_PREFIXES)
+
+
+def build_cached_messages(prefix: str, suffix: str, model_id: str) -> List[Dict[str, Any]]:
+    """
+    Build a single user message whose invariant prefix is followed by a cache point.
+
+    prefix should hold everything that repeats across calls (instructions, summary),
+    suffix the per-call part. The cache point is only added when prompt caching is
+    enabled, the model supports it and the prefix is long enough to be cached;
+    otherwise prefix + suffix is sent as one text block, exactly as before.
+    """
+    if (
+        CONFIG.prompt_caching_enabled
+        and supports_prompt_caching(model_id)
+        and count_tokens(prefix) >= CONFIG.prompt_cache_min_tokens
+    ):
+        content = [{"text": prefix}, {"cachePoint": {"type": "default"}}, {"text": suffix}]
+    else:
+        content = [{"text": prefix + suffix}]
+    return [{"role": "user", "content": content}]
+
+
+def strip_cache_points(messages: List[Dict[str, Any]], model_id: str) -> List[Dict[str, Any]]:
+    """
+    messages as model_id accepts them: cachePoint blocks are dropped (and the text
+    around them rejoined) for models without prompt caching.
+    """
+    if supports_prompt_caching(model_id):
+        return messages
+    adapted = []
+    for message in messages:
+        content = []
+        for block in message.get("content", []):
+            if "cachePoint" in block:
+                continue
+            if "text" in block and content and set(content[-1]) == {"text"}:
+                content[-1] = {"text": content[-1]["text"] + block["text"]}
+            else:
+                content.append(block)
+        adapted.append({**message, "content": content})
+    return adapted
+
+
+def first_attempt_target(request: Dict[str, Any], config=None) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Model and messages the first attempt of a generate_structured_output request (its keyword
+    arguments) is sent with: the first rung of the tier's cascade, if the cascade is on.
+    """
+    config = config or CONFIG
+    if request.get("tier") is not None and config.model_cascade_enabled:
+        ladder = get_model_cascade(config).ladder(request["tier"])
+        if ladder:
+            return ladder[0], strip_cache_points(request["messages"], ladder[0])
+    return request["model_id"], request["messages"]
+
+
+def _converse_streaming(bedrock_client, request: Dict[str, Any], tool_schema: Dict[str, Any],
+                        on_item: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    """
+    Call converse_stream and return the equivalent converse response.
+
+    The tool input is validated against tool_schema while it streams; on the first
+    off-schema token the stream is closed and OffSchemaOutput is raised, so the
+    retry starts without waiting for the rest of the generation.
+    """
+    parser = ToolInputStreamParser(tool_schema, on_item)
+    stream = bedrock_client.converse_stream(**request)["stream"]
+    try:
+        return assemble_stream_response(stream, lambda name, piece: parser.feed(piece))
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+
+def _converse_hedged(bedrock_client, request: Dict[str, Any], model_id: str, stage: str,
+                     estimated_tokens: int) -> Tuple[Dict[str, Any], str]:
+    """
+    converse with hedging: past the stage's latency percentile the request is also
+    sent to CONFIG.hedge_region (and CONFIG.hedge_model_path, if set) and the first
+    tool response wins. The losing call's cost is recorded as hedge waste at its own
+    model's price.
+
+    The hedge takes its own rate-limiter capacity (estimated_tokens) before it is sent;
+    the primary's was acquired by the caller. Returns (response, model id that answered).
+    """
+    from src.utils.aws_session import get_bedrock_runtime_client
+
+    hedge_model = CONFIG.hedge_model_path or model_id
+    hedge_config = CONFIG.model_copy(update={"aws_region": CONFIG.hedge_region, "model_path": hedge_model})
+    rate_limiter = get_rate_limiter(CONFIG)
+
+    def secondary() -> Dict[str, Any]:
+        client = get_bedrock_runtime_client(hedge_config)
+        rate_limiter.acquire(estimated_tokens)
+        try:
+            response = client.converse(**{**request, "modelId": resolve_model_target(hedge_model, hedge_config)})
+        except ClientError as e:
+            # A rejected call used no tokens; throttling also cuts the rate
+            rate_limiter.settle(estimated_tokens, 0)
+            if e.response.get('Error', {}).get('Code', '').lower() == 'throttlingexception':
+                rate_limiter.on_throttle()
+            raise
+        usage = response.get("usage", {})
+        rate_limiter.settle(estimated_tokens, usage.get("inputTokens", 0) + usage.get("outputTokens", 0)
+                            + usage.get("cacheReadInputTokens", 0) + usage.get("cacheWriteInputTokens", 0))
+        return response
+
+    def wasted(response: Dict[str, Any], side: str) -> None:
+        usage = response.get("usage", {})
+        token_tracker.record_hedge_waste(stage, calculate_cost(
+            hedge_model if side == "hedge" else model_id,
+            usage.get("inputTokens", 0), usage.get("outputTokens", 0),
+            usage.get("cacheReadInputTokens", 0), usage.get("cacheWriteInputTokens", 0),
+        ))
+
+    response, outcome = get_request_hedger(CONFIG).call(
+        stage, lambda: bedrock_client.converse(**request), secondary, wasted
+    )
+    if outcome is not None:
+        token_tracker.record_hedge(stage, won=outcome == "hedge")
+    return response, hedge_model if outcome == "hedge" else model_id
+
+
+def _emit_partials(tool_input: Dict[str, Any], tool_schema: Dict[str, Any],
+                   on_partial: Callable[[str, Any], None]) -> None:
+    """Report array elements of an already complete tool input (e.g. a response cache hit)."""
+    for name, spec in (tool_schema.get("properties") or {}).items():
+        if spec.get("type") == "array" and isinstance(tool_input.get(name), list):
+            for item in tool_input[name]:
+                on_partial(name, item)
+
+
+def converse_request_parts(
+    tool_schema: Dict[str, Any],
+    tool_schema_name: str,
+    description: str,
+    max_tokens: int = 10000,
+    temp: float = 0.1,
+    top_p: float = 0.1,
+):
+    """toolConfig and inferenceConfig of a generate_structured_output call (defaults match its signature)."""
+    toolconfig = {
+        "tools": [
+            {
+                "toolSpec": {
+                    "name": tool_schema_name,
+                    "description": description,
+                    "inputSchema": {"json": tool_schema}, # for structured output
+                }
+            }
+        ],
+        "toolChoice": {# force claude to use the tool -- 
+                       # force claude to get the strcutured output I am passing to it
+        "tool": {
+            "name": tool_schema_name
+        }
+    }
+    }
+    inference_config = {"maxTokens": max_tokens,
+                        "temperature": temp,
+                        "topP": top_p
+                        }
+    return toolconfig, inference_config
+
+
+# Process-wide registry of in-flight generate_structured_output calls
+_in_flight = SingleFlight()
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=2, min=4, max=10),
-    retry=retry_if_exception_type(ClientError),
-    before_sleep=lambda retry_state: logger.info(
-        f"Retrying Bedrock API: attempt {retry_state.attempt_number} (waiting longer due to rate limits)"
-    ),
-)
 def generate_structured_output(
     bedrock_client: boto3.client,
     messages: List[Dict[str, Any]],
@@ -113,14 +308,25 @@ def generate_structured_output(
     model_id: str,
     obj: Type[Any],
     max_tokens: int = 10000,
-    max_retries: int = 2,
+    max_retries: Optional[int] = None,
     print_usage: bool = False, 
     temp: float = 0.1,
-    top_p: float = 0.1
+    top_p: float = 0.1,
+    use_cache: bool = True,
+    stage: Optional[str] = None,
+    stream: Optional[bool] = None,
+    on_partial: Optional[Callable[[str, Any], None]] = None,
+    tier: Optional[str] = None,
+    accept: Optional[Callable[[Any], bool]] = None,
+    partial_lists: bool = False,
 ):
     """
     Generate structured output using Amazon Bedrock Converse API with token and time tracking.
 
+    Concurrent calls with an identical request share one Bedrock call (see CONFIG.singleflight_enabled).
+    With CONFIG.model_cascade_enabled, a call that declares a tier runs on that tier's cascade
+    (see utils/model_cascade.py) instead of model_id.
+
     Args:
         bedrock_client: Boto3 Bedrock runtime client
         messages: List of message dictionaries (now we just use one message but it is expandable for multi-turn conversation)
@@ -129,59 +335,204 @@ def generate_structured_output(
         model_id: Bedrock model ID
         obj: Pydantic model class for output validation
         max_tokens: Maximum tokens for generation
-        max_retries: Number of retries for invalid tool responses
+        max_retries: Maximum attempts for this call (defaults to CONFIG.retry_max_attempts); all failures
+            (throttling, timeouts, invalid tool responses) are retried by the shared retry policy
         print_usage: Whether to print usage stats for this individual call
+        use_cache: Whether to read/write the on-disk response cache (also gated by CONFIG.response_cache_enabled)
+        stage: Pipeline stage name for per-stage metrics in token_tracker (defaults to tool_schema_name)
+        stream: Use converseStream and abort off-schema output early (defaults to CONFIG.bedrock_streaming;
+            implied by on_partial)
+        on_partial: Called with (property name, element) for each element of a top-level array property
+            as soon as it is generated. An aborted attempt is followed by the elements of the retry, so
+            callers that act on partials should be idempotent (cache hits replay the full list).
+        tier: Model tier of this call site ("fast", "standard" or "heavy"); also used for per-tier
+            accounting in token_tracker
+        accept: Confidence check on the validated result; returning False escalates the call to the
+            next model of the cascade (ignored on the last model and when the cascade is off)
+        partial_lists: Accept the complete elements of an array cut off because the response hit
+            max_tokens, instead of calling again. Such a partial result is never cached.
 
     Returns:
         Validated Pydantic model instance
 
     Raises:
-        ValueError: If no valid tool response after max_retries
-        ClientError: For Bedrock API errors
+        InvalidToolResponse: If no valid (or locally repairable) tool response after max_retries
+        ClientError: For Bedrock API errors that are not retryable or out of retries
     """
+    stage = stage or tool_schema_name
+    kwargs = dict(
+        tool_schema=tool_schema, tool_schema_name=tool_schema_name, description=description, obj=obj,
+        max_tokens=max_tokens, print_usage=print_usage, temp=temp, top_p=top_p, use_cache=use_cache,
+        stage=stage, stream=stream, on_partial=on_partial, tier=tier, partial_lists=partial_lists,
+    )
+    if tier is None or not CONFIG.model_cascade_enabled:
+        return _generate_with_model(bedrock_client, messages, model_id=model_id, max_retries=max_retries, **kwargs)
 
-    
+    ladder = get_model_cascade(CONFIG).ladder(tier) or [model_id]
+    for position, candidate in enumerate(ladder):
+        last = position == len(ladder) - 1
+        try:
+            result = _generate_with_model(
+                bedrock_client, strip_cache_points(messages, candidate), model_id=candidate,
+                # Lower rungs get a short allowance; the top of the ladder gets the full retry policy
+                max_retries=max_retries if last else CONFIG.cascade_attempts_per_model, **kwargs
+            )
+        except Exception as e:
+            if last or not should_escalate(e):
+                raise
+            logger.info(f"Escalating '{stage}' from {candidate} to {ladder[position + 1]}: {e}")
+            token_tracker.record_escalation(tier, stage)
+            continue
+        if last or accept is None or accept(result):
+            token_tracker.record_tier_answer(tier, candidate)
+            return result
+        logger.info(f"Escalating '{stage}' from {candidate} to {ladder[position + 1]}: low-confidence result")
+        token_tracker.record_escalation(tier, stage)
+
+
+def _generate_with_model(
+    bedrock_client: boto3.client,
+    messages: List[Dict[str, Any]],
+    tool_schema: Dict[str, Any],
+    tool_schema_name: str,
+    description: str,
+    model_id: str,
+    obj: Type[Any],
+    max_tokens: int,
+    max_retries: Optional[int],
+    print_usage: bool,
+    temp: float,
+    top_p: float,
+    use_cache: bool,
+    stage: str,
+    stream: Optional[bool],
+    on_partial: Optional[Callable[[str, Any], None]],
+    tier: Optional[str],
+    partial_lists: bool,
+):
+    """generate_structured_output on one model: response cache, single-flight, then Bedrock."""
+    stream = CONFIG.bedrock_streaming if stream is None else stream
+    stream = stream or on_partial is not None
+
+    toolconfig, inference_config = converse_request_parts(tool_schema, tool_schema_name, description, max_tokens, temp, top_p)
+
+    cache_key = make_cache_key(model_id, messages, toolconfig, inference_config, CONFIG.prompt_version)
+    cache = get_response_cache(CONFIG) if use_cache and CONFIG.response_cache_enabled else None
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            try:
+                result = obj(**cached["tool_input"])
+                token_tracker.record_cache_hit(stage)
+                if on_partial is not None:
+                    _emit_partials(cached["tool_input"], tool_schema, on_partial)
+                if print_usage:
+                    logger.info(f"Response cache hit for '{description}'")
+                return result
+            except Exception as e:
+                logger.warning(f"Ignoring unusable cached response for '{description}': {e}")
+        token_tracker.record_cache_miss(stage)
+
+    invoke = functools.partial(
+        _invoke_converse, bedrock_client, model_id, messages, toolconfig, inference_config, tool_schema,
+        tool_schema_name, description, max_tokens, max_retries, print_usage, stage, stream, on_partial,
+        tier, obj, partial_lists,
+    )
+    if CONFIG.singleflight_enabled:
+        # Identical concurrent requests share one Bedrock call. The key adds the attempt
+        # allowance to the response-cache key, so a caller never inherits the failure of a
+        # leader that was allowed fewer attempts (e.g. a lower cascade rung) or did not stream.
+        flight_key = f"{cache_key}|attempts={max_retries}|stream={stream}"
+        (tool_input, usage), shared = _in_flight.do(flight_key, invoke)
+    else:
+        (tool_input, usage), shared = invoke(), False
+    if shared:
+        tool_input = copy.deepcopy(tool_input)  # each caller gets its own copy to build and mutate
+        token_tracker.record_coalesced(stage)
+        if on_partial is not None:
+            _emit_partials(tool_input, tool_schema, on_partial)
+
+    result = obj(**tool_input)
+    if cache is not None and not shared and not usage.get("truncated"):
+        cache.put(cache_key, {"tool_input": tool_input, **usage})
+    return result
+
+
+def _invoke_converse(
+    bedrock_client,
+    model_id: str,
+    messages: List[Dict[str, Any]],
+    toolconfig: Dict[str, Any],
+    inference_config: Dict[str, Any],
+    tool_schema: Dict[str, Any],
+    tool_schema_name: str,
+    description: str,
+    max_tokens: int,
+    max_retries: Optional[int],
+    print_usage: bool,
+    stage: str,
+    stream: bool,
+    on_partial: Optional[Callable[[str, Any], None]],
+    tier: Optional[str] = None,
+    obj: Optional[Type[Any]] = None,
+    partial_lists: bool = False,
+):
+    """
+    Call Bedrock until it returns a tool response that validates against obj (after local
+    repair, see utils/output_repair.py); returns (tool input, token usage) and records usage.
+    The usage has "truncated": True when array elements cut off at max_tokens were dropped.
+    """
     call_input_tokens = 0
     call_output_tokens = 0
+    call_cache_read_tokens = 0
+    call_cache_write_tokens = 0
     call_cost = 0.0
+    attempts_made = 0
     # Start timing the entire function call
     start_time = time.time()
 
-    toolconfig = {
-        "tools": [
-            {
-                "toolSpec": {
-                    "name": tool_schema_name,
-                    "description": description,
-                    "inputSchema": {"json": tool_schema}, # for structured output
-                }
-            }
-        ],
-        "toolChoice": {# force claude to use the tool -- 
-                       # force claude to get the strcutured output I am passing to it
-        "tool": {
-            "name": tool_schema_name
-        }
-    }
-    }
+    rate_limiter = get_rate_limiter(CONFIG)
+    estimated_tokens = estimate_request_tokens(messages, max_tokens)
 
-    
+    retry_policy = get_retry_policy(CONFIG)
+    ledger = get_run_ledger(CONFIG) if CONFIG.run_ledger_enabled else None
+    attempt = 0
 
     try:
-        for attempt in range(max_retries):
+        while True:
+            attempts_made = attempt + 1
             try:
+                rate_limiter.acquire(estimated_tokens)
                 # Time individual API call
                 api_start_time = time.time()
                 
-                response = bedrock_client.converse(
-                    modelId=inference_prof,
+                request = dict(
+                    modelId=resolve_model_target(model_id),
                     messages=messages,
                     toolConfig=toolconfig,
-                    inferenceConfig={"maxTokens": max_tokens,
-                                     "temperature": temp,
-                                     "topP": top_p
-                                     },
+                    inferenceConfig=inference_config,
                 )
+                answered_by = model_id  # the hedge's model if a hedged call was answered by it
+                try:
+                    if stream:
+                        response = _converse_streaming(bedrock_client, request, tool_schema, on_partial)
+                    elif CONFIG.hedging_enabled:
+                        response, answered_by = _converse_hedged(bedrock_client, request, model_id, stage, estimated_tokens)
+                    else:
+                        response = bedrock_client.converse(**request)
+                except OffSchemaOutput:
+                    # Usage of an aborted stream is never reported; keep the estimate charged
+                    raise
+                except ClientError as e:
+                    # A rejected call used no tokens; throttling also cuts the rate
+                    rate_limiter.settle(estimated_tokens, 0)
+                    # Errors raised mid-stream use lower-camel codes (e.g. throttlingException)
+                    if e.response.get('Error', {}).get('Code', '').lower() == 'throttlingexception':
+                        rate_limiter.on_throttle()
+                    if e.response.get('Error', {}).get('Code') == 'ResourceNotFoundException':
+                        # A cached profile ARN may have been deleted; re-resolve on the next attempt
+                        invalidate_inference_profile(CONFIG, model_id)
+                    raise
                 
                 api_end_time = time.time()
                 api_call_time = api_end_time - api_start_time
@@ -190,13 +541,19 @@ def generate_structured_output(
                 usage = response.get('usage', {})
                 input_tokens = usage.get('inputTokens', 0)
                 output_tokens = usage.get('outputTokens', 0)
+                cache_read_tokens = usage.get('cacheReadInputTokens', 0)
+                cache_write_tokens = usage.get('cacheWriteInputTokens', 0)
+                rate_limiter.settle(estimated_tokens, input_tokens + output_tokens + cache_read_tokens + cache_write_tokens)
+                rate_limiter.on_success()
                 
                 # Calculate cost for this call
-                cost = calculate_cost(model_id, input_tokens, output_tokens)
+                cost = calculate_cost(answered_by, input_tokens, output_tokens, cache_read_tokens, cache_write_tokens)
                 
                 # Accumulate tokens and cost
                 call_input_tokens += input_tokens
                 call_output_tokens += output_tokens
+                call_cache_read_tokens += cache_read_tokens
+                call_cache_write_tokens += cache_write_tokens
                 call_cost += cost
                 
                 # Log individual API call timing if requested
@@ -208,45 +565,117 @@ def generate_structured_output(
                 content_list = response["output"]["message"].get("content", [])
                 for content in response["output"]["message"]["content"]:
                     if "toolUse" in content:
+                        tool_input = content["toolUse"]["input"]
+                        truncated = False
+                        if obj is not None:
+                            # Fix common deviations locally; only still-invalid output is re-called
+                            # Only an answer cut off at max_tokens may lose array elements, and only if the caller accepts it
+                            allow_truncation = partial_lists and response.get("stopReason") == "max_tokens"
+                            tool_input, fixes, truncated = validate_tool_input(obj, tool_input, tool_schema, allow_truncation)
+                            if fixes:
+                                token_tracker.record_repair(stage)
+                                logger.info(f"Repaired '{tool_schema_name}' output locally: {'; '.join(fixes)}")
+                        elif not isinstance(tool_input, dict):
+                            # Raw text of a stream cut off mid-JSON, with nothing to repair it against
+                            raise InvalidToolResponse(f"Tool input is not a JSON object (stopReason {response.get('stopReason')})")
                         # Calculate total function execution time
                         end_time = time.time()
                         total_call_time = end_time - start_time
                         
                         # Update global tracker
-                        token_tracker.update(call_input_tokens, call_output_tokens, call_cost, total_call_time)
+                        token_tracker.update(call_input_tokens, call_output_tokens, call_cost, total_call_time,
+                                             call_cache_read_tokens, call_cache_write_tokens,
+                                             stage=stage, retries=attempt, tier=tier)
                         
                         # Log individual call stats if requested
                         if print_usage:
                             logger.info(f"\nCall {token_tracker.usage.call_count} Summary:")
                             logger.info(f"Model: {model_id}")
                             logger.info(f"Input tokens: {call_input_tokens}, Output tokens: {call_output_tokens}")
+                            if call_cache_read_tokens or call_cache_write_tokens:
+                                logger.info(f"Prompt cache read tokens: {call_cache_read_tokens}, write tokens: {call_cache_write_tokens}")
                             logger.info(f"Cost: ${call_cost:.4f}")
                             logger.info(f"Total execution time: {total_call_time:.2f} seconds")
-                        log_each_generation(description, token_tracker.usage.call_count, call_input_tokens, call_output_tokens, call_cost, total_call_time, CSV_LOG_PATH)
-                        return obj(**content["toolUse"]["input"])
+                        if ledger is not None:
+                            ledger.record(stage, description, model_id, call_input_tokens, call_output_tokens,
+                                          call_cost, total_call_time, retries=attempt)
+                        call_usage = {
+                            "input_tokens": call_input_tokens,
+                            "output_tokens": call_output_tokens,
+                        }
+                        if truncated:
+                            call_usage["truncated"] = True  # partial answer; _generate_with_model does not cache it
+                        return tool_input, call_usage
                 
-                logger.warning(
-                    f"Attempt {attempt + 1}: No valid tool response, retrying..."
-                )
+                raise InvalidToolResponse(f"No valid tool response: {content_list}")
                 # Modify prompt for stricter instructions
                 # messages[-1]["content"][0][
                 #     "text"
                 # ] += "\nEnsure output strictly follows the JSON schema."
-                
-            except ClientError as e:
-                logger.error(f"Bedrock API error: {e}")
-                raise
-        
-        # If we get here, all attempts failed
-        end_time = time.time()
-        total_call_time = end_time - start_time
-        token_tracker.update(call_input_tokens, call_output_tokens, call_cost, total_call_time)
-        raise ValueError(f"Failed to generate valid tool response after {max_retries} attempts: {content_list}")
+
+            except (ClientError, BotoCoreError, InvalidToolResponse, OffSchemaOutput) as e:
+                delay = retry_policy.next_delay(e, attempt, max_retries)
+                if delay is None:
+                    logger.error(f"Bedrock call for '{tool_schema_name}' failed after {attempt + 1} attempt(s): {e}")
+                    raise
+                if isinstance(e, (InvalidToolResponse, OffSchemaOutput)):
+                    token_tracker.record_recall(stage)
+                logger.warning(
+                    f"Attempt {attempt + 1} for '{tool_schema_name}' failed ({classify_error(e)}: {e}); "
+                    f"retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                attempt += 1
     
     except Exception as e:
         # Ensure timing is tracked even if an exception occurs
         end_time = time.time()
         total_call_time = end_time - start_time
-        token_tracker.update(call_input_tokens, call_output_tokens, call_cost, total_call_time)
+        token_tracker.update(call_input_tokens, call_output_tokens, call_cost, total_call_time,
+                             call_cache_read_tokens, call_cache_write_tokens,
+                             stage=stage, retries=max(0, attempts_made - 1), error=True, tier=tier)
+        if ledger is not None:
+            ledger.record(stage, description, model_id, call_input_tokens, call_output_tokens,
+                          call_cost, total_call_time, retries=max(0, attempts_made - 1), error=True)
         raise
 
+
+_llm_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_async_executor: Optional[ContextThreadPoolExecutor] = None
+
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    """Return the semaphore bounding in-flight Bedrock calls on the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(CONFIG.llm_max_concurrency)
+        _llm_semaphores[loop] = semaphore
+    return semaphore
+
+
+def _get_async_executor() -> ContextThreadPoolExecutor:
+    """Return the shared executor that runs blocking converse calls for async callers."""
+    global _async_executor
+    if _async_executor is None:
+        _async_executor = ContextThreadPoolExecutor(
+            max_workers=CONFIG.llm_max_concurrency,
+            thread_name_prefix="bedrock-async",
+        )
+    return _async_executor
+
+
+async def agenerate_structured_output(**kwargs):
+    """
+    Async counterpart of generate_structured_output.
+
+    Takes the same keyword arguments. Callers may schedule any number of these
+    coroutines; at most CONFIG.llm_max_concurrency calls are in flight at once and
+    they share one fixed-size executor, so fan-out does not create a thread per call.
+    """
+    loop = asyncio.get_running_loop()
+    async with _get_llm_semaphore():
+        return await loop.run_in_executor(
+            _get_async_executor(),
+            functools.partial(generate_structured_output, **kwargs),
+        )
@@ -0,0 +1,18 @@
+"""
+ThreadPoolExecutor whose tasks run in a copy of the submitting thread's context.
+
+Per-run state (the retry budget of retry_policy, the current run of run_ledger)
+lives in contextvars, so concurrent runs in one process (e.g. two backend
+requests) each see their own. asyncio tasks and asyncio.to_thread inherit the
+context, but plain ThreadPoolExecutor workers start from an empty one; fan-out
+inside a run uses this executor instead so its calls stay attributed to the run.
+"""
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that copies the caller's contextvars into every task (map included)."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -1,8 +1,9 @@
 import logging
-from typing import Dict, List
+from typing import Dict, Iterator, List
 import json 
 import gzip
 from transcript_analysis.qa_fact_generation.utils.fact_creation import create_fact_object
+from transcript_analysis.qa_fact_generation.utils.transcript_index import get_transcript_index
 from transcript_analysis.models.pymodels import Conversation, Fact
 
 
@@ -73,6 +74,22 @@ def read_transcript_file(filepath: str) -> List[str]:
         # return decoded_text.splitlines()
 
 
+def iter_transcript_lines(filepath: str) -> Iterator[str]:
+    """
+    Lazily read a transcript file line by line, decoded like read_transcript_file.
+
+    Lines come from the process-wide memory-mapped TranscriptIndex, so parsing,
+    citation retrieval and evaluation of the same deposition share one mapping.
+
+    Args:
+        filepath: Path to the transcript file
+
+    Yields:
+        Lines of the file, with their line endings
+    """
+    yield from get_transcript_index(filepath).lines()
+
+
 
 
 
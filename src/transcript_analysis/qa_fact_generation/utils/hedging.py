@@ -0,0 +1,155 @@
+"""
+Hedged Bedrock requests.
+
+A call that has not answered by its stage's latency percentile (e.g. p95 of
+recent calls) is duplicated to a second inference profile / region, and the
+first valid tool response wins. The hedge rate is capped so hedging can cost at
+most a fixed fraction of extra calls; the losing call cannot be cancelled, so its
+cost is recorded as hedge waste in token_tracker once it completes.
+"""
+import logging
+import math
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from threading import Lock
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def has_tool_use(response: Dict[str, Any]) -> bool:
+    """Whether a converse response contains a toolUse block."""
+    return any("toolUse" in block for block in response.get("output", {}).get("message", {}).get("content", []))
+
+
+class RequestHedger:
+    """Per-stage latency windows, hedge deadlines and the hedge-rate cap."""
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_deadline: float = 2.0,
+        max_hedge_rate: float = 0.1,
+        min_samples: int = 20,
+        window: int = 200,
+        max_workers: int = 32,
+    ):
+        """
+        Args:
+            percentile: Latency percentile of the stage used as the hedge deadline.
+            min_deadline: Never hedge calls younger than this many seconds.
+            max_hedge_rate: Maximum fraction of calls that may be hedged.
+            min_samples: Latencies a stage needs before its calls are hedged.
+            window: Number of recent latencies kept per stage.
+            max_workers: Threads running primary and hedge calls.
+        """
+        self.percentile = percentile
+        self.min_deadline = min_deadline
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.window = window
+        self.lock = Lock()
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.calls = 0
+        self.hedges = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bedrock-hedge")
+
+    def record_latency(self, stage: str, seconds: float) -> None:
+        with self.lock:
+            self.latencies.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+
+    def deadline(self, stage: str) -> Optional[float]:
+        """Seconds after which a call of stage is hedged, or None while there is too little history."""
+        with self.lock:
+            samples = sorted(self.latencies.get(stage, ()))
+        if len(samples) < self.min_samples:
+            return None
+        rank = max(1, math.ceil(self.percentile / 100.0 * len(samples)))
+        return max(self.min_deadline, samples[rank - 1])
+
+    def _reserve_hedge(self) -> bool:
+        with self.lock:
+            if self.hedges + 1 > self.max_hedge_rate * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def call(
+        self,
+        stage: str,
+        primary: Callable[[], Dict[str, Any]],
+        secondary: Callable[[], Dict[str, Any]],
+        on_wasted: Optional[Callable[[Dict[str, Any], str], None]] = None,
+    ) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Run primary(); past the stage deadline also run secondary() and keep the
+        first response that carries a tool call.
+
+        Returns (response, outcome) where outcome is None if no hedge was sent,
+        otherwise "primary" or "hedge" for the call that won. on_wasted is called
+        with the losing call's response and side ("primary" or "hedge") once it arrives.
+        """
+        with self.lock:
+            self.calls += 1
+        deadline = self.deadline(stage)
+        started = time.monotonic()
+        if deadline is None:
+            response = primary()
+            self.record_latency(stage, time.monotonic() - started)
+            return response, None
+
+        def record_primary(future: Future) -> None:
+            if future.exception() is None:
+                self.record_latency(stage, time.monotonic() - started)
+
+        primary_future = self.executor.submit(primary)
+        primary_future.add_done_callback(record_primary)
+        try:
+            return primary_future.result(timeout=deadline), None
+        except FutureTimeoutError:
+            pass
+        if not self._reserve_hedge():
+            return primary_future.result(), None
+
+        logger.info(f"Hedging '{stage}' call after {deadline:.1f}s")
+        hedge_future = self.executor.submit(secondary)
+        pending = {primary_future, hedge_future}
+        winner = fallback = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                if has_tool_use(future.result()):
+                    winner = future
+                    break
+                fallback = fallback or future
+        chosen = winner or fallback
+        if chosen is None:
+            raise primary_future.exception()
+
+        loser, side = (hedge_future, "hedge") if chosen is primary_future else (primary_future, "primary")
+        if on_wasted is not None:
+            loser.add_done_callback(lambda future: future.exception() is None and on_wasted(future.result(), side))
+        return chosen.result(), "primary" if chosen is primary_future else "hedge"
+
+
+_hedger: Optional[RequestHedger] = None
+_hedger_lock = Lock()
+
+
+def get_request_hedger(config) -> RequestHedger:
+    """Return the process-wide hedger, creating it on first use."""
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = RequestHedger(
+                percentile=config.hedge_percentile,
+                min_deadline=config.hedge_min_deadline,
+                max_hedge_rate=config.hedge_max_rate,
+                min_samples=config.hedge_min_samples,
+                max_workers=2 * config.llm_max_concurrency,
+            )
+        return _hedger
@@ -1,23 +1,15 @@
 # from outlines import models, generate
-from typing import List
+from typing import Any, Dict, List
 from transcript_analysis.models.pymodels import Conversation, Sentence
 from .bedrock_adapter import generate_structured_output
+from .model_cascade import FAST
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def generate_speakers(bedrock_client, CONFIG, context_lines: str, print_usage: bool):
-    """Identify speakers (Q and A) from a transcript excerpt using an LLM.
-
-    Args:
-        model: The LLM model instance.
-        context_lines: List of transcript lines for context.
-
-    Returns:
-        Conversation: Structured output with Q and A speaker names.
-    """
-
+def build_speaker_request(CONFIG, context_lines: str, print_usage: bool) -> Dict[str, Any]:
+    """The generate_structured_output arguments (minus the client) of generate_speakers."""
     prompt = f"""Analyze this transcript excerpt and identify the speakers.
 
     Transcript:
@@ -45,19 +37,42 @@ def generate_speakers(bedrock_client, CONFIG, context_lines: str, print_usage: b
         "required": ["Q_SPEAKER", "A_SPEAKER"],
     }
 
-    return generate_structured_output(
-        bedrock_client=bedrock_client,
+    return dict(
         messages=messages,
         tool_schema=tool_schema,
         tool_schema_name="detect_speaker",
         description="Tool for generating structured speaker identification",
         model_id=CONFIG.model_path,
+        tier=FAST,
+        # A cheap model that names neither speaker is escalated to a larger one
+        accept=_names_a_speaker,
         obj=Conversation,
         max_tokens=CONFIG.max_tokens,
         print_usage = print_usage
     )
 
 
+def generate_speakers(bedrock_client, CONFIG, context_lines: str, print_usage: bool):
+    """Identify speakers (Q and A) from a transcript excerpt using an LLM.
+
+    Args:
+        model: The LLM model instance.
+        context_lines: List of transcript lines for context.
+
+    Returns:
+        Conversation: Structured output with Q and A speaker names.
+    """
+    return generate_structured_output(
+        bedrock_client=bedrock_client,
+        **build_speaker_request(CONFIG, context_lines, print_usage)
+    )
+
+
+def _names_a_speaker(conversation: Conversation) -> bool:
+    return any(name.strip() and name.strip().lower() != "none"
+               for name in (conversation.Q_SPEAKER, conversation.A_SPEAKER))
+
+
 def generate_sentence(
     bedrock_client, CONFIG, question: str, answer: str, context: List[str], print_usage: bool
 ):
@@ -94,6 +109,7 @@ def generate_sentence(
         tool_schema_name="generate_sentence",
         description="Tool for generating a 3rd person narrative sentence out of Q&A pairs",
         model_id=CONFIG.model_path,
+        tier=FAST,
         obj=Sentence,
         max_tokens=CONFIG.max_tokens,
         print_usage = print_usage
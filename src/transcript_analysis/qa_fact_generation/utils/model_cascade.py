@@ -0,0 +1,96 @@
+"""
+Cost/latency-aware model cascade for structured calls.
+
+Each call site declares a tier instead of running everything on
+CONFIG.model_path:
+
+  fast      - short, simple extractions (e.g. speaker detection)
+  standard  - the default per-chunk and per-nugget calls
+  heavy     - long or high-stakes outputs (e.g. nugget consolidation)
+
+A call starts on the cheapest model of its tier and climbs the ladder (the
+rest of its tier, then every tier above it) only when the answer is unusable:
+no schema-valid tool output, a request the model rejects, or a result the
+caller's accept() check flags as low confidence. Models below the top of the
+ladder get a short attempt allowance so a weak model fails over quickly.
+"""
+import logging
+from threading import Lock
+from typing import Dict, List, Optional
+
+from botocore.exceptions import ClientError
+from pydantic import ValidationError
+
+from src.utils.converse_stream import OffSchemaOutput
+from transcript_analysis.qa_fact_generation.utils.retry_policy import InvalidToolResponse
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+STANDARD = "standard"
+HEAVY = "heavy"
+TIERS = (FAST, STANDARD, HEAVY)
+
+# The model cannot serve this request (unsupported parameters, model not enabled in the account)
+_ESCALATE_CODES = {"validationexception", "accessdeniedexception"}
+
+
+def should_escalate(error: BaseException) -> bool:
+    """Whether a failure on one model is worth retrying on a larger one."""
+    if isinstance(error, (InvalidToolResponse, OffSchemaOutput, ValidationError)):
+        return True
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code", "").lower() in _ESCALATE_CODES
+    return False
+
+
+class ModelCascade:
+    """Ordered model lists per tier and the escalation ladder for each tier."""
+
+    def __init__(self, tiers: Dict[str, List[str]]):
+        """
+        Args:
+            tiers: Model ids per tier name, cheapest first. Tiers missing from
+                TIERS or left empty are skipped when building ladders.
+        """
+        self.tiers = {name: list(tiers.get(name) or []) for name in TIERS}
+
+    def ladder(self, tier: str) -> List[str]:
+        """Models to try for a call of tier, in order, without duplicates."""
+        if tier not in TIERS:
+            raise ValueError(f"Unknown model tier '{tier}'; expected one of {TIERS}")
+        ladder: List[str] = []
+        for name in TIERS[TIERS.index(tier):]:
+            for model_id in self.tiers[name]:
+                if model_id not in ladder:
+                    ladder.append(model_id)
+        return ladder
+
+    def tier_of(self, model_id: str) -> Optional[str]:
+        """Lowest tier that lists model_id, or None."""
+        for name in TIERS:
+            if model_id in self.tiers[name]:
+                return name
+        return None
+
+
+def _split_models(value: str) -> List[str]:
+    return [model_id.strip() for model_id in value.split(",") if model_id.strip()]
+
+
+_cascade: Optional[ModelCascade] = None
+_cascade_lock = Lock()
+
+
+def get_model_cascade(config) -> ModelCascade:
+    """Return the process-wide cascade, creating it on first use."""
+    global _cascade
+    with _cascade_lock:
+        if _cascade is None:
+            _cascade = ModelCascade({
+                FAST: _split_models(config.model_tier_fast),
+                STANDARD: _split_models(config.model_tier_standard) or [config.model_path],
+                HEAVY: _split_models(config.model_tier_heavy),
+            })
+            logger.info(f"Model cascade: {_cascade.tiers}")
+        return _cascade
@@ -0,0 +1,70 @@
+"""
+Process-wide registry of spaCy pipelines for speaker-name NER.
+
+Loading en_core_web_trf takes seconds and hundreds of MB, so every call site
+shares one pipeline per (model, components) for the life of the process, loaded
+on first use. Only the components a caller needs stay enabled: names need just
+"ner" (extract_names reads doc.ents), and sentence splitting also needs "parser".
+With CONFIG.spacy_fast, or when the requested model is not installed,
+en_core_web_sm is used instead.
+"""
+import logging
+import time
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+import spacy
+
+logger = logging.getLogger(__name__)
+
+FAST_MODEL = "en_core_web_sm"
+
+# Components left enabled; transformer/tok2vec feed ner and parser
+_NER_COMPONENTS = ("transformer", "tok2vec", "ner")
+_SENTENCE_COMPONENTS = _NER_COMPONENTS + ("parser", "senter")
+
+_pipelines: Dict[Tuple[str, bool], "spacy.language.Language"] = {}
+_pipelines_lock = Lock()
+
+
+def resolve_model(config, model: Optional[str] = None) -> str:
+    """Name of the spaCy model to load for `model` (default config.spacy_model)."""
+    name = model or config.spacy_model
+    if config.spacy_fast and name != FAST_MODEL:
+        if spacy.util.is_package(FAST_MODEL):
+            return FAST_MODEL
+        logger.warning(f"SPACY_FAST is set but {FAST_MODEL} is not installed; using {name}")
+    return name
+
+
+def get_nlp(config, model: Optional[str] = None, sentences: bool = False) -> "spacy.language.Language":
+    """
+    Return the shared spaCy pipeline, loading it on first use.
+
+    Args:
+        config: AppConfig (spacy_model, spacy_fast).
+        model: Model name; defaults to config.spacy_model.
+        sentences: Keep the parser enabled for doc.sents (speaker_detection); NER-only otherwise.
+    """
+    key = (resolve_model(config, model), sentences)
+    with _pipelines_lock:
+        nlp = _pipelines.get(key)
+        if nlp is None:
+            nlp = _pipelines[key] = _load(*key)
+        return nlp
+
+
+def _load(name: str, sentences: bool) -> "spacy.language.Language":
+    start = time.perf_counter()
+    try:
+        nlp = spacy.load(name)
+    except OSError:
+        if name == FAST_MODEL or not spacy.util.is_package(FAST_MODEL):
+            raise
+        logger.warning(f"spaCy model {name} is not installed; falling back to {FAST_MODEL}")
+        name = FAST_MODEL
+        nlp = spacy.load(name)
+    keep = _SENTENCE_COMPONENTS if sentences else _NER_COMPONENTS
+    nlp.select_pipes(disable=[pipe for pipe in nlp.pipe_names if pipe not in keep])
+    logger.info(f"Loaded spaCy model {name} in {time.perf_counter() - start:.1f}s (enabled: {', '.join(nlp.pipe_names)})")
+    return nlp
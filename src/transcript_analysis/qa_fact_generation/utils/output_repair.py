@@ -0,0 +1,195 @@
+"""
+Local repair of structured (tool-input) output.
+
+Tool input that fails validation against the target Pydantic model usually has
+one of a few predictable deviations, which are cheaper to fix here than with
+another paid call:
+
+  stringified JSON  - an array/object property returned as a JSON string
+                      (sometimes in a ```json fence)
+  truncated arrays  - output cut off at maxTokens: stringified JSON (or a streamed
+                      tool input) that stops mid-element, or a last element
+                      missing required fields
+                      (only trimmed when the response stopped at max_tokens and
+                      the caller accepts partial lists)
+  missing optional  - a property the tool schema does not require is absent
+  enum casing       - "yes" for "Yes", " covered" for "COVERED", "2" for 2
+
+Repairs are guided by the tool's JSON schema and only ever applied after
+validation has failed. Output that is still invalid afterwards raises
+InvalidToolResponse, which the retry policy answers with a new call.
+"""
+import copy
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import ValidationError
+
+from transcript_analysis.qa_fact_generation.utils.retry_policy import InvalidToolResponse
+
+logger = logging.getLogger(__name__)
+
+# Filled in for absent, non-required properties that have no schema default
+_EMPTY_VALUES = {"string": "", "array": [], "object": {}}
+
+
+def _schema_type(schema: Dict[str, Any]) -> Optional[str]:
+    expected = schema.get("type")
+    if isinstance(expected, list):
+        expected = next((t for t in expected if t != "null"), None)
+    if expected is None and "properties" in schema:
+        return "object"
+    return expected
+
+
+def _strip_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def _parse_truncated_prefix(text: str) -> Any:
+    """
+    JSON text that was cut off, up to its last complete element or property and with
+    its open arrays and objects closed; None if nothing complete is left.
+    """
+    closers: List[str] = []
+    cuts: List[Tuple[int, str]] = []  # (end of a complete element, closers needed there)
+    in_string = escape = False
+    for position, c in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "[{":
+            closers.append("]" if c == "[" else "}")
+        elif c in "]}" and closers:
+            closers.pop()
+            if closers:
+                cuts.append((position + 1, "".join(reversed(closers))))
+        elif c == "," and closers:
+            cuts.append((position, "".join(reversed(closers))))
+    for position, closing in reversed(cuts):
+        try:
+            return json.loads(text[:position] + closing)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def _parse_json_string(text: str, expected: str, path: str, fixes: List[str],
+                       trims: Optional[List[str]]) -> Any:
+    stripped = _strip_fence(text)
+    try:
+        value = json.loads(stripped)
+        fixes.append(f"{path}: parsed stringified JSON")
+        return value
+    except json.JSONDecodeError:
+        pass
+    if trims is not None and stripped.startswith("[" if expected == "array" else "{"):
+        value = _parse_truncated_prefix(stripped)
+        if value is not None:
+            trims.append(f"{path}: kept the complete elements of truncated JSON")
+            return value
+    return text
+
+
+def _match_enum(value: Any, options: List[Any]) -> Any:
+    if not isinstance(value, str) or value in options:
+        return value
+    wanted = value.strip().casefold()
+    for option in options:
+        if str(option).casefold() == wanted:
+            return option
+    return value
+
+
+def _repair(value: Any, schema: Dict[str, Any], path: str, fixes: List[str],
+            trims: Optional[List[str]]) -> Any:
+    """trims collects fixes that removed elements; None if elements may not be removed."""
+    expected = _schema_type(schema)
+    if expected in ("array", "object") and isinstance(value, str):
+        value = _parse_json_string(value, expected, path, fixes, trims)
+
+    if "enum" in schema:
+        matched = _match_enum(value, schema["enum"])
+        if matched is not value:
+            fixes.append(f"{path}: {value!r} -> {matched!r}")
+            value = matched
+
+    if expected == "object" and isinstance(value, dict):
+        required = set(schema.get("required") or [])
+        for name, spec in (schema.get("properties") or {}).items():
+            if name in value:
+                value[name] = _repair(value[name], spec, f"{path}.{name}", fixes, trims)
+            elif name not in required:
+                default = spec.get("default", _EMPTY_VALUES.get(_schema_type(spec)))
+                if default is not None:
+                    value[name] = copy.deepcopy(default)
+                    fixes.append(f"{path}.{name}: filled missing optional property")
+
+    if expected == "array" and isinstance(value, list):
+        item_schema = schema.get("items") or {}
+        value = [_repair(item, item_schema, f"{path}[{i}]", fixes, trims) for i, item in enumerate(value)]
+        item_required = item_schema.get("required") or []
+        last = value[-1] if value else None
+        if trims is not None and isinstance(last, dict) and any(name not in last for name in item_required):
+            # A last element missing required fields is what an answer cut off at maxTokens looks like
+            value = value[:-1]
+            trims.append(f"{path}: dropped incomplete last element")
+    return value
+
+
+def repair_tool_input(tool_input: Any, tool_schema: Dict[str, Any],
+                      allow_truncation: bool = False) -> Tuple[Any, List[str], bool]:
+    """
+    Coerce common deviations in tool_input towards tool_schema.
+
+    Truncated arrays are only cut back to their complete elements with allow_truncation
+    (the response stopped at max_tokens and the caller accepts a partial list).
+
+    Returns a repaired copy, a description of each fix (empty if nothing changed) and
+    whether any array elements were removed.
+    """
+    fixes: List[str] = []
+    trims: Optional[List[str]] = [] if allow_truncation else None
+    repaired = _repair(copy.deepcopy(tool_input), tool_schema, "$", fixes, trims)
+    return repaired, fixes + (trims or []), bool(trims)
+
+
+def validate_tool_input(obj: Type[Any], tool_input: Any, tool_schema: Dict[str, Any],
+                        allow_truncation: bool = False) -> Tuple[Dict[str, Any], List[str], bool]:
+    """
+    Validate tool_input against obj, repairing it locally if it does not validate.
+
+    Returns the tool input that validates (repaired or not), the fixes applied and whether
+    array elements were removed (see repair_tool_input); a truncated result is partial and
+    must not be cached.
+
+    Raises:
+        InvalidToolResponse: If the tool input is invalid even after repair
+    """
+    try:
+        if isinstance(tool_input, dict):
+            obj(**tool_input)
+            return tool_input, [], False
+        error: Exception = TypeError(f"Tool input is a {type(tool_input).__name__}, not an object")
+    except ValidationError as e:
+        error = e
+    repaired, fixes, truncated = repair_tool_input(tool_input, tool_schema, allow_truncation)
+    if fixes and isinstance(repaired, dict):
+        try:
+            obj(**repaired)
+            return repaired, fixes, truncated
+        except ValidationError as e:
+            error = e
+    raise InvalidToolResponse(f"Tool input does not match {obj.__name__} ({len(fixes)} local fix(es) tried): {error}")
@@ -0,0 +1,191 @@
+"""
+Parse artifacts of a transcript, shared by nugget generation, evaluation and the backend.
+
+A deposition used to be parsed, and its speakers detected with an LLM call, once per
+generation run, again per evaluation, and its lines decoded again for citation linking.
+ParsedTranscript holds these artifacts for one transcript: the Q&A pairs and
+introductory lines (QAExtractor), the page/line metadata of every line
+(TranscriptIndex) and the detected Conversation. Each is produced on first use.
+
+Entries are keyed by the SHA-256 of the transcript bytes and QA_extractor.PARSER_VERSION,
+so a copy of a transcript under another path shares the entry, while an edited
+transcript or a parser change does not. A detected Conversation is further keyed by
+the speaker model and config.prompt_version, like a cached response. The Q&A pairs,
+introductory lines and detected Conversations are saved to
+config.parse_cache_dir/<key>.parse and reused by later processes; line metadata is
+read from the transcript index, which saves it already.
+
+The process keeps the config.parse_cache_max_transcripts most recently used entries.
+"""
+import json
+import logging
+import os
+import struct
+import time
+from collections import OrderedDict
+from threading import Lock, RLock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import CONFIG
+from transcript_analysis.models.pymodels import Conversation
+from transcript_analysis.qa_fact_generation.utils.QA_extractor import PARSER_VERSION, QAExtractor
+from transcript_analysis.qa_fact_generation.utils.qa_pair_table import QAPairTable
+from transcript_analysis.qa_fact_generation.utils.transcript_index import TranscriptIndex, get_transcript_index
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = ".parse"
+
+# magic, format version, parser version, QAPairTable bytes; followed by the table and a JSON blob
+_HEADER = struct.Struct("<4sHHQ")
+_MAGIC = b"QAPC"
+_VERSION = 2
+
+
+class ParsedTranscript:
+    """The parse artifacts of one transcript's content; every caller in the process shares one instance."""
+
+    def __init__(self, key: str, index: TranscriptIndex, config):
+        self.key = key  # "<sha256 of the transcript>-p<parser version>"
+        self.index = index  # latest index of a file with this content
+        self.config = config
+        self._conversations: Dict[str, Conversation] = {}  # detected speakers by speaker_key
+        self._qa_pairs: Optional[QAPairTable] = None
+        self._introductory_lines: Optional[List[str]] = None
+        self._lock = RLock()
+        self._detect_lock = Lock()  # held through the speaker-detection call; _lock is not
+        self._load()
+
+    @property
+    def cache_path(self) -> str:
+        return os.path.join(self.config.parse_cache_dir, self.key + CACHE_SUFFIX)
+
+    @property
+    def qa_pairs(self) -> QAPairTable:
+        self._parse()
+        return self._qa_pairs
+
+    @property
+    def introductory_lines(self) -> List[str]:
+        self._parse()
+        return self._introductory_lines
+
+    @property
+    def line_metadata(self) -> Iterator[Tuple[int, Optional[int], str]]:
+        """(page, line number or None, stripped text) of every line, as DepositionProcessor loads them."""
+        return self.index.metadata()
+
+    @staticmethod
+    def speaker_key(config) -> str:
+        """The model and prompt version a Conversation was detected with (see build_speaker_request)."""
+        return f"{config.model_path}|{config.prompt_version}"
+
+    def conversation(self, config) -> Optional[Conversation]:
+        """The Conversation detected with config's speaker model and prompt version, if any."""
+        with self._lock:
+            return self._conversations.get(self.speaker_key(config))
+
+    def extractor(self, bedrock_client=None) -> QAExtractor:
+        """A QAExtractor holding the cached pairs and introductory lines, as after extract_qa_pairs."""
+        self._parse()
+        extractor = QAExtractor(bedrock_client)
+        extractor.qa_pairs = self._qa_pairs
+        extractor.introductory_lines = list(self._introductory_lines)
+        return extractor
+
+    def detect_speakers(self, bedrock_client, config, print_usage: bool = False) -> Conversation:
+        """
+        QAExtractor.detect_speaker_names, run once per transcript.
+
+        A detected Conversation is cached and saved. An empty one (a failed LLM call, or
+        only_A_detection off) is returned but not cached, so the next caller tries again.
+        Concurrent callers wait for the detection in progress instead of repeating it;
+        parsing and line metadata stay available meanwhile.
+        """
+        key = self.speaker_key(config)
+        with self._detect_lock:
+            cached = self.conversation(config)
+            if cached is None:
+                conversation = self.extractor(bedrock_client).detect_speaker_names(config, print_usage=print_usage)
+                if conversation.Q_SPEAKER or conversation.A_SPEAKER:
+                    with self._lock:
+                        self._conversations[key] = conversation.model_copy()
+                        self._save()
+                return conversation
+        logger.info(f"Speakers of {self.index.path} from the parse cache ({key}): {cached}")
+        config.conversation = cached.model_copy()
+        return config.conversation
+
+    def _parse(self) -> None:
+        with self._lock:
+            if self._qa_pairs is not None:
+                return
+            start = time.perf_counter()
+            extractor = QAExtractor()
+            extractor.extract_qa_pairs(self.index.lines())
+            self._qa_pairs, self._introductory_lines = extractor.qa_pairs, extractor.introductory_lines
+            logger.info(f"Parsed {self.index.path} in {time.perf_counter() - start:.2f}s")
+            self._save()
+
+    def _load(self) -> None:
+        if not self.config.parse_cache_enabled:
+            return
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = f.read()
+            magic, version, parser_version, table_length = _HEADER.unpack_from(data)
+            if (magic, version, parser_version) != (_MAGIC, _VERSION, PARSER_VERSION):
+                return
+            qa_pairs = QAPairTable.from_bytes(data[_HEADER.size:_HEADER.size + table_length])
+            extra = json.loads(data[_HEADER.size + table_length:])
+            introductory_lines = extra["introductory_lines"]
+            conversations = {key: Conversation(**value) for key, value in extra["conversations"].items()}
+        except (OSError, ValueError, KeyError, TypeError, struct.error) as e:
+            # Missing, truncated or from another layout: parse again and overwrite
+            logger.debug(f"No usable parse cache {self.cache_path}: {e}")
+            return
+        self._qa_pairs, self._introductory_lines, self._conversations = qa_pairs, introductory_lines, conversations
+        logger.info(f"Loaded {len(qa_pairs)} Q/A pairs of {self.index.path} from the parse cache")
+
+    def _save(self) -> None:
+        if not self.config.parse_cache_enabled or self._qa_pairs is None:
+            return
+        table = self._qa_pairs.to_bytes()
+        extra = {
+            "introductory_lines": self._introductory_lines,
+            "conversations": {key: value.model_dump() for key, value in self._conversations.items()},
+        }
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.config.parse_cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, PARSER_VERSION, len(table)))
+                f.write(table)
+                f.write(json.dumps(extra).encode("utf-8"))
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save parse cache {self.cache_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+_parsed: "OrderedDict[str, ParsedTranscript]" = OrderedDict()  # least recently used first
+_parsed_lock = Lock()
+
+
+def get_parsed_transcript(path: str, config=CONFIG) -> ParsedTranscript:
+    """Return the process-wide parse artifacts of a transcript's content, loading saved ones if available."""
+    index = get_transcript_index(path)
+    key = f"{index.sha256()}-p{PARSER_VERSION}"
+    with _parsed_lock:
+        parsed = _parsed.get(key)
+        if parsed is None:
+            parsed = _parsed[key] = ParsedTranscript(key, index, config)
+            while len(_parsed) > max(1, config.parse_cache_max_transcripts):
+                _parsed.popitem(last=False)
+        else:
+            parsed.index = index
+            _parsed.move_to_end(key)
+        return parsed
@@ -0,0 +1,172 @@
+"""
+Columnar storage for the Q&A pairs of a transcript.
+
+QAExtractor produces (question, answer, q_page, q_line, a_page, a_line) tuples.
+Kept as a list, every pair costs a tuple, two strings and up to four ints; a
+20k-pair deposition becomes well over 100k small objects, and the dict and Fact
+forms built from them copy everything again. QAPairTable stores the text of all
+pairs in one UTF-8 buffer addressed by an offsets array, and pages/lines in
+integer arrays. Tuples, dicts and Fact objects are only built for the rows that
+are accessed, through lazy sequence views.
+"""
+import struct
+import sys
+from array import array
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple, TypeVar, Union
+
+from transcript_analysis.models.pymodels import Fact
+from transcript_analysis.qa_fact_generation.utils.fact_creation import create_fact_object
+
+QAPair = Tuple[str, str, int, int, int, int]
+T = TypeVar("T")
+
+# array layout, rows, text bytes; followed by the offsets, the four page/line columns and the text
+_HEADER = struct.Struct("<3sQQ")
+_LAYOUT = f"{sys.byteorder[0]}{array('Q').itemsize}{array('q').itemsize}".encode()
+
+
+class QAPairTable(Sequence[QAPair]):
+    """
+    Q&A pairs as columns: a text buffer plus q_page, q_line, a_page and a_line arrays.
+
+    Behaves as a read-only sequence of (question, answer, q_page, q_line, a_page, a_line)
+    tuples, so it can stand in for the list QAExtractor used to return.
+    """
+
+    def __init__(self):
+        self._text = bytearray()
+        self._offsets = array("Q", [0])  # question i is [2i, 2i+1), answer i is [2i+1, 2i+2)
+        self._q_pages = array("q")
+        self._q_lines = array("q")
+        self._a_pages = array("q")
+        self._a_lines = array("q")
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[QAPair]) -> "QAPairTable":
+        """Build a table from Q&A tuples, e.g. QAExtractor.iter_qa_pairs, without keeping the tuples."""
+        table = cls()
+        for pair in pairs:
+            table.append(pair)
+        return table
+
+    def append(self, pair: QAPair) -> None:
+        question, answer, q_page, q_line, a_page, a_line = pair
+        self._text += question.encode("utf-8")
+        self._offsets.append(len(self._text))
+        self._text += answer.encode("utf-8")
+        self._offsets.append(len(self._text))
+        self._q_pages.append(q_page)
+        self._q_lines.append(q_line)
+        self._a_pages.append(a_page)
+        self._a_lines.append(a_line)
+
+    def __len__(self) -> int:
+        return len(self._q_pages)
+
+    def _index(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("QAPairTable index out of range")
+        return index
+
+    def _slice(self, start: int, end: int) -> str:
+        return self._text[self._offsets[start]:self._offsets[end]].decode("utf-8")
+
+    def question(self, index: int) -> str:
+        index = self._index(index)
+        return self._slice(2 * index, 2 * index + 1)
+
+    def answer(self, index: int) -> str:
+        index = self._index(index)
+        return self._slice(2 * index + 1, 2 * index + 2)
+
+    def pair(self, index: int) -> QAPair:
+        index = self._index(index)
+        return (
+            self._slice(2 * index, 2 * index + 1), self._slice(2 * index + 1, 2 * index + 2),
+            self._q_pages[index], self._q_lines[index], self._a_pages[index], self._a_lines[index],
+        )
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[QAPair, List[QAPair]]:
+        if isinstance(index, slice):
+            return [self.pair(i) for i in range(*index.indices(len(self)))]
+        return self.pair(index)
+
+    def __iter__(self) -> Iterator[QAPair]:
+        for index in range(len(self)):
+            yield self.pair(index)
+
+    def pair_dict(self, index: int) -> dict:
+        """Row `index` in the format_the_pairs form."""
+        question, answer, q_page, q_line, a_page, a_line = self.pair(index)
+        return {"q": question, "q_page": q_page, "q_line": q_line, "a": answer, "a_page": a_page, "a_line": a_line}
+
+    def fact(self, index: int) -> Fact:
+        """Row `index` as a Fact without speaker annotation or sentence."""
+        question, answer, q_page, q_line, _, _ = self.pair(index)
+        return create_fact_object(question, answer, None, None, "", None, q_page, q_line)
+
+    def dicts(self) -> "LazyRows[dict]":
+        """Lazy sequence of the pairs as format_the_pairs dicts; each dict is built when accessed."""
+        return LazyRows(self, self.pair_dict)
+
+    def facts(self) -> "LazyRows[Fact]":
+        """Lazy sequence of the pairs as Fact objects; each Fact is built when accessed."""
+        return LazyRows(self, self.fact)
+
+    def to_bytes(self) -> bytes:
+        """The table as bytes that from_bytes reads back (arrays in native layout)."""
+        columns = (self._offsets, self._q_pages, self._q_lines, self._a_pages, self._a_lines)
+        return b"".join([
+            _HEADER.pack(_LAYOUT, len(self), len(self._text)), *(column.tobytes() for column in columns), bytes(self._text)
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QAPairTable":
+        """Rebuild a table saved by to_bytes; ValueError if the data is truncated or from another layout."""
+        if len(data) < _HEADER.size:
+            raise ValueError("QAPairTable data is truncated")
+        layout, rows, text_length = _HEADER.unpack_from(data)
+        if layout != _LAYOUT:
+            raise ValueError(f"QAPairTable data has array layout {layout!r}, expected {_LAYOUT!r}")
+        table = cls()
+        table._offsets = array("Q")
+        position = _HEADER.size
+        for column, count in ((table._offsets, 2 * rows + 1), (table._q_pages, rows), (table._q_lines, rows),
+                              (table._a_pages, rows), (table._a_lines, rows)):
+            end = position + column.itemsize * count
+            if end > len(data):
+                raise ValueError("QAPairTable data is truncated")
+            column.frombytes(data[position:end])
+            position = end
+        if position + text_length > len(data) or table._offsets[-1] != text_length:
+            raise ValueError("QAPairTable data is truncated")
+        table._text = bytearray(data[position:position + text_length])
+        return table
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the text buffer and the columns."""
+        columns = (self._offsets, self._q_pages, self._q_lines, self._a_pages, self._a_lines)
+        return len(self._text) + sum(column.itemsize * len(column) for column in columns)
+
+
+class LazyRows(Sequence[T]):
+    """Read-only sequence over a QAPairTable that builds each row's object on access."""
+
+    def __init__(self, table: QAPairTable, build: Callable[[int], T]):
+        self.table = table
+        self.build = build
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self.build(i) for i in range(*index.indices(len(self)))]
+        return self.build(index)
+
+    def __iter__(self) -> Iterator[T]:
+        for index in range(len(self.table)):
+            yield self.build(index)
@@ -0,0 +1,158 @@
+"""
+Process-wide adaptive rate limiter for Bedrock calls.
+
+Two token buckets (requests per minute and tokens per minute) gate every call.
+The allowed rates follow AIMD: they are halved when Bedrock answers with a
+ThrottlingException and creep back towards the configured quota on success.
+"""
+import logging
+import time
+from threading import Condition, Lock
+from typing import Any, Dict, List, Optional
+
+from transcript_analysis.qa_fact_generation.utils.token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class _TokenBucket:
+    """Continuous-refill bucket; capacity is one minute's worth of the current rate."""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate_per_minute = rate_per_minute
+        self.level = rate_per_minute
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        self.level = min(self.rate_per_minute, self.level + elapsed * self.rate_per_minute / 60.0)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken (amount is capped at the bucket size)."""
+        amount = min(amount, self.rate_per_minute)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.rate_per_minute
+
+    def take(self, amount: float) -> None:
+        # Never more than one minute in debt, however far a call overshot its estimate
+        self.level = max(-self.rate_per_minute, self.level - min(amount, self.rate_per_minute))
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.rate_per_minute, self.level + amount)
+
+
+class AdaptiveRateLimiter:
+    """Thread-safe RPM/TPM limiter with additive-increase/multiplicative-decrease."""
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        decrease_factor: float = 0.5,
+        increase_fraction: float = 0.05,
+        min_fraction: float = 0.05,
+    ):
+        self.max_rpm = requests_per_minute
+        self.max_tpm = tokens_per_minute
+        self.decrease_factor = decrease_factor
+        self.increase_fraction = increase_fraction
+        self.min_fraction = min_fraction
+        self.requests = _TokenBucket(requests_per_minute)
+        self.tokens = _TokenBucket(tokens_per_minute)
+        self.throttle_count = 0
+        self.total_wait = 0.0
+        self.lock = Lock()
+        self._available = Condition(self.lock)
+
+    def acquire(self, estimated_tokens: int) -> float:
+        """Block until one request and estimated_tokens fit in the buckets; return seconds waited."""
+        start = time.monotonic()
+        with self._available:
+            while True:
+                now = time.monotonic()
+                self.requests.refill(now)
+                self.tokens.refill(now)
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                if wait <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(estimated_tokens)
+                    break
+                self._available.wait(timeout=wait)
+            waited = time.monotonic() - start
+            self.total_wait += waited
+        if waited > 1.0:
+            logger.debug(f"Rate limiter delayed call by {waited:.2f}s")
+        return waited
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        Correct the token bucket once the real usage of a call is known.
+
+        Overshoot is charged at most one bucket's worth, so one unexpectedly large response
+        delays later callers by at most a minute.
+        """
+        with self._available:
+            difference = estimated_tokens - actual_tokens
+            if difference > 0:
+                self.tokens.give(difference)
+                self._available.notify_all()
+            elif difference < 0:
+                self.tokens.take(-difference)
+
+    def on_success(self) -> None:
+        """Additively raise the allowed rates back towards the configured quota."""
+        with self._available:
+            self.requests.rate_per_minute = min(
+                self.max_rpm, self.requests.rate_per_minute + self.max_rpm * self.increase_fraction
+            )
+            self.tokens.rate_per_minute = min(
+                self.max_tpm, self.tokens.rate_per_minute + self.max_tpm * self.increase_fraction
+            )
+
+    def on_throttle(self) -> None:
+        """Multiplicatively cut the allowed rates after a ThrottlingException."""
+        with self._available:
+            self.throttle_count += 1
+            self.requests.rate_per_minute = max(
+                self.max_rpm * self.min_fraction, self.requests.rate_per_minute * self.decrease_factor
+            )
+            self.tokens.rate_per_minute = max(
+                self.max_tpm * self.min_fraction, self.tokens.rate_per_minute * self.decrease_factor
+            )
+            self.requests.level = min(self.requests.level, self.requests.rate_per_minute)
+            self.tokens.level = min(self.tokens.level, self.tokens.rate_per_minute)
+            logger.warning(
+                f"Bedrock throttled; limiting to {self.requests.rate_per_minute:.0f} req/min, "
+                f"{self.tokens.rate_per_minute:.0f} tokens/min"
+            )
+
+
+def estimate_request_tokens(messages: List[Dict[str, Any]], max_tokens: int) -> int:
+    """Rough upper bound on the tokens a converse call will consume (input tokens + max output)."""
+    input_tokens = 0
+    for message in messages:
+        for block in message.get("content", []):
+            input_tokens += count_tokens(block.get("text", ""))
+    return input_tokens + max_tokens
+
+
+_rate_limiter: Optional[AdaptiveRateLimiter] = None
+_rate_limiter_lock = Lock()
+
+
+def get_rate_limiter(config) -> AdaptiveRateLimiter:
+    """Return the process-wide rate limiter, creating it on first use."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = AdaptiveRateLimiter(
+                requests_per_minute=config.bedrock_requests_per_minute,
+                tokens_per_minute=config.bedrock_tokens_per_minute,
+            )
+            logger.info(
+                f"Bedrock rate limiter: {config.bedrock_requests_per_minute} req/min, "
+                f"{config.bedrock_tokens_per_minute} tokens/min"
+            )
+        return _rate_limiter
@@ -0,0 +1,132 @@
+"""
+Content-addressed on-disk cache for Bedrock structured-output responses.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    model_id: str,
+    messages: List[Dict[str, Any]],
+    tool_config: Dict[str, Any],
+    inference_config: Dict[str, Any],
+    prompt_version: str,
+) -> str:
+    """Build a stable SHA-256 key from everything that determines a model response."""
+    payload = json.dumps(
+        {
+            "model_id": model_id,
+            "messages": messages,
+            "tool_config": tool_config,
+            "inference_config": inference_config,
+            "prompt_version": prompt_version,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with size- and age-based LRU eviction."""
+
+    def __init__(self, path: str, max_bytes: int, max_age_seconds: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.lock = Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.time()
+        with self.lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self.max_age_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(value)
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store value under key and evict old or least recently used entries."""
+        serialized = json.dumps(value, ensure_ascii=False, default=str)
+        now = time.time()
+        with self.lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, serialized, len(serialized.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} cached responses to stay under {self.max_bytes} bytes")
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self.lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = Lock()
+
+
+def get_response_cache(config) -> ResponseCache:
+    """Return the process-wide response cache, creating it on first use."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                path=config.response_cache_path,
+                max_bytes=config.response_cache_max_mb * 1024 * 1024,
+                max_age_seconds=config.response_cache_max_age_days * 24 * 3600,
+            )
+            logger.info(f"Using Bedrock response cache at {config.response_cache_path}")
+        return _response_cache
@@ -0,0 +1,196 @@
+"""
+Single retry policy for Bedrock calls.
+
+All retrying happens in one place (generate_structured_output), instead of
+stacked tenacity decorators in every caller, so a bad request costs at most
+retry_max_attempts calls. Every failure is classified:
+
+  throttle   - ThrottlingException and friends; retried with a longer backoff
+  retryable  - timeouts, 5xx-style service errors, invalid/off-schema tool output
+  expired    - expired or invalid credentials; never retried (refresh and rerun)
+  fatal      - validation/access errors and anything unknown; never retried
+
+Retries use full-jitter exponential backoff and draw from the budget of the
+run they belong to (RetryPolicy.start_run), so a systemic failure stops the run
+quickly instead of retrying every call to exhaustion. The budget is held in a
+contextvar: concurrent runs in one process each spend their own, and calls made
+outside a run are only limited by max_attempts.
+"""
+import logging
+import random
+from contextvars import ContextVar
+from threading import Lock
+from typing import Optional
+
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+from src.utils.converse_stream import OffSchemaOutput
+
+logger = logging.getLogger(__name__)
+
+THROTTLE = "throttle"
+RETRYABLE = "retryable"
+EXPIRED = "expired"
+FATAL = "fatal"
+
+# Compared lower-case: errors raised inside a converseStream use lower-camel codes
+_THROTTLE_CODES = {
+    "throttlingexception",
+    "toomanyrequestsexception",
+    "servicequotaexceededexception",
+    "requestlimitexceeded",
+}
+_EXPIRED_CODES = {
+    "expiredtokenexception",
+    "expiredtoken",
+    "unrecognizedclientexception",
+    "invalidclienttokenid",
+}
+_RETRYABLE_CODES = {
+    "modeltimeoutexception",
+    "modelnotreadyexception",
+    "modelstreamerrorexception",
+    "internalserverexception",
+    "serviceunavailableexception",
+    "modelerrorexception",
+    "resourcenotfoundexception",  # stale inference profile ARN; re-resolved before the retry
+}
+
+
+class InvalidToolResponse(ValueError):
+    """The model answered without the forced tool call."""
+
+
+def classify_error(error: BaseException) -> str:
+    """Return THROTTLE, RETRYABLE, EXPIRED or FATAL for an exception raised by a Bedrock call."""
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "").lower()
+        if code in _THROTTLE_CODES:
+            return THROTTLE
+        if code in _EXPIRED_CODES:
+            return EXPIRED
+        if code in _RETRYABLE_CODES:
+            return RETRYABLE
+        return FATAL
+    if isinstance(error, (ReadTimeoutError, ConnectTimeoutError, EndpointConnectionError, ConnectionClosedError)):
+        return RETRYABLE
+    if isinstance(error, (InvalidToolResponse, OffSchemaOutput)):
+        return RETRYABLE
+    return FATAL
+
+
+class RetryBudget:
+    """Retries allowed across all calls of one run, shared by the run's threads."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.lock = Lock()
+        self.used = 0
+        self.exhausted = 0  # retries refused because the budget was spent
+
+    def spend(self) -> bool:
+        """Charge one retry; returns False, charging nothing, once the budget is spent."""
+        with self.lock:
+            if self.used >= self.limit:
+                self.exhausted += 1
+                if self.exhausted == 1:
+                    logger.error(f"Retry budget of {self.limit} retries for this run is spent; failing fast")
+                return False
+            self.used += 1
+            return True
+
+
+# Budget of the run the current context belongs to; inherited by asyncio tasks,
+# asyncio.to_thread and ContextThreadPoolExecutor workers
+_run_budget: ContextVar[Optional[RetryBudget]] = ContextVar("retry_run_budget", default=None)
+
+
+class RetryPolicy:
+    """Per-call attempt limit, full-jitter backoff and the per-run retry budget."""
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 2.0,
+        max_delay: float = 30.0,
+        run_budget: int = 100,
+        throttle_multiplier: float = 2.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            max_attempts: Attempts per call, including the first one.
+            base_delay: Backoff scale in seconds; attempt n sleeps up to base_delay * 2**n.
+            max_delay: Cap on a single backoff in seconds.
+            run_budget: Retries allowed across all calls of one run (see start_run).
+            throttle_multiplier: Extra backoff factor for throttling errors.
+            seed: Seed for the jitter (None for nondeterministic jitter).
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.run_budget = run_budget
+        self.throttle_multiplier = throttle_multiplier
+        self.random = random.Random(seed)
+        self.lock = Lock()
+
+    def backoff(self, attempt: int, kind: str = RETRYABLE) -> float:
+        """Full-jitter delay before retry number attempt + 1."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        if kind == THROTTLE:
+            ceiling = min(self.max_delay, ceiling * self.throttle_multiplier)
+        with self.lock:
+            return self.random.uniform(0, ceiling)
+
+    def next_delay(self, error: BaseException, attempt: int,
+                   max_attempts: Optional[int] = None) -> Optional[float]:
+        """
+        Decide whether to retry after error on (zero-based) attempt.
+
+        Returns the seconds to sleep before retrying, or None if the error should
+        be raised: it is not retryable, the call is out of attempts, or the current
+        run's retry budget is spent. A returned delay has been charged to the budget.
+        """
+        kind = classify_error(error)
+        if kind in (FATAL, EXPIRED):
+            return None
+        if attempt + 1 >= (max_attempts or self.max_attempts):
+            return None
+        budget = _run_budget.get()
+        if budget is not None and not budget.spend():
+            return None
+        return self.backoff(attempt, kind)
+
+    def start_run(self) -> RetryBudget:
+        """
+        Give the current context (and the tasks and threads it starts) a fresh run budget.
+
+        Call it in the thread or task that then makes, or fans out, the run's calls.
+        """
+        budget = RetryBudget(self.run_budget)
+        _run_budget.set(budget)
+        return budget
+
+
+_retry_policy: Optional[RetryPolicy] = None
+_retry_policy_lock = Lock()
+
+
+def get_retry_policy(config) -> RetryPolicy:
+    """Return the process-wide retry policy, creating it on first use."""
+    global _retry_policy
+    with _retry_policy_lock:
+        if _retry_policy is None:
+            _retry_policy = RetryPolicy(
+                max_attempts=config.retry_max_attempts,
+                base_delay=config.retry_base_delay,
+                max_delay=config.retry_max_delay,
+                run_budget=config.retry_run_budget,
+            )
+        return _retry_policy
@@ -0,0 +1,246 @@
+"""
+Append-only SQLite ledger of Bedrock calls, written off the call path.
+
+Calls only put a record on a queue; one background thread batches records into
+the ledger, so no file I/O happens inside a Bedrock call and concurrent callers
+never interleave writes. Every record carries the run it belongs to (see
+start_run), the deposition, stage, model, tokens, cost and latency, and
+rollup() aggregates a run per stage.
+
+The current run is kept in a contextvar rather than on the shared ledger, so
+concurrent runs in one process (e.g. two backend requests) each record their
+calls under their own run id; ContextThreadPoolExecutor carries it into the
+run's worker threads.
+"""
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import time
+import uuid
+from contextvars import ContextVar
+from threading import Lock, Thread
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_CALL_COLUMNS = (
+    "run_id", "recorded_at", "deposition", "stage", "description", "model_id",
+    "input_tokens", "output_tokens", "cost", "latency", "retries", "error",
+)
+
+# (run id, deposition) of the run the current context belongs to
+_current_run: ContextVar[Optional[Tuple[str, Optional[str]]]] = ContextVar("ledger_run", default=None)
+
+
+class RunLedger:
+    """Queue-fed, batching writer for the run ledger plus per-run queries."""
+
+    def __init__(self, path: str, batch_size: int = 200, flush_interval: float = 1.0):
+        """
+        Args:
+            path: SQLite file of the ledger (created if missing).
+            batch_size: Records written per transaction at most.
+            flush_interval: Seconds the writer waits for more records before committing a partial batch.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = Lock()
+        self.adhoc_run_id: Optional[str] = None  # run of calls made outside any started run
+        self.queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # readers do not block the writer thread
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " run_id TEXT PRIMARY KEY,"
+                " started_at REAL NOT NULL,"
+                " kind TEXT,"
+                " deposition TEXT,"
+                " summary TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS calls ("
+                " run_id TEXT NOT NULL,"
+                " recorded_at REAL NOT NULL,"
+                " deposition TEXT,"
+                " stage TEXT,"
+                " description TEXT,"
+                " model_id TEXT,"
+                " input_tokens INTEGER NOT NULL,"
+                " output_tokens INTEGER NOT NULL,"
+                " cost REAL NOT NULL,"
+                " latency REAL NOT NULL,"
+                " retries INTEGER NOT NULL,"
+                " error INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_calls_run ON calls(run_id)")
+        self.closed = False
+        self.writer = Thread(target=self._write_loop, name="run-ledger-writer", daemon=True)
+        self.writer.start()
+
+    def start_run(self, kind: str, deposition: Optional[str] = None, summary: Optional[str] = None) -> str:
+        """
+        Start a new run in the current context; calls recorded from this context (and the
+        tasks and threads it starts) from now on belong to it. Returns the run id.
+        """
+        run_id = uuid.uuid4().hex[:12]
+        _current_run.set((run_id, deposition))
+        self.queue.put(("run", (run_id, time.time(), kind, deposition, summary)))
+        logger.info(f"Run ledger: started {kind} run {run_id}")
+        return run_id
+
+    def current_run_id(self) -> str:
+        """Id of the current context's run, or of the process's ad-hoc run outside any run."""
+        return self._context_run()[0]
+
+    def _context_run(self) -> Tuple[str, Optional[str]]:
+        current = _current_run.get()
+        if current is not None:
+            return current
+        with self.lock:
+            if self.adhoc_run_id is None:
+                self.adhoc_run_id = uuid.uuid4().hex[:12]
+                self.queue.put(("run", (self.adhoc_run_id, time.time(), "adhoc", None, None)))
+            return self.adhoc_run_id, None
+
+    def record(self, stage: str, description: str, model_id: str, input_tokens: int, output_tokens: int,
+               cost: float, latency: float, retries: int = 0, error: bool = False) -> None:
+        """Queue one call for the current context's run; never blocks on I/O."""
+        run_id, deposition = self._context_run()
+        self.queue.put(("call", (
+            run_id, time.time(), deposition, stage, description, model_id,
+            input_tokens, output_tokens, cost, latency, retries, int(error),
+        )))
+
+    def _write_loop(self) -> None:
+        conn = sqlite3.connect(self.path)
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while item is not None and len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+            records = [entry for entry in batch if entry is not None]
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO runs (run_id, started_at, kind, deposition, summary) VALUES (?, ?, ?, ?, ?)",
+                        [row for kind, row in records if kind == "run"],
+                    )
+                    conn.executemany(
+                        f"INSERT INTO calls ({', '.join(_CALL_COLUMNS)}) VALUES ({', '.join('?' * len(_CALL_COLUMNS))})",
+                        [row for kind, row in records if kind == "call"],
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"Run ledger: dropped {len(records)} record(s): {e}")
+            for _ in batch:
+                self.queue.task_done()
+            if None in batch:
+                conn.close()
+                return
+
+    def flush(self) -> None:
+        """Block until every queued record is written."""
+        self.queue.join()
+
+    def close(self) -> None:
+        """Write what is queued and stop the writer thread."""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.writer.join()
+
+    def rollup(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Totals and per-stage aggregates of a run (the current run by default).
+
+        Pending records are flushed first, so the rollup includes every call made so far.
+        """
+        self.flush()
+        run_id = run_id or self.current_run_id()
+        aggregates = (
+            "COUNT(*), SUM(error), SUM(retries), SUM(input_tokens), SUM(output_tokens),"
+            " SUM(cost), SUM(latency), MAX(latency)"
+        )
+        with sqlite3.connect(self.path) as conn:
+            run = conn.execute(
+                "SELECT started_at, kind, deposition, summary FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            totals = conn.execute(f"SELECT {aggregates} FROM calls WHERE run_id = ?", (run_id,)).fetchone()
+            stages = conn.execute(
+                f"SELECT stage, {aggregates} FROM calls WHERE run_id = ? GROUP BY stage ORDER BY SUM(cost) DESC",
+                (run_id,),
+            ).fetchall()
+        return {
+            "run_id": run_id,
+            "started_at": run[0] if run else None,
+            "kind": run[1] if run else None,
+            "deposition": run[2] if run else None,
+            "summary": run[3] if run else None,
+            "totals": _aggregate_dict(totals),
+            "stages": {row[0]: _aggregate_dict(row[1:]) for row in stages},
+        }
+
+    def runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent runs, newest first."""
+        self.flush()
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT run_id, started_at, kind, deposition, summary FROM runs ORDER BY started_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(zip(("run_id", "started_at", "kind", "deposition", "summary"), row)) for row in rows]
+
+    def stage_history(self) -> Dict[str, Dict[str, float]]:
+        """Mean tokens and latency per call of every stage, over all successful calls recorded so far."""
+        self.flush()
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute(
+                # Batch-job records carry no latency
+                "SELECT stage, COUNT(*), AVG(input_tokens), AVG(output_tokens), AVG(NULLIF(latency, 0))"
+                " FROM calls WHERE error = 0 GROUP BY stage"
+            ).fetchall()
+        return {
+            row[0]: {"calls": row[1], "input_tokens": row[2], "output_tokens": row[3], "latency": row[4]}
+            for row in rows
+        }
+
+
+def _aggregate_dict(row) -> Dict[str, Any]:
+    calls, errors, retries, input_tokens, output_tokens, cost, latency, max_latency = row
+    return {
+        "calls": calls,
+        "errors": errors or 0,
+        "retries": retries or 0,
+        "input_tokens": input_tokens or 0,
+        "output_tokens": output_tokens or 0,
+        "cost": cost or 0.0,
+        "total_latency": latency or 0.0,
+        "mean_latency": (latency or 0.0) / calls if calls else 0.0,
+        "max_latency": max_latency or 0.0,
+    }
+
+
+_run_ledger: Optional[RunLedger] = None
+_run_ledger_lock = Lock()
+
+
+def get_run_ledger(config) -> RunLedger:
+    """Return the process-wide run ledger, creating it (and its writer thread) on first use."""
+    global _run_ledger
+    with _run_ledger_lock:
+        if _run_ledger is None:
+            _run_ledger = RunLedger(path=config.run_ledger_path)
+            atexit.register(_run_ledger.close)
+            logger.info(f"Using run ledger at {config.run_ledger_path}")
+        return _run_ledger
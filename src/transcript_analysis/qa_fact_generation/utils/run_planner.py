@@ -0,0 +1,234 @@
+"""
+Dry-run planning: predicted calls, tokens, cost and wall time of a run.
+
+Callers parse and chunk locally and hand the planner the requests they would
+send (generate_structured_output keyword arguments) or, for calls whose input
+only exists at run time, an estimate. Per stage the planner reports:
+
+  calls          - requests, minus those already in the response cache
+  input tokens   - counted from the prompts and tool schemas
+  output tokens  - mean of the stage's past calls in the run ledger, else a default
+  cost           - BEDROCK_PRICING of the model the first attempt runs on
+  wall time      - waves of `concurrency` calls at the stage's latency, or the
+                   configured requests/tokens per minute, whichever is slower
+
+Prompt-cache discounts, retries and cascade escalations are not included.
+"""
+import json
+import logging
+import math
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import (
+    calculate_cost, converse_request_parts, first_attempt_target,
+)
+from transcript_analysis.qa_fact_generation.utils.response_cache import get_response_cache, make_cache_key
+from transcript_analysis.qa_fact_generation.utils.run_ledger import get_run_ledger
+from transcript_analysis.qa_fact_generation.utils.token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Output tokens per call for stages without history in the run ledger
+DEFAULT_OUTPUT_TOKENS = {
+    "detect_speaker": 30,
+    "extract_nuggets": 300,
+    "consolidate_nuggets": 900,
+    "nugget_presence": 100,
+    "nugget_presence_batch": 1200,
+    "structure_evaluation": 120,
+    "clarity_evaluation": 200,
+    "citation_evaluation": 250,
+}
+FALLBACK_OUTPUT_TOKENS = 300
+
+# Latency model for stages without history: fixed overhead plus generation speed
+DEFAULT_CALL_OVERHEAD = 1.5  # seconds
+DEFAULT_OUTPUT_TOKENS_PER_SECOND = 60.0
+
+_REQUEST_PARTS = ("tool_schema", "tool_schema_name", "description", "max_tokens", "temp", "top_p")
+
+
+@dataclass
+class StagePlan:
+    """Predicted usage of one stage."""
+    stage: str
+    model_id: str
+    calls: int
+    cached_calls: int
+    input_tokens: int
+    output_tokens: int
+    cost: float
+    latency: float  # seconds per call
+    wall_time: float  # seconds
+    concurrency: int
+    phase: int  # stages of the same phase run at the same time
+    from_history: bool
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class RunPlan:
+    """Predicted usage of a run, stage by stage."""
+    kind: str
+    stages: List[StagePlan] = field(default_factory=list)
+    notes: List[str] = field(default_factory=list)
+
+    @property
+    def calls(self) -> int:
+        return sum(stage.calls for stage in self.stages)
+
+    @property
+    def input_tokens(self) -> int:
+        return sum(stage.input_tokens for stage in self.stages)
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(stage.output_tokens for stage in self.stages)
+
+    @property
+    def cost(self) -> float:
+        return sum(stage.cost for stage in self.stages)
+
+    @property
+    def wall_time(self) -> float:
+        """Phases run one after another; the stages of a phase overlap."""
+        phases: Dict[int, float] = {}
+        for stage in self.stages:
+            phases[stage.phase] = max(phases.get(stage.phase, 0.0), stage.wall_time)
+        return sum(phases.values())
+
+    def to_dict(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost": self.cost,
+            "wall_time_seconds": self.wall_time,
+            "stages": [stage.to_dict() for stage in self.stages],
+            "notes": self.notes,
+        }
+
+    def summary(self) -> None:
+        """Log the plan in the layout of token_tracker.summary()."""
+        logger.info("\n" + "=" * 60)
+        logger.info(f"RUN PLAN ({self.kind})")
+        logger.info("=" * 60)
+        logger.info(f"Predicted API Calls: {self.calls}")
+        logger.info(f"Predicted Input Tokens: {self.input_tokens:,}")
+        logger.info(f"Predicted Output Tokens: {self.output_tokens:,}")
+        logger.info(f"Predicted Cost: ${self.cost:.4f}")
+        logger.info(f"Predicted Wall Time: {self.wall_time:.0f} seconds")
+        logger.info("-" * 60)
+        logger.info("PER-STAGE PLAN (in run order):")
+        for stage in self.stages:
+            logger.info(
+                f"{stage.stage} [{stage.model_id}]: {stage.calls} calls ({stage.cached_calls} cached), "
+                f"tokens in/out {stage.input_tokens:,}/{stage.output_tokens:,}, cost ${stage.cost:.4f}, "
+                f"{stage.latency:.1f}s/call x {stage.concurrency} concurrent = {stage.wall_time:.0f}s"
+                f"{'' if stage.from_history else ' (default output/latency estimates)'}"
+            )
+        for note in self.notes:
+            logger.info(f"Note: {note}")
+        logger.info("=" * 60)
+
+
+def request_input_tokens(request: Dict[str, Any]) -> int:
+    """Input tokens of a request: prompt text plus the tool definition."""
+    text = sum(
+        count_tokens(block["text"])
+        for message in request["messages"]
+        for block in message.get("content", [])
+        if "text" in block
+    )
+    tool = {"name": request["tool_schema_name"], "description": request["description"], "schema": request["tool_schema"]}
+    return text + count_tokens(json.dumps(tool))
+
+
+class RunPlanner:
+    """Collects stage estimates into a RunPlan."""
+
+    def __init__(self, config, kind: str):
+        self.config = config
+        self.plan = RunPlan(kind=kind)
+        self.history = get_run_ledger(config).stage_history() if config.run_ledger_enabled else {}
+        self.cache = get_response_cache(config) if config.response_cache_enabled else None
+
+    def _output_tokens(self, stage: str, max_tokens: int) -> int:
+        history = self.history.get(stage)
+        estimate = history["output_tokens"] if history else DEFAULT_OUTPUT_TOKENS.get(stage, FALLBACK_OUTPUT_TOKENS)
+        return int(min(estimate, max_tokens))
+
+    def _latency(self, stage: str, output_tokens: int) -> float:
+        history = self.history.get(stage)
+        if history and history["latency"]:
+            return history["latency"]
+        return DEFAULT_CALL_OVERHEAD + output_tokens / DEFAULT_OUTPUT_TOKENS_PER_SECOND
+
+    def _is_cached(self, request: Dict[str, Any], model_id: str, messages: List[Dict[str, Any]]) -> bool:
+        if self.cache is None or not request.get("use_cache", True):
+            return False
+        toolconfig, inference_config = converse_request_parts(**{k: request[k] for k in _REQUEST_PARTS if k in request})
+        return self.cache.get(make_cache_key(model_id, messages, toolconfig, inference_config, self.config.prompt_version)) is not None
+
+    def add_requests(self, stage: str, requests: List[Dict[str, Any]], concurrency: int, phase: int,
+                     output_tokens: Optional[List[int]] = None) -> StagePlan:
+        """
+        Plan a stage from the requests it will send.
+
+        output_tokens optionally gives a per-request estimate for stages without history
+        (e.g. batched calls whose output grows with the batch).
+        """
+        model_id = self.config.model_path
+        calls = cached = input_tokens = total_output = 0
+        cost = 0.0
+        for index, request in enumerate(requests):
+            model_id, messages = first_attempt_target(request, self.config)
+            if self._is_cached(request, model_id, messages):
+                cached += 1
+                continue
+            tokens_in = request_input_tokens({**request, "messages": messages})
+            max_tokens = request.get("max_tokens", self.config.max_tokens)
+            if output_tokens is not None and stage not in self.history:
+                tokens_out = min(output_tokens[index], max_tokens)
+            else:
+                tokens_out = self._output_tokens(stage, max_tokens)
+            calls += 1
+            input_tokens += tokens_in
+            total_output += tokens_out
+            cost += calculate_cost(model_id, tokens_in, tokens_out)
+        return self._add(stage, model_id, calls, cached, input_tokens, total_output, cost, concurrency, phase)
+
+    def add_estimate(self, stage: str, tier: Optional[str], calls: int, input_tokens_per_call: int,
+                     concurrency: int, phase: int, output_tokens_per_call: Optional[int] = None) -> StagePlan:
+        """Plan a stage whose requests only exist at run time (e.g. they depend on earlier output)."""
+        model_id, _ = first_attempt_target({"tier": tier, "model_id": self.config.model_path, "messages": []}, self.config)
+        tokens_out = output_tokens_per_call
+        if tokens_out is None or stage in self.history:
+            tokens_out = self._output_tokens(stage, self.config.max_tokens)
+        cost = calculate_cost(model_id, input_tokens_per_call * calls, tokens_out * calls)
+        return self._add(stage, model_id, calls, 0, input_tokens_per_call * calls, tokens_out * calls, cost,
+                         concurrency, phase)
+
+    def _add(self, stage: str, model_id: str, calls: int, cached: int, input_tokens: int, output_tokens: int,
+             cost: float, concurrency: int, phase: int) -> StagePlan:
+        concurrency = max(1, min(concurrency, self.config.llm_max_concurrency))
+        latency = self._latency(stage, output_tokens // calls if calls else 0)
+        wall_time = max(
+            math.ceil(calls / concurrency) * latency,
+            calls / self.config.bedrock_requests_per_minute * 60,
+            (input_tokens + output_tokens) / self.config.bedrock_tokens_per_minute * 60,
+        ) if calls else 0.0
+        stage_plan = StagePlan(
+            stage=stage, model_id=model_id, calls=calls, cached_calls=cached, input_tokens=input_tokens,
+            output_tokens=output_tokens, cost=cost, latency=latency, wall_time=wall_time,
+            concurrency=concurrency, phase=phase, from_history=stage in self.history,
+        )
+        self.plan.stages.append(stage_plan)
+        return stage_plan
+
+    def note(self, text: str) -> None:
+        self.plan.notes.append(text)
@@ -0,0 +1,73 @@
+"""
+Single-flight coalescing of identical in-flight calls.
+
+When several threads ask for the same key at the same time (e.g. a
+double-submitted /api/process-deposition request), only the first one runs the
+call; the others wait for it and receive the same result or exception.
+Nothing is kept once the call finishes, so this is not a cache.
+"""
+import logging
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Thread-safe map of key -> in-flight call."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn() unless a call with the same key is already in flight.
+
+        Returns (value, shared); shared is True when the value came from another
+        caller's in-flight call. Exceptions raised by that call are re-raised to
+        every waiting caller.
+        """
+        with self.lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self._calls[key]
+            call.done.set()
+            if call.waiters:
+                logger.info(f"Shared one in-flight call with {call.waiters} identical request(s)")
+        return call.value, False
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        with self.lock:
+            return len(self._calls)
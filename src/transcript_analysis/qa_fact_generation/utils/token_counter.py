@@ -0,0 +1,141 @@
+"""
+Pluggable token counters used for prompt budgeting and chunking.
+
+The default counter approximates the byte-pair encodings used by Claude and
+Nova without shipping a vocabulary: text is pre-tokenized the way BPE
+tokenizers split it (words, digit groups, punctuation runs, whitespace) and
+each piece is costed from its length and shape. Counts are memoized in an LRU
+cache because the same pairs and nuggets are measured repeatedly while packing.
+"""
+import logging
+import math
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Contractions, optional-space words, up-to-3-digit groups, punctuation runs, whitespace
+_PRETOKENIZE = re.compile(
+    r"'(?:s|t|re|ve|m|ll|d)|"
+    r" ?[^\W\d_]+|"
+    r" ?\d{1,3}|"
+    r" ?[^\s\w]+|"
+    r"_+|"
+    r"\s+",
+    re.IGNORECASE,
+)
+
+
+class TokenCounter(ABC):
+    """Base class; subclasses implement _count and get an LRU-cached count()."""
+
+    name = "base"
+
+    def __init__(self, cache_size: int = 65536):
+        self.count = lru_cache(maxsize=cache_size)(self._count)
+
+    @abstractmethod
+    def _count(self, text: str) -> int:
+        """Uncached token count of text."""
+
+
+class CharRatioCounter(TokenCounter):
+    """The original 1 token ≈ 4 characters estimate."""
+
+    name = "chars"
+
+    def __init__(self, chars_per_token: float = 4.0, cache_size: int = 65536):
+        self.chars_per_token = chars_per_token
+        super().__init__(cache_size)
+
+    def _count(self, text: str) -> int:
+        return int(len(text) // self.chars_per_token)
+
+
+class ApproxBPECounter(TokenCounter):
+    """Offline approximation of Claude/Nova BPE token counts."""
+
+    name = "approx_bpe"
+
+    def _count(self, text: str) -> int:
+        tokens = 0
+        for piece in _PRETOKENIZE.findall(text):
+            tokens += self._piece_tokens(piece)
+        return tokens
+
+    @staticmethod
+    def _piece_tokens(piece: str) -> int:
+        core = piece.lstrip(" ")
+        if not core:
+            return max(1, math.ceil(len(piece) / 8))  # runs of spaces merge into few tokens
+        if core.isspace():
+            return max(1, math.ceil(len(core) / 8))
+        if core.isdigit():
+            return 1  # digits are grouped in threes by the pre-tokenizer
+        if core[0].isalpha():
+            length = len(core)
+            if core.isupper() and length > 3:
+                return math.ceil(length / 3)  # all-caps words are rarely whole vocabulary entries
+            if length <= 7:
+                return 1
+            return math.ceil(length / 4.5)
+        return math.ceil(len(core) / 2)  # punctuation: common pairs like '",' merge
+
+
+class TiktokenCounter(TokenCounter):
+    """Optional counter backed by tiktoken's cl100k_base (needs tiktoken and its cached vocabulary)."""
+
+    name = "tiktoken"
+
+    def __init__(self, encoding: str = "cl100k_base", cache_size: int = 65536):
+        import tiktoken
+
+        self.encoding = tiktoken.get_encoding(encoding)
+        super().__init__(cache_size)
+
+    def _count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+_COUNTER_FACTORIES: Dict[str, Callable[[], TokenCounter]] = {
+    CharRatioCounter.name: CharRatioCounter,
+    ApproxBPECounter.name: ApproxBPECounter,
+    TiktokenCounter.name: TiktokenCounter,
+}
+_counters: Dict[str, TokenCounter] = {}
+_counters_lock = Lock()
+
+
+def register_token_counter(name: str, factory: Callable[[], TokenCounter]) -> None:
+    """Make a custom counter selectable by name (e.g. via CONFIG.token_counter)."""
+    with _counters_lock:
+        _COUNTER_FACTORIES[name] = factory
+        _counters.pop(name, None)
+
+
+def get_token_counter(name: Optional[str] = None) -> TokenCounter:
+    """Return the shared counter for name (defaults to CONFIG.token_counter)."""
+    if name is None:
+        from config import CONFIG
+        name = CONFIG.token_counter
+    with _counters_lock:
+        counter = _counters.get(name)
+        if counter is None:
+            if name not in _COUNTER_FACTORIES:
+                raise ValueError(f"Unknown token counter '{name}'; choose from {sorted(_COUNTER_FACTORIES)}")
+            try:
+                counter = _COUNTER_FACTORIES[name]()
+            except Exception as e:
+                logger.warning(f"Token counter '{name}' unavailable ({e}); falling back to '{ApproxBPECounter.name}'")
+                counter = _counters.get(ApproxBPECounter.name) or ApproxBPECounter()
+                _counters[ApproxBPECounter.name] = counter
+            _counters[name] = counter
+        return counter
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text with the configured counter."""
+    return get_token_counter().count(text)
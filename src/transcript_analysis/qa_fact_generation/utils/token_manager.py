@@ -4,21 +4,23 @@ Token management utilities for evaluation system.
 import logging
 from typing import List, Tuple, Optional
 
+from transcript_analysis.qa_fact_generation.utils.token_counter import TokenCounter, get_token_counter
+
 logger = logging.getLogger(__name__)
 
 
 class TokenManager:
     """Handles token counting and text truncation for LLM prompts."""
     
-    def __init__(self, max_prompt_tokens: int = 7000, response_tokens: int = 1000):
+    def __init__(self, max_prompt_tokens: int = 7000, response_tokens: int = 1000, token_counter: Optional[TokenCounter] = None):
         self.max_prompt_tokens = max_prompt_tokens
         self.response_tokens = response_tokens
+        self.token_counter = token_counter or get_token_counter()
         self.logger = logging.getLogger(__name__)
     
     def count_tokens(self, text: str) -> int:
-        """Count tokens in text using approximation."""
-        # Rough approximation: 1 token ≈ 4 characters
-        return len(text) // 4
+        """Count tokens in text using the configured token counter."""
+        return self.token_counter.count(text)
     
     def calculate_available_tokens(self, base_prompt: str) -> int:
         """Calculate tokens available for nuggets given base prompt."""
@@ -133,6 +135,35 @@ class TokenManager:
         sorted_nuggets = sorted(nuggets, key=len)
         return self._truncate_first_n(sorted_nuggets, available_tokens, max_nuggets)
     
+    def pack_into_batches(
+        self,
+        texts: List[str],
+        available_tokens: int,
+        max_items: Optional[int] = None
+    ) -> List[List[int]]:
+        """
+        Greedily group texts into batches whose token total fits available_tokens.
+
+        Returns batches of indices into texts, in order. Every batch holds at least
+        one text, so an oversized text gets a batch of its own.
+        """
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for i, text in enumerate(texts):
+            text_tokens = self.count_tokens(text)
+            if current and (
+                current_tokens + text_tokens > available_tokens
+                or (max_items and len(current) >= max_items)
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += text_tokens
+        if current:
+            batches.append(current)
+        return batches
+
     def estimate_chunks_needed(self, content: str, chunk_size: int = 4000) -> int:
         """Estimate how many chunks will be needed for content."""
         content_tokens = self.count_tokens(content)
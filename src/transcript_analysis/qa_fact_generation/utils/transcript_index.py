@@ -0,0 +1,257 @@
+"""
+Memory-mapped transcript with a (page, line) -> byte offset index.
+
+The transcript is mapped once and scanned once: every line gets its byte offset,
+page, line number and a page-break flag, kept as compact arrays. Text for a
+page:line range is decoded from the mapping row by row, so the file is never
+copied as a whole. The arrays are saved next to the transcript
+(<transcript>.lines.idx) and reused while the transcript's size and mtime are
+unchanged, so reopening a large deposition skips the scan.
+
+Pages and line numbers follow DepositionProcessor: a form-feed line sets the page
+from the first number after the form feed, and a stripped line starting with
+"<digits><whitespace>" is numbered. Lines are split and decoded like
+read_transcript_file (\\n, \\r\\n or \\r; UTF-8, undecodable bytes dropped).
+
+The process keeps the MAX_INDEXES most recently used indexes open. Indexes of
+deleted transcripts (e.g. uploads in a temporary directory) are dropped, and
+dropped or replaced indexes are closed, so their mappings do not hold the file
+open.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".lines.idx"
+MAX_INDEXES = 64  # open transcripts kept by get_transcript_index; more than parse_cache keeps
+
+_LINE = re.compile(rb"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+")
+_NUMBERED = re.compile(r"(\d+)\s")
+_DIGITS = re.compile(r"\d+")
+
+# magic, format version, array layout, transcript size, transcript mtime_ns, rows, pages non-decreasing
+_HEADER = struct.Struct("<4sH3sqqQ?")
+_MAGIC = b"TIDX"
+_VERSION = 1
+_LAYOUT = f"{sys.byteorder[0]}{array('Q').itemsize}{array('q').itemsize}".encode()
+
+
+class TranscriptIndex:
+    """A memory-mapped transcript and the page, line number and byte range of each of its lines."""
+
+    def __init__(self, path: str, mapping, size: int, mtime_ns: int, offsets: array, pages: array,
+                 line_numbers: array, page_breaks: array, monotonic: bool):
+        self.path = path
+        self.mapping = mapping  # mmap of the transcript (b"" for an empty file)
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.offsets = offsets  # byte offset of each line, plus the end of the file
+        self.pages = pages
+        self.line_numbers = line_numbers  # -1 for unnumbered lines
+        self.page_breaks = page_breaks  # 1 for form-feed lines
+        self.monotonic = monotonic  # pages never decrease, so page ranges are found by bisection
+        self._sha256: Optional[str] = None
+
+    @classmethod
+    def open(cls, path: str, persist: bool = True) -> "TranscriptIndex":
+        """Map a transcript and load its saved index, or build (and save) the index if it is missing or stale."""
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        index_path = path + INDEX_SUFFIX
+        arrays = _load_arrays(index_path, stat.st_size, stat.st_mtime_ns)
+        if arrays is None:
+            start = time.perf_counter()
+            arrays = _scan(mapping)
+            logger.info(f"Indexed {path}: {len(arrays[1])} lines in {time.perf_counter() - start:.2f}s")
+            if persist:
+                _save_arrays(index_path, stat.st_size, stat.st_mtime_ns, *arrays)
+        return cls(path, mapping, stat.st_size, stat.st_mtime_ns, *arrays)
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def close(self) -> None:
+        """Unmap the transcript; get_transcript_index returns a new index for later reads."""
+        if isinstance(self.mapping, mmap.mmap):
+            try:
+                self.mapping.close()
+            except BufferError:
+                # A read in progress still exports the buffer; the mapping closes once it is collected
+                logger.debug(f"Transcript index of {self.path} is in use; not unmapped")
+
+    def sha256(self) -> str:
+        """Hex SHA-256 of the transcript bytes, hashed from the mapping on first use."""
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.mapping).hexdigest()
+        return self._sha256
+
+    def line(self, row: int) -> str:
+        """Line `row` of the file (0-based), with its line ending."""
+        return self.mapping[self.offsets[row]:self.offsets[row + 1]].decode("utf-8", errors="ignore")
+
+    def lines(self) -> Iterator[str]:
+        """Every line of the file, as read_transcript_file returns them."""
+        for row in range(len(self)):
+            yield self.line(row)
+
+    def metadata(self) -> Iterator[Tuple[int, Optional[int], str]]:
+        """(page, line number or None, stripped text) of every line except page breaks."""
+        for row in range(len(self)):
+            if not self.page_breaks[row]:
+                line_number = self.line_numbers[row]
+                yield self.pages[row], (line_number if line_number >= 0 else None), self.line(row).strip()
+
+    def _range_rows(self, start_page: int, end_page: int, start_line: Optional[int],
+                    end_line: Optional[int]) -> List[int]:
+        if self.monotonic:
+            rows = range(bisect_left(self.pages, start_page), bisect_right(self.pages, end_page))
+        else:
+            rows = range(len(self))
+        by_line = start_line is not None or end_line is not None
+        selected = []
+        for row in rows:
+            page = self.pages[row]
+            if self.page_breaks[row] or not start_page <= page <= end_page:
+                continue
+            if by_line:
+                line_number = self.line_numbers[row]
+                if line_number < 0:
+                    continue
+                if page == start_page and start_line is not None and line_number < start_line:
+                    continue
+                if page == end_page and end_line is not None and line_number > end_line:
+                    continue
+            selected.append(row)
+        return selected
+
+    def range_lines(self, start_page: int, end_page: int, start_line: Optional[int] = None,
+                    end_line: Optional[int] = None) -> List[Tuple[int, Optional[int], str]]:
+        """
+        (page, line number or None, stripped text) of the lines in a page:line range.
+
+        Without start_line/end_line every line of the pages is included; with them only
+        numbered lines from start_line on start_page through end_line on end_page.
+        """
+        return [
+            (self.pages[row], self.line_numbers[row] if self.line_numbers[row] >= 0 else None, self.line(row).strip())
+            for row in self._range_rows(start_page, end_page, start_line, end_line)
+        ]
+
+    def text(self, start_page: int, end_page: int, start_line: Optional[int] = None,
+             end_line: Optional[int] = None) -> str:
+        """The transcript text, as written, from the first to the last line of a page:line range."""
+        rows = self._range_rows(start_page, end_page, start_line, end_line)
+        if not rows:
+            return ""
+        return self.mapping[self.offsets[rows[0]]:self.offsets[rows[-1] + 1]].decode("utf-8", errors="ignore")
+
+
+def _scan(buffer) -> Tuple[array, array, array, array, bool]:
+    offsets, pages, line_numbers, page_breaks = array("Q", [0]), array("q"), array("q"), array("B")
+    page = 0
+    for match in _LINE.finditer(buffer):
+        line = match.group().decode("utf-8", errors="ignore")
+        if "\f" in line:
+            number = _DIGITS.search(line, line.index("\f") + 1)
+            if number:
+                page = int(number.group())
+            line_numbers.append(-1)
+            page_breaks.append(1)
+        else:
+            numbered = _NUMBERED.match(line.strip())
+            line_numbers.append(int(numbered.group(1)) if numbered else -1)
+            page_breaks.append(0)
+        pages.append(page)
+        offsets.append(match.end())
+    monotonic = all(pages[row] <= pages[row + 1] for row in range(len(pages) - 1))
+    return offsets, pages, line_numbers, page_breaks, monotonic
+
+
+def _load_arrays(index_path: str, size: int, mtime_ns: int) -> Optional[Tuple[array, array, array, array, bool]]:
+    try:
+        with open(index_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, layout, saved_size, saved_mtime_ns, rows, monotonic = _HEADER.unpack_from(data)
+    if (magic, version, layout, saved_size, saved_mtime_ns) != (_MAGIC, _VERSION, _LAYOUT, size, mtime_ns):
+        return None
+    arrays = []
+    position = _HEADER.size
+    for typecode, count in (("Q", rows + 1), ("q", rows), ("q", rows), ("B", rows)):
+        values = array(typecode)
+        end = position + values.itemsize * count
+        if end > len(data):
+            return None
+        values.frombytes(data[position:end])
+        arrays.append(values)
+        position = end
+    return (*arrays, monotonic)
+
+
+def _save_arrays(index_path: str, size: int, mtime_ns: int, offsets: array, pages: array,
+                 line_numbers: array, page_breaks: array, monotonic: bool) -> None:
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, _LAYOUT, size, mtime_ns, len(pages), monotonic))
+            for values in (offsets, pages, line_numbers, page_breaks):
+                values.tofile(f)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        # e.g. a read-only transcript directory: the index is rebuilt next time
+        logger.debug(f"Could not save transcript index {index_path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+_indexes: "OrderedDict[str, TranscriptIndex]" = OrderedDict()  # least recently used first
+_indexes_lock = Lock()
+
+
+def _drop_deleted() -> None:
+    """Close and forget the indexes of transcripts that no longer exist (call with _indexes_lock)."""
+    for key in [key for key in _indexes if not os.path.exists(key)]:
+        _indexes.pop(key).close()
+
+
+def get_transcript_index(path: str) -> TranscriptIndex:
+    """Return the process-wide index of a transcript, reopening it if the file has changed."""
+    key = os.path.realpath(path)
+    try:
+        stat = os.stat(key)
+    except FileNotFoundError:
+        with _indexes_lock:
+            if key in _indexes:
+                _indexes.pop(key).close()
+        raise
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None and (index.size, index.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            _indexes.move_to_end(key)
+            return index
+        if index is not None:
+            _indexes.pop(key).close()
+        else:
+            _drop_deleted()
+        index = _indexes[key] = TranscriptIndex.open(key)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)[1].close()
+        return index
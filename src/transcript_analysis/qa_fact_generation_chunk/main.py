@@ -3,7 +3,6 @@ import json
 import logging
 
 # import logging.config
-import spacy
 import torch
 import gzip
 
@@ -11,10 +10,10 @@ import gzip
 from transcript_analysis.models.pymodels import Fact, Sentence
 from .utils.qa_parser_chunk import process_transcript_all_pairs
 from config import CONFIG
+from transcript_analysis.qa_fact_generation.utils.nlp_registry import get_nlp
 import boto3
 from botocore.exceptions import ClientError
 import sys
-from tenacity import RetryError
 from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import print_token_summary
 
 
@@ -25,21 +24,7 @@ process_transcript extracts QA pairs and it assigns the speakers to the actual Q
 def handle_aws_error(error):
     """Handle AWS errors with clean user messages and exit."""
     
-    # Handle RetryError wrapping ClientError
-    if isinstance(error, RetryError):
-        if hasattr(error, 'last_attempt') and error.last_attempt.exception():
-            original_error = error.last_attempt.exception()
-            if isinstance(original_error, ClientError):
-                error_code = original_error.response['Error']['Code']
-                if error_code == 'ExpiredTokenException':
-                    print("Error: Your AWS credentials have expired.")
-                    print("Please refresh your AWS credentials and try again.")
-                    sys.exit(1)
-        print("Error: Failed to process transcript. Please try again.")
-        sys.exit(1)
-    
-    # Handle direct ClientError
-    elif isinstance(error, ClientError):
+    if isinstance(error, ClientError):
         error_code = error.response['Error']['Code']
         if error_code == 'ExpiredTokenException':
             print("Error: Your AWS credentials have expired.")
@@ -54,8 +39,8 @@ def initialize_bedrock_model(CONFIG):
         # Initialize session with a specific profile
         # session = boto3.Session(profile_name="default")
         # bedrock = session.client("bedrock-runtime", region_name="us-east-1")
-        session = boto3.Session(profile_name=CONFIG.sso_profile)
-        bedrock = session.client("bedrock-runtime", region_name=CONFIG.aws_region)
+        from src.utils.aws_session import get_bedrock_runtime_client
+        bedrock = get_bedrock_runtime_client(CONFIG)
 
 
         return bedrock
@@ -172,7 +157,7 @@ def main():
 
     # Initialize models
     try:
-        nlp = spacy.load(args.ner_model) if not args.no_speakers else None
+        nlp = get_nlp(CONFIG, args.ner_model, sentences=True) if not args.no_speakers else None
         # model = models.transformers(args.model or CONFIG.model_path, device="cuda")
         bedrock_client = initialize_bedrock_model(CONFIG)
     except Exception as e:
@@ -196,7 +181,7 @@ def main():
     except FileNotFoundError:
         logger.error(f"Input file not found: {args.input}")
         raise
-    except (RetryError, ClientError) as e:
+    except ClientError as e:
         handle_aws_error(e)
     except Exception as e:
         logger.error(f"Error processing input file: {e}")
@@ -2,6 +2,7 @@
 from typing import List
 from transcript_analysis.models.pymodels import Conversation, Sentence, SentenceList
 from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import generate_structured_output
+from transcript_analysis.qa_fact_generation.utils.model_cascade import STANDARD
 import logging
 import json
 
@@ -50,6 +51,7 @@ def generate_sentence_for_all_pairs(bedrock_client, CONFIG, print_usage: bool, p
         tool_schema_name="generate_sentence_for_all",
         description="Tool for generating 3rd person narrative sentences out of Q&A pairs",
         model_id=CONFIG.model_path,
+        tier=STANDARD,
         obj=SentenceList,
         max_tokens=CONFIG.max_tokens,
         print_usage=print_usage
@@ -1,6 +1,6 @@
 
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Tuple
 import json
 
 from transcript_analysis.models.pymodels import Conversation, Fact, SentenceList
@@ -14,6 +14,7 @@ from transcript_analysis.qa_fact_generation.utils.fact_creation import (
     generate_narrative_sentence,
     create_fact_object
 )
+from transcript_analysis.qa_fact_generation.utils.token_counter import count_tokens
 from .llm_chunk import generate_sentence_for_all_pairs
 
 
@@ -25,8 +26,8 @@ logger = logging.getLogger(__name__)
 
 
 def estimate_tokens(text):
-    """Rough estimate: 1 token ≈ 4 characters."""
-    return len(text) // 4
+    """Token count of text using the configured token counter."""
+    return count_tokens(text)
 
 
 def chunk_pairs(pairs, chunk_size=6000):
@@ -51,49 +52,57 @@ def chunk_pairs(pairs, chunk_size=6000):
 
     return chunks
 
-def chunk_formatted_pairs(pairs: List[dict], chunk_size: int = 6000, overlap: int = 3) -> List[List[dict]]:
-    """Split pairs into chunks based on serialized JSON length with overlap."""
+def chunk_formatted_pairs(pairs: Iterable[dict], chunk_size: int = 2250, overlap: int = 3) -> List[List[dict]]:
+    """Split pairs into chunks of at most chunk_size tokens (of serialized JSON) with overlap."""
+    return list(iter_chunk_formatted_pairs(pairs, chunk_size, overlap))
+
+
+def iter_chunk_formatted_pairs(pairs: Iterable[dict], chunk_size: int = 2250, overlap: int = 3) -> Iterator[List[dict]]:
+    """
+    Streaming form of chunk_formatted_pairs.
+
+    Pairs are read lazily (e.g. from QAExtractor.iter_formatted_pairs) and each chunk is
+    yielded as soon as it is full, so it can be sent to Bedrock while later pairs are parsed.
+    """
     if chunk_size <= 0:
         raise ValueError("Chunk size must be positive")
-    if len(pairs) <=0:
-        raise ValueError("QA pairs dict is empty")
-    chunks = []
     current_chunk = []
+    current_sizes = []  # token size of each pair in current_chunk
     current_size = 0
-    pair_index = 0
-    
-    while pair_index < len(pairs):
+    empty = True
 
-        pair = pairs[pair_index]
+    for pair in pairs:
+        empty = False
         pair_str = json.dumps(pair)
-        pair_size = len(pair_str) + 2  # Buffer for comma/spacing
+        pair_size = count_tokens(pair_str) + 1  # Buffer for comma/spacing
 
         if pair_size > chunk_size:
             if current_chunk:
-                chunks.append(current_chunk)
-            chunks.append([pair])
+                yield current_chunk
+            yield [pair]
             current_chunk = []
+            current_sizes = []
             current_size = 0
-            pair_index += 1
             continue
 
         if current_size + pair_size > chunk_size and current_chunk:
-            chunks.append(current_chunk)
+            yield current_chunk
             overlap_start = max(0, len(current_chunk) - overlap)
-            current_chunk = current_chunk[overlap_start:] if overlap_start < len(current_chunk) else []
-            current_size = sum(len(json.dumps(p)) + 2 for p in current_chunk)
+            current_chunk = current_chunk[overlap_start:]
+            current_sizes = current_sizes[overlap_start:]
+            current_size = sum(current_sizes)
         
         current_chunk.append(pair)
+        current_sizes.append(pair_size)
         current_size += pair_size
-        pair_index += 1
 
+    if empty:
+        raise ValueError("QA pairs dict is empty")
     if current_chunk:
-        chunks.append(current_chunk)
-
-    return chunks
+        yield current_chunk
 
 
-def chunk_summary_facts(facts: List[Dict[str, str]], chunk_size: int = 4000, overlap: int = 2) -> List[List[Dict[str, str]]]:
+def chunk_summary_facts(facts: List[Dict[str, str]], chunk_size: int = 1300, overlap: int = 2) -> List[List[Dict[str, str]]]:
     """Chunk summary facts with overlap for accuracy evaluation."""
     
     # Convert your facts format if needed
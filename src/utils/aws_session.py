@@ -2,8 +2,21 @@
 AWS Session utility for handling both SSO and regular credentials
 """
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ProfileNotFound, NoCredentialsError
+import logging
 import os
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+# urllib3's default pool holds 10 connections; parallel Bedrock calls beyond that queue for a socket
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+
+_sessions = {}
+_clients = {}
+_bedrock_runtime_clients = {}
+_cache_lock = Lock()
 
 
 def create_aws_session(profile_name=None, region_name=None):
@@ -53,16 +66,84 @@ def create_aws_session(profile_name=None, region_name=None):
         raise Exception(f"Could not create AWS session. Please check your AWS credentials. Error: {e}")
 
 
-def create_bedrock_client(profile_name=None, region_name=None):
+def get_aws_session(profile_name=None, region_name=None):
+    """
+    Process-wide session per (profile, region).
+
+    The credential check in create_aws_session (an STS round-trip) only runs the
+    first time a (profile, region) pair is requested.
+    """
+    region = region_name or os.getenv("AWS_REGION", "us-east-1")
+    key = (profile_name, region)
+    with _cache_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = create_aws_session(profile_name, region)
+            _sessions[key] = session
+        return session
+
+
+def get_client(service_name, profile_name=None, region_name=None, max_pool_connections=None, max_attempts=None):
+    """
+    Shared boto3 client per (service, profile, region).
+
+    boto3 clients are thread-safe, so one client (and its keep-alive connection
+    pool) is reused by every thread. max_pool_connections should be at least the
+    number of concurrent calls made through the client. max_attempts limits
+    botocore's own retries (1 disables them, for callers that retry themselves).
+    """
+    region = region_name or os.getenv("AWS_REGION", "us-east-1")
+    pool_size = max(max_pool_connections or DEFAULT_MAX_POOL_CONNECTIONS, DEFAULT_MAX_POOL_CONNECTIONS)
+    key = (service_name, profile_name, region)
+    session = get_aws_session(profile_name, region)
+    with _cache_lock:
+        client = _clients.get(key)
+        if client is None or client.meta.config.max_pool_connections < pool_size:
+            config = Config(max_pool_connections=pool_size, tcp_keepalive=True)
+            if max_attempts is not None:
+                config = config.merge(Config(retries={"total_max_attempts": max_attempts, "mode": "standard"}))
+            client = session.client(service_name, region_name=region, config=config)
+            _clients[key] = client
+            logger.info(f"Created {service_name} client for {region} with a pool of {pool_size} connections")
+        return client
+
+
+def create_bedrock_client(profile_name=None, region_name=None, max_pool_connections=None):
     """
     Create a Bedrock client with proper session handling.
     
     Args:
         profile_name: AWS profile name (optional)
         region_name: AWS region (optional)
+        max_pool_connections: HTTP connection pool size (optional, at least 10)
     
     Returns:
-        boto3.client: Bedrock runtime client
+        boto3.client: Bedrock runtime client, shared with other callers using the same profile and region
     """
-    session = create_aws_session(profile_name, region_name)
-    return session.client("bedrock-runtime")
\ No newline at end of file
+    # Retries are handled by the adapter's retry policy; botocore retrying too would multiply attempts
+    return get_client("bedrock-runtime", profile_name, region_name, max_pool_connections, max_attempts=1)
+
+
+def get_bedrock_runtime_client(config):
+    """
+    Process-wide bedrock-runtime client for config.
+
+    The pool is sized from config.llm_max_concurrency and the client is wrapped
+    for config.bedrock_mode (live/record/replay) once, so evaluators and
+    generators built in the same process share connections and tapes.
+    """
+    from src.utils.fake_bedrock import wrap_bedrock_client
+
+    profile_name = config.sso_profile if config.sso_profile != "default" else None
+    key = (profile_name, config.aws_region, config.bedrock_mode, config.bedrock_tape_path)
+    with _cache_lock:
+        client = _bedrock_runtime_clients.get(key)
+    if client is None:
+        client = wrap_bedrock_client(config, lambda: create_bedrock_client(
+            profile_name=profile_name,
+            region_name=config.aws_region,
+            max_pool_connections=config.llm_max_concurrency,
+        ))
+        with _cache_lock:
+            client = _bedrock_runtime_clients.setdefault(key, client)
+    return client
\ No newline at end of file
@@ -0,0 +1,282 @@
+"""
+Helpers for the Bedrock converseStream API.
+
+ToolInputStreamParser consumes the tool-input JSON as it is streamed, checks
+the top-level keys and value types against the tool schema as soon as they
+appear (so an off-schema answer can be abandoned after a few tokens instead of
+after the whole generation), and reports each finished element of top-level
+array properties (e.g. nuggets) while the rest is still being generated.
+
+assemble_stream_response / response_to_stream_events convert between stream
+events and the response shape returned by converse, so the rest of the code
+(and the record/replay tapes) only deal with one shape.
+"""
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# First non-whitespace character a JSON value of each schema type can start with.
+# Strings are also accepted for every type that validation or output_repair can
+# coerce from one: nested JSON returned as a string ("[...]"), and quoted
+# numbers and booleans ("2", "true"). Aborting the stream on those would throw
+# away an answer that the repair step keeps.
+_TYPE_STARTS = {
+    "array": ("[", '"'),
+    "object": ("{", '"'),
+    "string": ('"',),
+    "boolean": ("t", "f", '"'),
+    "number": tuple('-0123456789"'),
+    "integer": tuple('-0123456789"'),
+    "null": ("n",),
+}
+
+
+class OffSchemaOutput(ValueError):
+    """Raised while streaming once the tool input can no longer match the schema."""
+
+
+class ToolInputStreamParser:
+    """Incremental, single-pass checker for a streamed tool-input JSON object."""
+
+    def __init__(self, tool_schema: Dict[str, Any],
+                 on_item: Optional[Callable[[str, Any], None]] = None):
+        """
+        Args:
+            tool_schema: JSON schema of the tool input (an object schema).
+            on_item: Called with (property name, element) for every completed
+                element of a top-level array property.
+        """
+        self.properties = tool_schema.get("properties") or {}
+        self.required = list(tool_schema.get("required") or [])
+        # JSON schema allows extra properties unless additionalProperties is false
+        self.allow_extra = tool_schema.get("additionalProperties", True) is not False or not self.properties
+        self.on_item = on_item
+        self.seen_keys: List[str] = []
+        self.text = ""
+        self.position = 0
+        self.started = False
+        self.finished = False
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.phase = "key_or_end"  # state within the top-level object
+        self.key_start = 0
+        self.current_key: Optional[str] = None
+        self.in_array = False  # current top-level value is an array whose elements are reported
+        self.element_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> None:
+        """Consume the next piece of tool-input text; raises OffSchemaOutput on a mismatch."""
+        self.text += chunk
+        text = self.text
+        for i in range(self.position, len(text)):
+            self._step(text, i, text[i])
+        self.position = len(text)
+
+    def result(self) -> Dict[str, Any]:
+        """Parse the complete tool input (an empty stream means an empty object)."""
+        text = self.text.strip()
+        return json.loads(text) if text else {}
+
+    def _fail(self, reason: str) -> None:
+        raise OffSchemaOutput(f"{reason} (after {len(self.text)} characters)")
+
+    def _expected_type(self) -> Optional[str]:
+        spec = self.properties.get(self.current_key) or {}
+        expected = spec.get("type")
+        return expected if isinstance(expected, str) else None
+
+    def _flush_element(self, text: str, end: int) -> None:
+        if self.element_start is None:
+            return
+        raw = text[self.element_start:end].strip()
+        self.element_start = None
+        if raw and self.on_item is not None:
+            self.on_item(self.current_key, json.loads(raw))
+
+    def _step(self, text: str, i: int, c: str) -> None:
+        if self.in_string:
+            if self.escape:
+                self.escape = False
+            elif c == "\\":
+                self.escape = True
+            elif c == '"':
+                self.in_string = False
+                if len(self.stack) == 1:
+                    if self.phase == "key":
+                        self._close_key(text, i)
+                    elif self.phase == "value":
+                        self.phase = "after_value"
+            return
+        if c.isspace():
+            return
+        if self.finished:
+            self._fail("Trailing characters after the tool input")
+        if not self.started:
+            if c != "{":
+                self._fail("Tool input is not a JSON object")
+            self.started = True
+            self.stack.append("{")
+            return
+
+        if len(self.stack) == 1:
+            self._step_top_level(text, i, c)
+            return
+
+        # Inside a top-level value (depth >= 2)
+        at_array_level = self.in_array and len(self.stack) == 2
+        if at_array_level and c in ",]":
+            self._flush_element(text, i)
+        elif at_array_level and self.element_start is None:
+            self.element_start = i
+        if c == '"':
+            self.in_string = True
+        elif c in "{[":
+            self.stack.append(c)
+        elif c in "}]":
+            self.stack.pop()
+            if len(self.stack) == 1:
+                self.in_array = False
+                self.phase = "after_value"
+
+    def _close_key(self, text: str, i: int) -> None:
+        self.current_key = json.loads(text[self.key_start:i + 1])
+        self.seen_keys.append(self.current_key)
+        if not self.allow_extra and self.current_key not in self.properties:
+            self._fail(f"Unexpected property '{self.current_key}'")
+        self.phase = "colon"
+
+    def _step_top_level(self, text: str, i: int, c: str) -> None:
+        phase = self.phase
+        if phase == "primitive":
+            if c not in ",}":
+                return
+            phase = self.phase = "after_value"
+        if phase == "key_or_end":
+            if c == '"':
+                self.in_string = True
+                self.key_start = i
+                self.phase = "key"
+            elif c == "}":
+                self._close_object()
+            else:
+                self._fail(f"Expected a property name, got '{c}'")
+        elif phase == "colon":
+            if c != ":":
+                self._fail(f"Expected ':' after '{self.current_key}'")
+            self.phase = "value_start"
+        elif phase == "value_start":
+            expected = self._expected_type()
+            if expected in _TYPE_STARTS and c not in _TYPE_STARTS[expected]:
+                self._fail(f"Property '{self.current_key}' should be {expected}, got '{c}'")
+            if c == '"':
+                self.in_string = True
+                self.phase = "value"
+            elif c in "{[":
+                self.stack.append(c)
+                self.in_array = c == "[" and self.on_item is not None
+                self.phase = "value"
+            else:
+                self.phase = "primitive"
+        elif phase == "after_value":
+            if c == ",":
+                self.phase = "key_or_end"
+            elif c == "}":
+                self._close_object()
+            else:
+                self._fail(f"Expected ',' or '}}' after '{self.current_key}'")
+
+    def _close_object(self) -> None:
+        self.stack.pop()
+        self.finished = True
+        missing = [key for key in self.required if key not in self.seen_keys]
+        if missing:
+            self._fail(f"Tool input is missing required properties {missing}")
+
+
+def assemble_stream_response(events: Iterable[Dict[str, Any]],
+                             on_tool_input: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+    """
+    Consume converseStream events and build the equivalent converse response.
+
+    on_tool_input is called with (tool name, text delta) for every toolUse input
+    delta, before the stream is read further; raising from it stops consumption.
+
+    Tool input that is not valid JSON (a stream cut off at max_tokens) is kept as
+    the raw text, with the stream's stopReason, for output_repair to salvage or
+    reject, as with a converse response.
+    """
+    blocks: Dict[int, Dict[str, Any]] = {}
+    tool_text: Dict[int, List[str]] = {}
+    role = "assistant"
+    stop_reason = None
+    usage: Dict[str, Any] = {}
+    metrics: Dict[str, Any] = {}
+    for event in events:
+        if "messageStart" in event:
+            role = event["messageStart"].get("role", role)
+        elif "contentBlockStart" in event:
+            start = event["contentBlockStart"]
+            tool_use = start.get("start", {}).get("toolUse")
+            if tool_use is not None:
+                blocks[start.get("contentBlockIndex", 0)] = {"toolUse": dict(tool_use)}
+        elif "contentBlockDelta" in event:
+            delta_event = event["contentBlockDelta"]
+            index = delta_event.get("contentBlockIndex", 0)
+            delta = delta_event.get("delta", {})
+            if "text" in delta:
+                block = blocks.setdefault(index, {"text": ""})
+                block["text"] = block.get("text", "") + delta["text"]
+            elif "toolUse" in delta:
+                piece = delta["toolUse"].get("input", "")
+                tool_text.setdefault(index, []).append(piece)
+                if on_tool_input is not None:
+                    name = blocks.get(index, {}).get("toolUse", {}).get("name")
+                    on_tool_input(name, piece)
+        elif "messageStop" in event:
+            stop_reason = event["messageStop"].get("stopReason")
+        elif "metadata" in event:
+            usage = event["metadata"].get("usage", {})
+            metrics = event["metadata"].get("metrics", {})
+
+    content = []
+    for index in sorted(blocks):
+        block = blocks[index]
+        if "toolUse" in block:
+            text = "".join(tool_text.get(index, [])).strip()
+            try:
+                block["toolUse"]["input"] = json.loads(text) if text else {}
+            except json.JSONDecodeError:
+                block["toolUse"]["input"] = text
+        content.append(block)
+    return {
+        "output": {"message": {"role": role, "content": content}},
+        "stopReason": stop_reason,
+        "usage": usage,
+        "metrics": metrics,
+    }
+
+
+def response_to_stream_events(response: Dict[str, Any], chunk_size: int = 64) -> Iterator[Dict[str, Any]]:
+    """Re-emit a converse response as converseStream events (tool input in chunk_size pieces)."""
+    message = response.get("output", {}).get("message", {})
+    yield {"messageStart": {"role": message.get("role", "assistant")}}
+    for index, block in enumerate(message.get("content", [])):
+        if "toolUse" in block:
+            tool_use = block["toolUse"]
+            yield {"contentBlockStart": {
+                "start": {"toolUse": {"toolUseId": tool_use.get("toolUseId"), "name": tool_use.get("name")}},
+                "contentBlockIndex": index,
+            }}
+            tool_input = tool_use.get("input", {})
+            # Raw text of a cut-off stream (see assemble_stream_response) is re-emitted as is
+            text = tool_input if isinstance(tool_input, str) else json.dumps(tool_input, ensure_ascii=False)
+            for start in range(0, len(text), chunk_size):
+                yield {"contentBlockDelta": {
+                    "delta": {"toolUse": {"input": text[start:start + chunk_size]}},
+                    "contentBlockIndex": index,
+                }}
+        elif "text" in block:
+            yield {"contentBlockDelta": {"delta": {"text": block["text"]}, "contentBlockIndex": index}}
+        yield {"contentBlockStop": {"contentBlockIndex": index}}
+    yield {"messageStop": {"stopReason": response.get("stopReason")}}
+    yield {"metadata": {"usage": response.get("usage", {}), "metrics": response.get("metrics", {})}}
@@ -0,0 +1,252 @@
+"""
+Record/replay stand-in for the bedrock-runtime client.
+
+Record mode wraps a live client and appends every converse request/response
+pair to a JSONL tape (streamed calls are stored as the equivalent converse
+response, so one tape replays both APIs). Replay mode serves responses from that tape without AWS
+credentials, with optional synthetic latency and throttling, so pipelines can
+be benchmarked deterministically offline.
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from make_inference_profile import model_for_inference_profile
+from src.utils.converse_stream import assemble_stream_response, response_to_stream_events
+
+logger = logging.getLogger(__name__)
+
+
+class TapeMissError(KeyError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def base_model_id(model_id: Optional[str], config=None) -> Optional[str]:
+    """
+    The model behind a converse modelId, so tapes replay on any account.
+
+    Application inference profile ARNs are account-specific; with a config they are mapped
+    back to the model they were resolved for (make_inference_profile's cache). Foundation
+    model and system inference profile ARNs end in the model id itself.
+    """
+    if not model_id or not model_id.startswith("arn:"):
+        return model_id
+    if config is not None:
+        model = model_for_inference_profile(config, model_id)
+        if model:
+            return model
+    kind, _, name = model_id.split(":", 5)[-1].partition("/")
+    if kind in ("foundation-model", "inference-profile") and name:
+        return name
+    return model_id
+
+
+def tape_key(request: Dict[str, Any], model: Optional[str] = None) -> str:
+    """Hash the parts of a converse request that determine the response.
+
+    The model is part of the key (cascades and hedges send the same messages to
+    different models), as its base model id rather than the account-specific
+    modelId: pass it as model, or it is derived from request["modelId"].
+    """
+    payload = json.dumps(
+        {
+            "model": model or base_model_id(request.get("modelId")),
+            "messages": request.get("messages"),
+            "toolConfig": request.get("toolConfig"),
+            "inferenceConfig": request.get("inferenceConfig"),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecordingBedrockClient:
+    """Delegates to a live client and appends each converse exchange to a tape."""
+
+    def __init__(self, client, tape_path: str, config=None):
+        self._client = client
+        self.tape_path = tape_path
+        self.config = config  # maps inference profile ARNs back to model ids
+        self.lock = Lock()
+        directory = os.path.dirname(tape_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _append(self, request: Dict[str, Any], response: Dict[str, Any], latency: float) -> None:
+        model = base_model_id(request.get("modelId"), self.config)
+        record = {
+            "key": tape_key(request, model),
+            "model": model,
+            "operation": "converse",
+            "request": request,
+            "response": {k: v for k, v in response.items() if k != "ResponseMetadata"},
+            "latency": latency,
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self.lock:
+            with open(self.tape_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def converse(self, **kwargs) -> Dict[str, Any]:
+        start = time.time()
+        response = self._client.converse(**kwargs)
+        self._append(kwargs, response, time.time() - start)
+        return response
+
+    def converse_stream(self, **kwargs) -> Dict[str, Any]:
+        start = time.time()
+        response = self._client.converse_stream(**kwargs)
+        live_stream = response["stream"]
+
+        def recorded_stream():
+            events = []
+            for event in live_stream:
+                events.append(event)
+                yield event
+            # Only complete streams are recorded; a caller that aborts closes the generator first
+            self._append(kwargs, assemble_stream_response(events), time.time() - start)
+
+        return {**response, "stream": recorded_stream()}
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class ReplayBedrockClient:
+    """Serves converse responses from a tape with configurable latency and throttling."""
+
+    def __init__(
+        self,
+        tape_path: str,
+        latency: Optional[float] = None,
+        jitter: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: int = 0,
+        config=None,
+    ):
+        """
+        Args:
+            tape_path: JSONL tape written by RecordingBedrockClient.
+            latency: Seconds to sleep per call; None replays the recorded latency.
+            jitter: Uniform random seconds added on top of latency.
+            throttle_rate: Probability (0-1) that a call raises ThrottlingException.
+            seed: Seed for the jitter/throttle random stream.
+            config: Maps inference profile ARNs of older tapes (recorded without "model") back to model ids.
+        """
+        self.tape_path = tape_path
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.config = config
+        self.lock = Lock()
+        self.calls = 0
+        self.throttled = 0
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.tape_path):
+            raise FileNotFoundError(f"Bedrock tape not found: {self.tape_path}")
+        count = 0
+        with open(self.tape_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                # Keyed again from the request, so tapes recorded before the model was part of the key still replay
+                model = record.get("model") or base_model_id(record["request"].get("modelId"), self.config)
+                key = tape_key(record["request"], model)
+                self._entries.setdefault(key, []).append(record)
+                count += 1
+        logger.info(f"Loaded {count} recorded Bedrock responses from {self.tape_path}")
+
+    def _next_record(self, key: str) -> Dict[str, Any]:
+        """Return recorded entries for key in order, cycling once they run out."""
+        with self.lock:
+            records = self._entries.get(key)
+            if not records:
+                raise TapeMissError(f"No recorded Bedrock response for request {key[:12]}")
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            return records[index % len(records)]
+
+    def _sleep(self, recorded_latency: float) -> None:
+        with self.lock:
+            extra = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        delay = (self.latency if self.latency is not None else recorded_latency) + extra
+        if delay > 0:
+            time.sleep(delay)
+
+    def _maybe_throttle(self, operation: str) -> None:
+        with self.lock:
+            self.calls += 1
+            throttle = self.throttle_rate > 0 and self.random.random() < self.throttle_rate
+            if throttle:
+                self.throttled += 1
+        if throttle:
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Too many requests (replayed)"}},
+                operation,
+            )
+
+    def converse(self, **kwargs) -> Dict[str, Any]:
+        self._maybe_throttle("Converse")
+        record = self._next_record(tape_key(kwargs))
+        self._sleep(record.get("latency", 0.0))
+        return copy.deepcopy(record["response"])
+
+    def converse_stream(self, **kwargs) -> Dict[str, Any]:
+        """Replay a recorded response as stream events, spreading its latency across the events."""
+        self._maybe_throttle("ConverseStream")
+        record = self._next_record(tape_key(kwargs))
+        events = list(response_to_stream_events(copy.deepcopy(record["response"])))
+        with self.lock:
+            extra = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        delay = (self.latency if self.latency is not None else record.get("latency", 0.0)) + extra
+
+        def replayed_stream():
+            for event in events:
+                if delay > 0:
+                    time.sleep(delay / len(events))
+                yield event
+
+        return {"stream": replayed_stream()}
+
+
+def wrap_bedrock_client(config, live_client_factory: Callable[[], Any]):
+    """Return the bedrock-runtime client for config.bedrock_mode.
+
+    "live" returns live_client_factory() unchanged, "record" wraps it in a
+    RecordingBedrockClient and "replay" never touches AWS.
+    """
+    mode = config.bedrock_mode
+    if mode == "replay":
+        logger.info(f"Replaying Bedrock responses from {config.bedrock_tape_path}")
+        return ReplayBedrockClient(
+            config.bedrock_tape_path,
+            latency=config.bedrock_replay_latency,
+            jitter=config.bedrock_replay_jitter,
+            throttle_rate=config.bedrock_replay_throttle_rate,
+            seed=config.seed,
+            config=config,
+        )
+    client = live_client_factory()
+    if mode == "record":
+        logger.info(f"Recording Bedrock responses to {config.bedrock_tape_path}")
+        return RecordingBedrockClient(client, config.bedrock_tape_path, config)
+    if mode != "live":
+        raise ValueError(f"bedrock_mode must be 'live', 'record' or 'replay', got {mode}")
+    return client
@@ -1,12 +1,23 @@
 import argparse
+import asyncio
 import json
-from typing import List, Dict
+import math
+import os
+from threading import Lock
+from typing import Any, Iterator, List, Dict
 
 from llm_conv_segmentation.main import initialize_bedrock_model
-from .llm import consolidate_nuggets, generate_nuggets_for_a_chunk, generate_nuggets_for_all_chunks
-from transcript_analysis.qa_fact_generation.utils.file_utils import read_transcript_file, create_facts_from_qa_pairs
-from transcript_analysis.qa_fact_generation.utils.QA_extractor import QAExtractor
+from .llm import agenerate_nuggets_for_all_chunks, build_chunk_nugget_request, consolidate_nuggets, generate_nuggets_for_a_chunk, generate_nuggets_for_all_chunks
+from transcript_analysis.qa_fact_generation.utils.batch_inference import run_batch
+from transcript_analysis.qa_fact_generation.utils.llm import build_speaker_request
+from transcript_analysis.qa_fact_generation.utils.model_cascade import HEAVY
+from transcript_analysis.qa_fact_generation.utils.run_planner import RunPlan, RunPlanner
+from transcript_analysis.qa_fact_generation.utils.retry_policy import get_retry_policy
+from transcript_analysis.qa_fact_generation.utils.run_ledger import get_run_ledger
+from transcript_analysis.qa_fact_generation.utils.file_utils import create_facts_from_qa_pairs
+from transcript_analysis.qa_fact_generation.utils.parse_cache import get_parsed_transcript
 from llm_conv_segmentation.segmenter import create_qa_pairs, chunk_formatted_pairs
+from transcript_analysis.qa_fact_generation_chunk.utils.qa_parser_chunk import iter_chunk_formatted_pairs
 from config import CONFIG
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -15,13 +26,28 @@ import logging
 logging_config = logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Planning estimates for consolidation, whose prompts depend on the generated nuggets
+NUGGET_OUTPUT_TOKENS = 75  # one extracted nugget with its page/line fields
+NUGGET_PROMPT_TOKENS = 45  # one {id: text} entry of a consolidation prompt
+CONSOLIDATION_PROMPT_TOKENS = 500  # consolidation instructions and tool schema
+
 
 class DepositionNuggetGenerator:
-    bedrock_client = initialize_bedrock_model(CONFIG)
     CONFIG = CONFIG
     add_witness_name: bool = True
+    _bedrock_client = None
+    _bedrock_client_lock = Lock()
+
+    @property
+    def bedrock_client(self):
+        """Bedrock client shared by all generators, created on first use rather than at import."""
+        cls = DepositionNuggetGenerator
+        with cls._bedrock_client_lock:
+            if cls._bedrock_client is None:
+                cls._bedrock_client = initialize_bedrock_model(self.CONFIG)
+        return cls._bedrock_client
 
-    def __init__(self, input_path: str, output_path: str, chunk_size: int = 5000, overlap: int = 5, print_usage:bool = False, mode:str = "mapping"):
+    def __init__(self, input_path: str, output_path: str, chunk_size: int = 1900, overlap: int = 5, print_usage:bool = False, mode:str = "mapping"):
         self.input_path = input_path
         self.output_path = output_path
         self.chunk_size = chunk_size
@@ -31,19 +57,95 @@ class DepositionNuggetGenerator:
         self.logger = logging.getLogger(__name__)
 
     def chunk_the_deposition(self) -> List[List[Dict]]:
-        lines = read_transcript_file(self.input_path)
-        extractor = QAExtractor(self.bedrock_client)
-        extractor.extract_qa_pairs(lines)
-        formatted_pairs = extractor.format_the_pairs(add_witness_name=self.add_witness_name)
-        logger.info(f"formatted pairs example: {formatted_pairs[:2]}")
-        chunks = chunk_formatted_pairs(formatted_pairs, chunk_size=self.chunk_size, overlap=self.overlap)
+        chunks = list(self.iter_deposition_chunks())
+        logger.info(f"formatted pairs example: {chunks[0][:2]}")
         return chunks
 
+    def iter_deposition_chunks(self) -> Iterator[List[Dict]]:
+        """
+        Chunks of the deposition, formatted and yielded one at a time.
+
+        The Q&A pairs and detected speakers come from the parse cache, so a transcript that
+        was already parsed (by an earlier run, an evaluation or the backend) is not parsed
+        or speaker-detected again. Nothing runs before the first chunk is requested, so
+        async callers can do the parse and detection off the event loop with the first next().
+        """
+        parsed = get_parsed_transcript(self.input_path, self.CONFIG)
+        extractor = parsed.extractor(self.bedrock_client)
+        conversation = None
+        if self.add_witness_name and self.CONFIG.only_A_detection:
+            parsed.detect_speakers(self.bedrock_client, self.CONFIG)
+            conversation = parsed.conversation(self.CONFIG)  # None if not detected: iter_formatted_pairs retries with more pairs
+        formatted_pairs = extractor.iter_formatted_pairs(
+            parsed.qa_pairs, add_witness_name=self.add_witness_name, conversation=conversation
+        )
+        yield from iter_chunk_formatted_pairs(formatted_pairs, chunk_size=self.chunk_size, overlap=self.overlap)
+
+    def _start_run(self) -> None:
+        get_retry_policy(self.CONFIG).start_run()
+        if self.CONFIG.run_ledger_enabled:
+            get_run_ledger(self.CONFIG).start_run("nugget_generation", deposition=os.path.basename(self.input_path))
+
+    def batch_requests(self) -> List[Dict[str, Any]]:
+        """The per-chunk calls of generate_nuggets as generate_structured_output arguments (for run_batch)."""
+        return [build_chunk_nugget_request(self.CONFIG, self.print_usage, chunk) for chunk in self.chunk_the_deposition()]
+
+    def plan(self, concurrency: int = 2) -> RunPlan:
+        """
+        Predict the calls, tokens, cost and wall time of run() without calling Bedrock.
+
+        Parsing and chunking run locally. concurrency is the number of chunks generated at
+        once (2 for run(), CONFIG.llm_max_concurrency for arun()).
+        """
+        planner = RunPlanner(self.CONFIG, "nugget_generation")
+        parsed = get_parsed_transcript(self.input_path, self.CONFIG)
+        extractor = parsed.extractor()
+        if self.add_witness_name and parsed.conversation(self.CONFIG) is not None:
+            planner.note("Speakers were already detected for this transcript (parse cache)")
+        elif self.add_witness_name:
+            planner.add_requests(
+                "detect_speaker", [build_speaker_request(self.CONFIG, extractor.speaker_context(), self.print_usage)],
+                concurrency=1, phase=0
+            )
+            planner.note("Chunks are counted without the witness names added after speaker detection")
+        formatted_pairs = extractor.format_the_pairs(add_witness_name=False)
+        chunks = chunk_formatted_pairs(formatted_pairs, chunk_size=self.chunk_size, overlap=self.overlap)
+        extraction = planner.add_requests(
+            "extract_nuggets", [build_chunk_nugget_request(self.CONFIG, self.print_usage, chunk) for chunk in chunks],
+            concurrency=concurrency, phase=1
+        )
+
+        if self.mode == "consolidated" and chunks:
+            nuggets = estimate_nugget_count(planner.plan, "mapping")
+            # First round: chunks of up to 1200 prompt tokens of nuggets (see consolidate_nuggets)
+            calls = math.ceil(nuggets * NUGGET_PROMPT_TOKENS / 1200)
+            planner.add_estimate(
+                "consolidate_nuggets", HEAVY, calls,
+                CONSOLIDATION_PROMPT_TOKENS + min(1200, nuggets * NUGGET_PROMPT_TOKENS), concurrency=4, phase=2
+            )
+            # Second round over the merged nuggets once there are more than 15 of them
+            merged = nuggets // 2
+            if merged > 15:
+                calls = math.ceil(merged * NUGGET_PROMPT_TOKENS / 1200)
+                planner.add_estimate(
+                    "consolidate_nuggets", HEAVY, calls,
+                    CONSOLIDATION_PROMPT_TOKENS + min(1200, merged * NUGGET_PROMPT_TOKENS), concurrency=1, phase=3
+                )
+            planner.note(f"Consolidation assumes ~{nuggets} extracted nuggets, about half of which merge")
+        return planner.plan
+
     def generate_nuggets(self) -> Dict:
-        chunks = self.chunk_the_deposition()
+        self._start_run()
+        chunks = self.iter_deposition_chunks()
         self.all_nuggets = generate_nuggets_for_all_chunks(chunks, self.mode, self.bedrock_client, self.CONFIG, self.print_usage)
         return self.all_nuggets
 
+    async def agenerate_nuggets(self) -> Dict:
+        self._start_run()
+        chunks = self.iter_deposition_chunks()
+        self.all_nuggets = await agenerate_nuggets_for_all_chunks(chunks, self.mode, self.bedrock_client, self.CONFIG, self.print_usage)
+        return self.all_nuggets
+
     def hierarchical_nuggets(self) -> Dict:
         result = consolidate_nuggets(self.bedrock_client, self.CONFIG, self.print_usage, self.all_nuggets)
         return result
@@ -59,4 +161,53 @@ class DepositionNuggetGenerator:
                 json.dump(hierarchical_nuggets, f, indent=2)
             self.logger.info(f"Nuggets written to hierarchical_{self.output_path}")
 
+    async def arun(self):
+        """Async counterpart of run() for callers that already own an event loop."""
+        nuggets = await self.agenerate_nuggets()
+        with open(self.output_path, 'w') as f:
+            json.dump(nuggets, f, indent=2)
+        self.logger.info(f"Nuggets written to {self.output_path}")
+        if self.mode == "consolidated":
+            hierarchical_nuggets = await asyncio.to_thread(self.hierarchical_nuggets)
+            with open(f"{self.output_path.replace('.json','_hierarchical.json')}", 'w') as f:
+                json.dump(hierarchical_nuggets, f, indent=2)
+            self.logger.info(f"Nuggets written to hierarchical_{self.output_path}")
+
+
+def estimate_nugget_count(plan: RunPlan, mode: str = "mapping") -> int:
+    """
+    Nuggets a nugget_generation plan is expected to write: extracted nuggets in mapping
+    mode, about half of them once consolidated (the planner's merge assumption).
+    """
+    extraction = next((stage for stage in plan.stages if stage.stage == "extract_nuggets"), None)
+    chunks = extraction.calls + extraction.cached_calls if extraction else 0
+    if not chunks:
+        return 0
+    per_chunk = extraction.output_tokens / extraction.calls if extraction.calls else 2 * NUGGET_OUTPUT_TOKENS
+    nuggets = max(1, round(chunks * per_chunk / NUGGET_OUTPUT_TOKENS))
+    return max(1, nuggets // 2) if mode == "consolidated" else nuggets
+
+
+def run_generators_batched(generators: List[DepositionNuggetGenerator], job_name: str = "nuggets", runner=None) -> Dict[str, int]:
+    """
+    Run generators with their chunk calls answered by one batch job per model.
 
+    The batch results land in the response cache, so each generator's run() reads
+    them back as cache hits and writes the usual nuggets JSON; chunks the job could
+    not answer, and consolidation (each round depends on the previous one), run live.
+    Returns the counts of run_batch.
+    """
+    requests = []
+    for generator in generators:
+        try:
+            requests.extend(generator.batch_requests())
+        except Exception as e:
+            logger.error(f"Could not build batch requests for {generator.input_path}: {e}")
+    counts = run_batch(requests, CONFIG, job_name, runner)
+    logger.info(f"Batch results: {counts}")
+    for generator in generators:
+        try:
+            generator.run()
+        except Exception as e:
+            logger.error(f"Nugget generation for {generator.input_path} failed: {e}")
+    return counts
@@ -1,15 +1,18 @@
 # from outlines import models, generate
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List
+import asyncio
+from concurrent.futures import as_completed
+from typing import Any, Dict, List
 
 import boto3
 import botocore
 from src.vanilla_nuggetbased_evaluation.evaluation_pymodels import ConsolidatedNuggetItem, ConsolidatedNuggetsTemp, Nugget, NuggetData, NuggetsList
-from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import generate_structured_output
+from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import agenerate_structured_output, generate_structured_output
+from transcript_analysis.qa_fact_generation.utils.context_executor import ContextThreadPoolExecutor
+from transcript_analysis.qa_fact_generation.utils.model_cascade import HEAVY, STANDARD
+from transcript_analysis.qa_fact_generation.utils.token_counter import count_tokens
 import logging
 import json
 from pydantic import ValidationError
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from botocore.config import Config
 
 logger = logging.getLogger(__name__)
@@ -25,7 +28,7 @@ def generate_nuggets_for_all_chunks(chunks,
     
     all_nuggets = {}
     # Use threads (I/O-bound task) - using inference profiles for better rate limits
-    with ThreadPoolExecutor(max_workers=2) as executor:
+    with ContextThreadPoolExecutor(max_workers=2) as executor:
         futures = {
             executor.submit(
                 generate_nuggets_for_a_chunk,
@@ -52,13 +55,53 @@ def generate_nuggets_for_all_chunks(chunks,
 
     return all_nuggets
 
-def generate_nuggets_for_a_chunk(
-    bedrock_client,
+
+async def agenerate_nuggets_for_all_chunks(chunks,
+                                           mode:str,
+                                           bedrock_client,
+                                           CONFIG: Config,
+                                           print_usage: bool):
+    """
+    Async counterpart of generate_nuggets_for_all_chunks.
+
+    Each chunk is scheduled as soon as it is produced; chunks may be a lazy iterator
+    (e.g. DepositionNuggetGenerator.iter_deposition_chunks), which is advanced off the
+    event loop so parsing the rest of the transcript overlaps the first calls.
+    """
+    chunks = iter(chunks)
+    tasks = []
+    try:
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            tasks.append(asyncio.create_task(agenerate_nuggets_for_a_chunk(bedrock_client, CONFIG, print_usage, chunk)))
+    except BaseException:
+        # Parsing failed part-way: do not leave the scheduled calls running
+        for task in tasks:
+            task.cancel()
+        raise
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    all_nuggets = {}
+    for idx, result in enumerate(results):
+        if isinstance(result, BaseException):
+            logger.error(f"Chunk {idx} failed: {result}")
+            continue
+        all_nuggets.update({
+            f"nugget{i + len(all_nuggets)}": nugget.to_dict()
+            for i, nugget in enumerate(result.nuggets)
+        })
+
+    return all_nuggets
+
+
+def build_chunk_nugget_request(
     CONFIG,
     print_usage: bool,
     pairs: List[dict], #chunk
-) -> NuggetsList:
-    """Process question-answer pairs using the Converse API with context from previous annotations."""
+) -> Dict[str, Any]:
+    """Build the generate_structured_output arguments (minus the client) for one chunk."""
 
 
     if not pairs:
@@ -152,19 +195,51 @@ def generate_nuggets_for_a_chunk(
         }
     }
 
+    return dict(
+        messages=[{"role": "user", "content": [{"text": prompt}]}],
+        tool_schema=tool_schema,
+        tool_schema_name="extract_nuggets",
+        description="Extract factual nuggets from Q&A pairs",
+        model_id=CONFIG.model_path,
+        tier=STANDARD,
+        max_tokens=CONFIG.max_tokens,
+        print_usage=print_usage,
+        obj=NuggetsList,
+        partial_lists=True  # nuggets are independent; keep the complete ones of a cut-off answer
+    )
+
+
+def generate_nuggets_for_a_chunk(
+    bedrock_client,
+    CONFIG,
+    print_usage: bool,
+    pairs: List[dict], #chunk
+) -> NuggetsList:
+    """Process question-answer pairs using the Converse API with context from previous annotations."""
+    request = build_chunk_nugget_request(CONFIG, print_usage, pairs)
+
+    logger.info("Extracting nuggets from chunk")
+    try:
+        result = generate_structured_output(bedrock_client=bedrock_client, **request)
+        logger.info(f"Extracted nuggets: {result}")
+        return result
+    except ValidationError as e:
+        logger.error(f"Pydantic validation error in extract_nuggets_from_chunk: {e}")
+        raise
+
+
+async def agenerate_nuggets_for_a_chunk(
+    bedrock_client,
+    CONFIG,
+    print_usage: bool,
+    pairs: List[dict], #chunk
+) -> NuggetsList:
+    """Async counterpart of generate_nuggets_for_a_chunk."""
+    request = build_chunk_nugget_request(CONFIG, print_usage, pairs)
+
     logger.info("Extracting nuggets from chunk")
     try:
-        result = generate_structured_output(
-            bedrock_client=bedrock_client,
-            messages=[{"role": "user", "content": [{"text": prompt}]}],
-            tool_schema=tool_schema,
-            tool_schema_name="extract_nuggets",
-            description="Extract factual nuggets from Q&A pairs",
-            model_id=CONFIG.model_path,
-            max_tokens=CONFIG.max_tokens,
-            print_usage=print_usage,
-            obj=NuggetsList
-        )
+        result = await agenerate_structured_output(bedrock_client=bedrock_client, **request)
         logger.info(f"Extracted nuggets: {result}")
         return result
     except ValidationError as e:
@@ -182,11 +257,17 @@ def consolidate_nuggets(
     CONFIG,
     print_usage: bool,
     nuggets_dict,
-    max_chunk_size: int = 4000,
+    max_chunk_size: int = 1200,
     second_consolidation_threshold: int = 15,
-    max_workers: int = 4
+    max_workers: int = 4,
+    final_chunk_size: int = 1200
 ) -> Dict:
-    """Consolidate overlapping nuggets into broader factual statements."""
+    """
+    Consolidate overlapping nuggets into broader factual statements.
+
+    max_chunk_size (first round) and final_chunk_size (second round, over more than
+    second_consolidation_threshold merged nuggets) are in tokens.
+    """
     def chunk_nuggets_by_size(nuggets_dict: Dict[str, str], max_size: int) -> List[Dict[str, str]]:
         if not nuggets_dict:
             raise ValueError("nuggets_dict cannot be empty")
@@ -201,7 +282,7 @@ def consolidate_nuggets(
             if not (isinstance(nugget_id, str) and isinstance(nugget_text, str)):
                 raise ValueError(f"Invalid nugget: ID={nugget_id}, text={nugget_text}")
 
-            item_size = len(json.dumps({nugget_id: nugget_text}))
+            item_size = count_tokens(json.dumps({nugget_id: nugget_text}))
             
             if current_size + item_size > max_size and current_chunk:
                 chunks.append(current_chunk)
@@ -217,12 +298,6 @@ def consolidate_nuggets(
         logger.info(f"Created {len(chunks)} chunks from {len(nuggets_dict)} nuggets")
         return chunks
 
-    @retry(
-        stop=stop_after_attempt(5),
-        wait=wait_exponential(multiplier=1, min=4, max=20),
-        retry=retry_if_exception_type((botocore.exceptions.ReadTimeoutError,)),
-        reraise=True
-    )
     def consolidate_chunk(chunk: Dict[str, str]) -> ConsolidatedNuggetsTemp:
         if not chunk:
             raise ValueError("Chunk cannot be empty")
@@ -251,7 +326,7 @@ def consolidate_nuggets(
             "- Use witness name from original data, or 'The witness' if unclear.\n\n"
 
             "OUTPUT: JSON with:\n"
-            "1. 'clustered_nuggets': array of consolidated nuggets, ordered by the final ordering rules.\n"
+            "1. 'consolidated_nuggets': array of consolidated nuggets, ordered by the final ordering rules.\n"
             "2. 'mapping': object mapping each consolidated nugget to original IDs.\n\n"
 
             "NUGGETS TO CONSOLIDATE:\n" + json.dumps(chunk, indent=2)
@@ -290,9 +365,13 @@ def consolidate_nuggets(
                 tool_schema_name="consolidate_nuggets",
                 description="Consolidate related nuggets",
                 model_id=CONFIG.model_path,
+                tier=HEAVY,
                 max_tokens=CONFIG.max_tokens,
                 print_usage=print_usage,
-                obj=ConsolidatedNuggetsTemp
+                obj=ConsolidatedNuggetsTemp,
+                # Consolidation outputs run to thousands of tokens; stop early if they go off-schema
+                stream=True,
+                on_partial=lambda field, item: logger.debug(f"Streamed {field} item: {item}")
             )
             logger.info(f"Consolidated chunk result: {result}")
             return result
@@ -326,7 +405,7 @@ def consolidate_nuggets(
         if len(all_nuggets) > second_consolidation_threshold:
             logger.info(f"Performing final consolidation on {len(all_nuggets)} nuggets")
             nugget_dict = {nugget.consolidated_id: nugget.text for nugget in all_nuggets}
-            final_chunks = chunk_nuggets_by_size(nugget_dict, max_size=4000)
+            final_chunks = chunk_nuggets_by_size(nugget_dict, max_size=final_chunk_size)
 
             final_nuggets = []
             final_mapping = {}
@@ -360,7 +439,7 @@ def consolidate_nuggets(
     
     # Process chunks in parallel
     chunk_results = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
         future_to_chunk = {
             executor.submit(consolidate_chunk, chunk): chunk
             for chunk in chunks
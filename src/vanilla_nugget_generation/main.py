@@ -8,13 +8,18 @@ def main():
     parser = argparse.ArgumentParser("Extract nuggets from deposition")
     parser.add_argument("--input", required=True, help=".txt deposition file.")
     parser.add_argument("-o", "--output", required=True, help=".json output path to stoe the nuggets and hierarchichal nuggets.")
-    parser.add_argument("--chunk-size", type=int, default=10000, help = "Chunk size for chunking the input before passing it to the LLM")
+    parser.add_argument("--chunk-size", type=int, default=3750, help = "Chunk size in tokens for chunking the input before passing it to the LLM")
     parser.add_argument("--overlap", type=int, default=5, help = "# of Q&A pairs overlapping during chunking")
     parser.add_argument("--print-usage", action="store_true", help = "logs each API call usage")
     parser.add_argument("--total-usage", action="store_true", help = "logs the total usage summary")
     parser.add_argument("--mode", type=str, default="consolidated", help = "mode for nugget generation. Can be consolidated or mapping")
     parser.add_argument("--sso-profile", type=str, required=True, help="aws sso profile set in ~/.aws/config.")
+    parser.add_argument("--no-cache", action="store_true", help = "bypass the on-disk Bedrock response cache")
+    parser.add_argument("--metrics-output", type=str, default=None, help = ".json path to export per-stage latency/token metrics")
+    parser.add_argument("--plan", action="store_true", help = "only predict LLM calls, tokens, cost and wall time (parses and chunks locally, no Bedrock calls)")
     args = parser.parse_args()
+    if args.no_cache:
+        CONFIG.response_cache_enabled = False
 
     generator = DepositionNuggetGenerator(
         input_path=args.input,
@@ -24,8 +29,14 @@ def main():
         print_usage=args.print_usage,
         mode=args.mode)
 
+    if args.plan:
+        generator.plan().summary()
+        return
+
     generator.run()
     token_tracker.summary() if args.total_usage else None
+    if args.metrics_output:
+        token_tracker.export_json(args.metrics_output)
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,7 @@
 from typing import Dict, List
 
 from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import generate_structured_output
+from transcript_analysis.qa_fact_generation.utils.model_cascade import STANDARD
 from transcript_analysis.qa_fact_generation_chunk.utils.qa_parser_chunk import chunk_summary_facts
 from vanilla_nuggetbased_evaluation.evaluation_pymodels import AccuracyEvaluation, GenQuestions
 
@@ -89,6 +90,7 @@ def evaluate_accuracy(
                 tool_schema_name="accuracy_evaluation",
                 description="Check if inaccuracy is in summary",
                 model_id=config.model_path,
+                tier=STANDARD,
                 max_tokens=config.max_tokens,
                 print_usage=print_usage,
                 obj=AccuracyEvaluation
@@ -157,7 +159,7 @@ def evaluate_accuracy_with_deposition(self,
     
     
     all_summary_facts = [{"Fact_{}".format(i): fact} for i, fact in enumerate(summary.split("\n"))]
-    fact_chunks = chunk_summary_facts(all_summary_facts, chunk_size=4000, overlap=2)
+    fact_chunks = chunk_summary_facts(all_summary_facts, chunk_size=1300, overlap=2)
 
     tool_schema = {
         "type": "array",
@@ -188,6 +190,7 @@ def evaluate_accuracy_with_deposition(self,
             tool_schema_name="question_generator",
             description="generate questions for facts (chunk of facts) in the summary",
             model_id=self.config.model_path,
+            tier=STANDARD,
             max_tokens=self.config.max_tokens,
             print_usage=print_usage,
             obj=GenQuestions
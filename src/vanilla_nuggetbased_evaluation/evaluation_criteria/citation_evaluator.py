@@ -7,9 +7,12 @@ from citation_retriever.deposition_processor import DepositionProcessor
 from citation_retriever.summary_parser import Summary
 from llm_conv_segmentation.main import initialize_bedrock_model
 from transcript_analysis.models.pymodels import Conversation
-from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import generate_structured_output
+from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import agenerate_structured_output, build_cached_messages, generate_structured_output
+from transcript_analysis.qa_fact_generation.utils.context_executor import ContextThreadPoolExecutor
+from transcript_analysis.qa_fact_generation.utils.model_cascade import STANDARD
 from vanilla_nuggetbased_evaluation.evaluation_pymodels import CitationEvaluation
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from typing import Dict, List, Optional
 import re
 
 def prepend_A_speaker_name(conversation, deposition_text):
@@ -27,16 +30,10 @@ def prepend_A_speaker_name(conversation, deposition_text):
     return output_text
 
 
-def process_single_citation(citation_entry, conversation, logger, bedrock_client, config, print_usage, surrounding_text_before=None, surrounding_text_after =None):
-
-    if not citation_entry["is_cited"]:
-        return None
-    
-
-
-    summary_fact, deposition_text = citation_entry["summary_fact"], citation_entry["text"]
-    deposition_text = prepend_A_speaker_name(conversation, deposition_text)
-    prompt = f"""
+def build_citation_request(summary_fact: str, deposition_text: str, config, print_usage: bool) -> Dict:
+    """generate_structured_output arguments (minus the client) that check one summary fact against its citation."""
+    # The instruction block is identical for every citation, so it is kept as a prompt-cacheable prefix
+    prompt_prefix = """
             According to the following summary fact and its supporting deposition, follow this exact evaluation framework:
 
             STEP 1 - ACCURACY CHECK:
@@ -55,20 +52,55 @@ def process_single_citation(citation_entry, conversation, logger, bedrock_client
             Reason: [One sentence explanation why the deposition is not sufficient to support the summary fact.]
 
             Return results in this exact JSON format:
-            {{
+            {
             "accuracy": "YES/NO",
             "evidence_quote": "exact supporting/contradicting text from deposition",
             "coverage": "COVERED/NOT COVERED", 
             "missing_elements": ["element1", "element2"] or null,
             "sufficiency": "SUFFICIENT/INSUFFICIENT",
             "sufficiency_reason": "one sentence explanation"
-            }}
+            }
 
-            Summary Fact: "{summary_fact}\n"
+"""
+    prompt_suffix = f"""            Summary Fact: "{summary_fact}\n"
             Supporting Deposition: "{deposition_text}\n"
             """
+
+    tool_schema = {
+        "type": "object",
+        "properties": {
+            "accuracy": {"type":"string", "enum":["YES", "NO"]},
+            "evidence_quote": {"type":"string"},
+            "coverage": {"type": "string", "enum":["COVERED", "NOT COVERED"]},
+            "missing_elements": {"type":"string"},
+            "sufficiency": {"type":"string", "enum":["SUFFICIENT", "INSUFFICIENT"]},
+            "sufficiency_reason": {"type":"string"}
+
+        },
+        "required": ["accuracy", "evidence_quote", "coverage", "missing_elements", "sufficiency", "sufficiency_reason"]
+    }
+    return dict(
+        messages=build_cached_messages(prompt_prefix, prompt_suffix, config.model_path),
+        tool_schema=tool_schema,
+        tool_schema_name="citation_evaluation",
+        description="Evaluate summary citations",
+        model_id=config.model_path,
+        tier=STANDARD,
+        max_tokens=config.max_tokens,
+        print_usage=print_usage,
+        obj=CitationEvaluation
+    )
+
+
+def process_single_citation(citation_entry, conversation, logger, bedrock_client, config, print_usage, surrounding_text_before=None, surrounding_text_after =None):
+
+    if not citation_entry["is_cited"]:
+        return None
     
 
+
+    summary_fact, deposition_text = citation_entry["summary_fact"], citation_entry["text"]
+    deposition_text = prepend_A_speaker_name(conversation, deposition_text)
     prompt2 = f"""
             According to the following summary fact, supporting deposition, and surrounding text, evaluate using the following framework based on human criteria:
 
@@ -105,32 +137,27 @@ def process_single_citation(citation_entry, conversation, logger, bedrock_client
             Surrounding Text After (approx. one page after): "{surrounding_text_after}"
             """
 
-    # print(f"citation prompt: {prompt}")
-    tool_schema = {
-        "type": "object",
-        "properties": {
-            "accuracy": {"type":"string", "enum":["YES", "NO"]},
-            "evidence_quote": {"type":"string"},
-            "coverage": {"type": "string", "enum":["COVERED", "NOT COVERED"]},
-            "missing_elements": {"type":"string"},
-            "sufficiency": {"type":"string", "enum":["SUFFICIENT", "INSUFFICIENT"]},
-            "sufficiency_reason": {"type":"string"}
-
-        },
-        "required": ["accuracy", "evidence_quote", "coverage", "missing_elements", "sufficiency", "sufficiency_reason"]
-    }
     result = generate_structured_output(
         bedrock_client=bedrock_client,
-        messages=[{"role": "user", "content": [{"text": prompt}]}],
-        tool_schema=tool_schema,
-        tool_schema_name="citation_evaluation",
-        description="Evaluate summary citations",
-        model_id=config.model_path,
-        max_tokens=config.max_tokens,
-        print_usage=print_usage,
-        obj=CitationEvaluation
+        **build_citation_request(summary_fact, deposition_text, config, print_usage)
+    )
+    return _citation_result(summary_fact, deposition_text, result)
 
+
+async def aprocess_single_citation(citation_entry, conversation, bedrock_client, config, print_usage):
+    """Async counterpart of process_single_citation (through agenerate_structured_output)."""
+    if not citation_entry["is_cited"]:
+        return None
+    summary_fact = citation_entry["summary_fact"]
+    deposition_text = prepend_A_speaker_name(conversation, citation_entry["text"])
+    result = await agenerate_structured_output(
+        bedrock_client=bedrock_client,
+        **build_citation_request(summary_fact, deposition_text, config, print_usage)
     )
+    return _citation_result(summary_fact, deposition_text, result)
+
+
+def _citation_result(summary_fact: str, deposition_text: str, result) -> Dict:
     return{
     "summary_text": summary_fact,
     "deposition_text": deposition_text,
@@ -145,16 +172,11 @@ def process_single_citation(citation_entry, conversation, logger, bedrock_client
 
 
 
-def evaluate_citations(logger,
-                       bedrock_client,
-                       config,
-                       summary_path: str,
-                       conversation: Conversation,
-                       deposition_path: str,
-                       print_usage: bool,
-                       max_workers: int = 4
-                       ):
-
+def link_combined_citations(summary_path: str, deposition_path: str) -> List[Dict]:
+    """
+    Link the summary's citations to the deposition and combine them per summary fact
+    (one citation check each); runs locally.
+    """
     summary = Summary(summary_path=str(summary_path))
     deposition_processor = DepositionProcessor(deposition_path=str(deposition_path))
     linker = CitationLinker(summary, deposition_processor)
@@ -207,22 +229,57 @@ def evaluate_citations(logger,
             "page_range": f"{min(c['start_page'] for c in citations)}-{max(c['end_page'] or c['start_page'] for c in citations)}"
         }
         combined_citations.append(combined_entry)
-    
+    return combined_citations
+
+
+def evaluate_citations(logger,
+                       bedrock_client,
+                       config,
+                       summary_path: str,
+                       conversation: Conversation,
+                       deposition_path: str,
+                       print_usage: bool,
+                       max_workers: Optional[int] = None
+                       ):
+
+    combined_citations = link_combined_citations(summary_path, deposition_path)
     output = []
 
-    # Process citations sequentially to avoid rate limiting
-    import time
-    for i, citation_entry in enumerate(combined_citations):
-        logger.info(f"Evaluating citation {i+1}/{len(combined_citations)}")
-        result = process_single_citation(citation_entry, conversation, logger, bedrock_client, config, print_usage)
-        if result:
-            output.append(result)
-            logger.debug(f"Completed citation evaluation: {result['summary_text'][:50]}... (combined {result.get('citation_count', 1)} citations)")
-        if i < len(combined_citations) - 1:  # Don't delay after the last citation
-            time.sleep(2)  # Small delay between citation evaluations
+    # Process citations in parallel; the shared rate limiter in the adapter keeps us under quota
+    logger.info(f"Evaluating {len(combined_citations)} citations")
+    with ContextThreadPoolExecutor(max_workers=max_workers or config.llm_max_concurrency) as executor:
+        results = executor.map(
+            lambda citation_entry: process_single_citation(citation_entry, conversation, logger, bedrock_client, config, print_usage),
+            combined_citations
+        )
+        for result in results:
+            if result:
+                output.append(result)
+                logger.debug(f"Completed citation evaluation: {result['summary_text'][:50]}... (combined {result.get('citation_count', 1)} citations)")
     
     return output
 
+
+async def aevaluate_citations(logger,
+                              bedrock_client,
+                              config,
+                              summary_path: str,
+                              conversation: Conversation,
+                              deposition_path: str,
+                              print_usage: bool
+                              ):
+    """
+    Async counterpart of evaluate_citations. Linking runs in a worker thread; every citation
+    check goes through agenerate_structured_output and shares its semaphore and executor.
+    """
+    combined_citations = await asyncio.to_thread(link_combined_citations, summary_path, deposition_path)
+    logger.info(f"Evaluating {len(combined_citations)} citations")
+    results = await asyncio.gather(*(
+        aprocess_single_citation(citation_entry, conversation, bedrock_client, config, print_usage)
+        for citation_entry in combined_citations
+    ))
+    return [result for result in results if result]
+
     
 
 
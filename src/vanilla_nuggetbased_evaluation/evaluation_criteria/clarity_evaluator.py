@@ -2,6 +2,7 @@ import re
 from typing import Dict, List
 
 from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import generate_structured_output
+from transcript_analysis.qa_fact_generation.utils.model_cascade import STANDARD
 from vanilla_nuggetbased_evaluation.evaluation_pymodels import ClarityEvaluation, ConsolidatedNuggetItem
 
 
@@ -68,6 +69,7 @@ def evaluate_clarity(
         tool_schema_name="clarity_evaluation",
         description="Evaluate terminology clarity",
         model_id=config.model_path,
+        tier=STANDARD,
         max_tokens=config.max_tokens,
         print_usage=print_usage,
         obj=ClarityEvaluation
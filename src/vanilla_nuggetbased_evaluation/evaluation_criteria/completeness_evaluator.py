@@ -1,36 +1,51 @@
-from typing import Dict, Optional
+import asyncio
+from typing import Dict, List, Optional, Tuple
 import botocore
-from concurrent.futures import ThreadPoolExecutor
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import generate_structured_output
-from vanilla_nuggetbased_evaluation.evaluation_pymodels import CompletenessEvaluation
+from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import agenerate_structured_output, build_cached_messages, generate_structured_output
+from transcript_analysis.qa_fact_generation.utils.context_executor import ContextThreadPoolExecutor
+from transcript_analysis.qa_fact_generation.utils.model_cascade import STANDARD
+from transcript_analysis.qa_fact_generation.utils.token_manager import TokenManager
+from vanilla_nuggetbased_evaluation.evaluation_pymodels import BatchCompletenessEvaluation, CompletenessEvaluation
 
-def evaluate_completeness(
-        logger,
-        truncate_nuggets_for_prompt,
-        bedrock_client,
-        config,
-        nugget_data,
-        summary: str,
-        print_usage: bool,
-        top_n_nuggets: Optional[int],
-        mode: str,
-        max_threads: int = 4 
-) -> Dict:
-    """
-    Evaluate if the top N most important nuggets are present in the summary, including partial mentions.
-    Uses threading to parallelize nugget evaluations.
-    """
-    @retry(
-        stop=stop_after_attempt(2),
-        wait=wait_exponential(multiplier=1, min=2, max=30),
-        retry=retry_if_exception_type((botocore.exceptions.ReadTimeoutError,)),
-    )
-    def check_nugget_presence(nugget_text: str) -> tuple[float, str]:
-        prompt_template = """Evaluate whether the NUGGET is covered in the summary, regardless of where or how it appears.
+# Rough output budget per nugget in a batched call (id, score and a concise explanation)
+OUTPUT_TOKENS_PER_NUGGET = 150
+# Single and batched presence calls score nuggets of the same summary, so they share one tier
+PRESENCE_TIER = STANDARD
 
-                           NUGGET:
-                           {nugget}
+# Instructions + summary are shared by every batch, so they form the (prompt-cacheable) prefix
+BATCH_PROMPT_PREFIX = """Evaluate, for EACH nugget listed at the end, whether it is covered in the summary, regardless of where or how it appears.
+
+                           SUMMARY:
+                           {summary}
+
+                           SCORING (per nugget):
+                           - **2**: The nugget's core legal facts are substantively covered in the summary (dollar amounts, key parties, essential obligations/outcomes), allowing the legal point to be understood even if expressed differently or requiring simple inference.
+                           - **1**: The nugget's subject matter is addressed but lacks specific critical details (exact amounts, key qualifiers like "additional," precise characterizations) that could affect legal interpretation or case strategy.
+                           - **0**: The nugget's core subject matter or key parties are not mentioned, making it impossible to determine the legal fact occurred.
+
+                           EVALUATION FOCUS:
+                           - Assess whether the summary preserves the nugget's legal significance (e.g., impact on damages, liability, or case narrative)
+                           - Consider factual accuracy and completeness of key details (dollar amounts, admissions, proper names, contractual obligations, dates, or percentages)
+                           - Minor rewording is acceptable if the substance remains intact
+                           - Score every nugget independently; do not let one nugget's score influence another
+
+                           Respond with one entry in "results" per nugget, using the exact nugget_id shown in brackets:
+                           - "nugget_id": the id of the nugget
+                           - "presence_score": 0 | 1 | 2
+                           - "explanation": 
+                               - If score = 0: "Missing [X] could impact case by [specific legal consequence]"
+                               - If score = 1: "Missing [this exact information] in '[this exact part(s) of summary]' could impact case by [specific legal consequence]"
+                               - If score = 2: "Core legal point sufficiently captured as stated in [these sentences of the summary]."  
+                           Keep each explanation concise.
+                           - Remember a nugget's information may be spread across multiple sentences in the summary - check the entire summary, not individual sentences
+                           """
+BATCH_PROMPT_SUFFIX = """
+                           NUGGETS (one per line, as [nugget_id] text):
+                           {nuggets}
+                           """
+
+# Single-nugget prompt: instructions + summary are identical for every nugget (prompt-cacheable prefix)
+PRESENCE_PROMPT_PREFIX = """Evaluate whether the NUGGET (given at the end) is covered in the summary, regardless of where or how it appears.
 
                            SUMMARY:
                            {summary}
@@ -54,86 +69,174 @@ def evaluate_completeness(
                            Keep the explanation concise.
                            - Remember the nugget's information may be spread across multiple sentences in the summary - check the entire summary, not individual sentences
                            """
-        
-        
-        # Truncate nuggets if prompt would be too long
-        prompt = prompt_template.format(nugget=nugget_text, summary=summary)
-        truncated_nuggets, was_truncated = truncate_nuggets_for_prompt(
-            [nugget_text], summary, prompt_template
-        )
+PRESENCE_PROMPT_SUFFIX = """
+                           NUGGET:
+                           {nugget}
+                           """
 
-        if not was_truncated:
-            # caching should happen
-            pass
+PRESENCE_SCORE_SCHEMA = {
+    "type": "integer",
+    "enum": [0, 1, 2],
+    "description": "Nugget presence: 0 = not mentioned, 1 = partial, 2 = full"
+}
+PRESENCE_EXPLANATION_SCHEMA = {
+    "type": "string",
+    "description": "What necessary key point is missing in the summary"
+}
 
-        
-        if was_truncated:
-            logger.warning(f"Nugget truncated for evaluation: {nugget_text}...")
-        
-        # Use the first (and likely only) truncated nugget
-        prompt = prompt_template.format(nugget=truncated_nuggets[0] if truncated_nuggets else nugget_text, summary=summary)
-        result = generate_structured_output(
-            bedrock_client=bedrock_client,
-            messages=[{"role": "user", "content": [{"text": prompt}]}],
-            tool_schema={
-                "type": "object",
-                "properties": {
-                    "presence_score": {
-                        "type": "integer",
-                        "enum": [0, 1, 2],
-                        "description": "Nugget presence: 0 = not mentioned, 1 = partial, 2 = full"
+
+def build_presence_request(logger, truncate_nuggets_for_prompt, config, summary: str, nugget_text: str,
+                           print_usage: bool) -> Dict:
+    """generate_structured_output arguments (minus the client) that score one nugget."""
+    # Truncate nuggets if prompt would be too long
+    truncated_nuggets, was_truncated = truncate_nuggets_for_prompt(
+        [nugget_text], summary, PRESENCE_PROMPT_PREFIX + PRESENCE_PROMPT_SUFFIX
+    )
+    if was_truncated:
+        logger.warning(f"Nugget truncated for evaluation: {nugget_text}...")
+
+    # Use the first (and likely only) truncated nugget
+    return dict(
+        messages=build_cached_messages(
+            PRESENCE_PROMPT_PREFIX.format(summary=summary),
+            PRESENCE_PROMPT_SUFFIX.format(nugget=truncated_nuggets[0] if truncated_nuggets else nugget_text),
+            config.model_path
+        ),
+        tool_schema={
+            "type": "object",
+            "properties": {
+                "presence_score": PRESENCE_SCORE_SCHEMA,
+                "explanation": PRESENCE_EXPLANATION_SCHEMA
+            },
+            "required": ["presence_score", "explanation"]
+        },
+        tool_schema_name="nugget_presence",
+        description="Check if nugget is present in summary",
+        model_id=config.model_path,
+        tier=PRESENCE_TIER,
+        max_tokens=config.max_tokens,
+        print_usage=print_usage,
+        obj=CompletenessEvaluation
+    )
+
+
+def build_batch_presence_request(config, summary: str, batch: List[Tuple[str, str]], print_usage: bool) -> Dict:
+    """generate_structured_output arguments (minus the client) that score several (nugget_id, nugget_text) pairs."""
+    nugget_lines = "\n".join(f"[{nugget_id}] {text}" for nugget_id, text in batch)
+    return dict(
+        messages=build_cached_messages(
+            BATCH_PROMPT_PREFIX.format(summary=summary),
+            BATCH_PROMPT_SUFFIX.format(nuggets=nugget_lines),
+            config.model_path
+        ),
+        tool_schema={
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "nugget_id": {
+                                "type": "string",
+                                "enum": [nugget_id for nugget_id, _ in batch],
+                                "description": "The bracketed id of the nugget being scored"
+                            },
+                            "presence_score": PRESENCE_SCORE_SCHEMA,
+                            "explanation": PRESENCE_EXPLANATION_SCHEMA
+                        },
+                        "required": ["nugget_id", "presence_score", "explanation"]
                     },
-                    "explanation": {
-                        "type": "string",
-                        "description": "What necessary key point is missing in the summary"
-                    }
-                },
-                "required": ["presence_score", "explanation"]
+                    "minItems": len(batch),
+                    "maxItems": len(batch)
+                }
             },
-            tool_schema_name="nugget_presence",
-            description="Check if nugget is present in summary",
-            model_id=config.model_path,
-            max_tokens=config.max_tokens,
-            print_usage=print_usage,
-            obj=CompletenessEvaluation
-        )
-        
-        return result["presence_score"], result["explanation"]
+            "required": ["results"]
+        },
+        tool_schema_name="nugget_presence_batch",
+        description="Check which nuggets are present in summary",
+        model_id=config.model_path,
+        tier=PRESENCE_TIER,
+        max_tokens=config.max_tokens,
+        print_usage=print_usage,
+        obj=BatchCompletenessEvaluation
+    )
 
-    
-    nuggets = nugget_data.values()
-    # Evaluate presence of each nugget using ThreadPoolExecutor
+
+def plan_presence_batches(config, nuggets: List[Dict], summary: str, token_manager: Optional[TokenManager],
+                          max_batch_size: Optional[int] = None) -> List[List[int]]:
+    """
+    Group nugget indices into presence calls: one nugget per call without a token_manager, otherwise
+    batches bounded by the prompt budget, the output token limit and max_batch_size.
+    """
+    if token_manager is None:
+        return [[i] for i in range(len(nuggets))]
+    max_batch_size = max_batch_size or config.completeness_batch_size
+    max_items = max(1, min(max_batch_size, config.max_tokens // OUTPUT_TOKENS_PER_NUGGET))
+    base_prompt = BATCH_PROMPT_PREFIX.format(summary=summary) + BATCH_PROMPT_SUFFIX.format(nuggets="")
+    # The summary is shared by the whole batch, so a long summary should not shrink batches to one nugget
+    available_tokens = max(
+        token_manager.calculate_available_tokens(base_prompt),
+        token_manager.max_prompt_tokens // 4
+    )
+    return token_manager.pack_into_batches(
+        [nugget["nugget_text"] for nugget in nuggets], available_tokens, max_items
+    )
+
+
+def completeness_batch_requests(logger, truncate_nuggets_for_prompt, config, nugget_data, summary: str,
+                                print_usage: bool, token_manager: Optional[TokenManager] = None,
+                                max_batch_size: Optional[int] = None) -> List[Dict]:
+    """The presence calls evaluate_completeness makes first (before any fallback), for run_batch."""
+    nuggets = list(nugget_data.values())
+    nugget_ids = list(nugget_data.keys())
+    requests = []
+    for indices in plan_presence_batches(config, nuggets, summary, token_manager, max_batch_size):
+        if len(indices) == 1:
+            requests.append(build_presence_request(
+                logger, truncate_nuggets_for_prompt, config, summary, nuggets[indices[0]]["nugget_text"], print_usage
+            ))
+        else:
+            requests.append(build_batch_presence_request(
+                config, summary, [(nugget_ids[i], nuggets[i]["nugget_text"]) for i in indices], print_usage
+            ))
+    return requests
+
+
+def _nugget_result(nugget: Dict[str, any], presence_score: int, explanation: str) -> tuple:
+    presence_status = "fully present" if presence_score == 2 else "partially mentioned" if presence_score == 1 else "missing"
+    # Update nugget dictionary with evaluation results
+    updated_nugget = nugget.copy()  # Avoid modifying original
+    updated_nugget.update({
+        "presence_score": presence_score,
+        "explanation": explanation,
+        "presence_status": presence_status
+    })
+    return updated_nugget, presence_score, explanation, presence_status
+
+
+def _failed_nugget_result(logger, nugget: Dict[str, any], e: Exception) -> tuple:
+    logger.error(f"Failed to evaluate nugget: {nugget}... - {str(e)}")
+    return nugget, 0, f"Evaluation failed: {str(e)}", "missing"
+
+
+def _batch_results(logger, nuggets: List[Dict], nugget_ids: List[str], indices: List[int],
+                   scored: Dict[str, Tuple[int, str]]) -> Tuple[List, List[int]]:
+    """Results of the nuggets a batch scored, and the indices it left unscored (to score individually)."""
+    results, unscored = [], []
+    for i in indices:
+        if nugget_ids[i] in scored:
+            results.append((i, _nugget_result(nuggets[i], *scored[nugget_ids[i]])))
+        else:
+            if scored:
+                logger.warning(f"Batch response missing nugget {nugget_ids[i]}; scoring it individually")
+            unscored.append(i)
+    return results, unscored
+
+
+def _completeness_result(results: List[tuple], nuggets: List[Dict], mode: str) -> Dict:
     total_score = 0.0
     explanations = []
-    
-    def process_nugget(nugget: Dict[str,any]) -> tuple[str, float, str]:
-        """Helper function to process a single nugget and handle exceptions."""
-        try:
-            presence_score, explanation = check_nugget_presence(nugget["nugget_text"])
-            presence_status = "fully present" if presence_score == 2 else "partially mentioned" if presence_score == 1 else "missing"
-            # Update nugget dictionary with evaluation results
-            updated_nugget = nugget.copy()  # Avoid modifying original
-            updated_nugget.update({
-                "presence_score": presence_score,
-                "explanation": explanation,
-                "presence_status": presence_status
-            })
-            return updated_nugget, presence_score, explanation, presence_status
-            # return nugget, presence_score, explanation, presence_status
-        except Exception as e:
-            logger.error(f"Failed to evaluate nugget: {nugget}... - {str(e)}")
-            return nugget, 0, f"Evaluation failed: {str(e)}", "missing"
-
-    # Process nuggets sequentially to avoid rate limiting
-    import time
-    results = []
-    for i, nugget in enumerate(nuggets):
-        logger.info(f"Evaluating nugget {i+1}/{len(nuggets)}")
-        result = process_nugget(nugget)
-        results.append(result)
-        if i < len(nuggets) - 1:  # Don't delay after the last nugget
-            time.sleep(2)  # Small delay between nugget evaluations
-    
     # Process results in order
     for nugget, presence_score, explanation, presence_status in results:
         print(nugget)
@@ -152,4 +255,132 @@ def evaluate_completeness(
         "score": score,
         "explanation": f"Completeness score based on total presence score {total_score:.1f}/{(len(nuggets)*2)} for {len(nuggets)} top nuggets in {mode} mode",
         "details": explanations
-    }
\ No newline at end of file
+    }
+
+
+def evaluate_completeness(
+        logger,
+        truncate_nuggets_for_prompt,
+        bedrock_client,
+        config,
+        nugget_data,
+        summary: str,
+        print_usage: bool,
+        top_n_nuggets: Optional[int],
+        mode: str,
+        max_threads: Optional[int] = None,
+        token_manager: Optional[TokenManager] = None,
+        max_batch_size: Optional[int] = None
+) -> Dict:
+    """
+    Evaluate if the top N most important nuggets are present in the summary, including partial mentions.
+    Uses threading to parallelize nugget evaluations; pacing is left to the adapter's rate limiter.
+
+    When a token_manager is given, nuggets are scored in batches that share one copy of the
+    summary; batch size is bounded by the token manager's prompt budget, the output token limit
+    and max_batch_size (defaults to config.completeness_batch_size). Nuggets a batch fails to
+    score are re-scored individually.
+    """
+    def check_nugget_presence(nugget_text: str) -> tuple[float, str]:
+        result = generate_structured_output(
+            bedrock_client=bedrock_client,
+            **build_presence_request(logger, truncate_nuggets_for_prompt, config, summary, nugget_text, print_usage)
+        )
+        return result["presence_score"], result["explanation"]
+
+    def check_batch_presence(batch: List[Tuple[str, str]]) -> Dict[str, Tuple[int, str]]:
+        """Score several (nugget_id, nugget_text) pairs against one copy of the summary."""
+        result = generate_structured_output(
+            bedrock_client=bedrock_client,
+            **build_batch_presence_request(config, summary, batch, print_usage)
+        )
+        return {item.nugget_id: (item.presence_score, item.explanation) for item in result.results}
+
+    nuggets = list(nugget_data.values())
+    nugget_ids = list(nugget_data.keys())
+
+    def process_nugget(nugget: Dict[str,any]) -> tuple[str, float, str]:
+        """Helper function to process a single nugget and handle exceptions."""
+        try:
+            presence_score, explanation = check_nugget_presence(nugget["nugget_text"])
+            return _nugget_result(nugget, presence_score, explanation)
+        except Exception as e:
+            return _failed_nugget_result(logger, nugget, e)
+
+    def process_batch(indices: List[int]) -> List[tuple]:
+        """Score a batch of nuggets in one call, falling back to single calls for anything unscored."""
+        if len(indices) == 1:
+            return [process_nugget(nuggets[indices[0]])]
+        try:
+            scored = check_batch_presence([(nugget_ids[i], nuggets[i]["nugget_text"]) for i in indices])
+        except Exception as e:
+            logger.warning(f"Batched completeness call failed ({e}); scoring {len(indices)} nuggets individually")
+            scored = {}
+        results, unscored = _batch_results(logger, nuggets, nugget_ids, indices, scored)
+        results += [(i, process_nugget(nuggets[i])) for i in unscored]
+        return [result for _, result in sorted(results, key=lambda item: item[0])]
+
+    batches = plan_presence_batches(config, nuggets, summary, token_manager, max_batch_size)
+
+    # Process batches in parallel; the shared rate limiter in the adapter keeps us under quota
+    logger.info(f"Evaluating {len(nuggets)} nuggets in {len(batches)} calls")
+    with ContextThreadPoolExecutor(max_workers=max_threads or config.llm_max_concurrency) as executor:
+        results = [result for batch_results in executor.map(process_batch, batches) for result in batch_results]
+    return _completeness_result(results, nuggets, mode)
+
+
+async def aevaluate_completeness(
+        logger,
+        truncate_nuggets_for_prompt,
+        bedrock_client,
+        config,
+        nugget_data,
+        summary: str,
+        print_usage: bool,
+        top_n_nuggets: Optional[int],
+        mode: str,
+        token_manager: Optional[TokenManager] = None,
+        max_batch_size: Optional[int] = None
+) -> Dict:
+    """
+    Async counterpart of evaluate_completeness.
+
+    Every presence call goes through agenerate_structured_output, so the calls share its
+    semaphore and executor instead of a thread pool per evaluation.
+    """
+    nuggets = list(nugget_data.values())
+    nugget_ids = list(nugget_data.keys())
+
+    async def process_nugget(nugget: Dict[str, any]) -> tuple:
+        try:
+            result = await agenerate_structured_output(
+                bedrock_client=bedrock_client,
+                **build_presence_request(logger, truncate_nuggets_for_prompt, config, summary, nugget["nugget_text"], print_usage)
+            )
+            return _nugget_result(nugget, result["presence_score"], result["explanation"])
+        except Exception as e:
+            return _failed_nugget_result(logger, nugget, e)
+
+    async def process_batch(indices: List[int]) -> List[tuple]:
+        if len(indices) == 1:
+            return [await process_nugget(nuggets[indices[0]])]
+        try:
+            result = await agenerate_structured_output(
+                bedrock_client=bedrock_client,
+                **build_batch_presence_request(
+                    config, summary, [(nugget_ids[i], nuggets[i]["nugget_text"]) for i in indices], print_usage
+                )
+            )
+            scored = {item.nugget_id: (item.presence_score, item.explanation) for item in result.results}
+        except Exception as e:
+            logger.warning(f"Batched completeness call failed ({e}); scoring {len(indices)} nuggets individually")
+            scored = {}
+        results, unscored = _batch_results(logger, nuggets, nugget_ids, indices, scored)
+        retried = await asyncio.gather(*(process_nugget(nuggets[i]) for i in unscored))
+        results += zip(unscored, retried)
+        return [result for _, result in sorted(results, key=lambda item: item[0])]
+
+    batches = plan_presence_batches(config, nuggets, summary, token_manager, max_batch_size)
+    logger.info(f"Evaluating {len(nuggets)} nuggets in {len(batches)} calls")
+    batch_results = await asyncio.gather(*(process_batch(indices) for indices in batches))
+    return _completeness_result([result for results in batch_results for result in results], nuggets, mode)
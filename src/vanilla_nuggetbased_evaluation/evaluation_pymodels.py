@@ -172,6 +172,24 @@ class CompletenessEvaluation(BaseModel):
             return getattr(self, key)
 
 
+class NuggetPresenceItem(BaseModel):
+    nugget_id: str
+    presence_score: int = Field(..., enum=[0, 1, 2], description="A score for a supper nugget presence")
+    explanation: str = Field(..., description="Explanation of what is missing")
+
+    @validator("presence_score")
+    def score_must_be_valid(cls, v):
+        if v not in (0, 1, 2):
+            raise ValueError("Score must be 0, 1, or 2")
+        return v
+
+
+class BatchCompletenessEvaluation(BaseModel):
+    results: List[NuggetPresenceItem]
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
 
 class AccuracyEvaluation(BaseModel):
     has_inaccuracy: bool
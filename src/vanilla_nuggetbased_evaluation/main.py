@@ -6,7 +6,9 @@ from typing import Dict, List
 
 from src.vanilla_nuggetbased_evaluation.predefined_nuggetbased_evaluation import EnhancedSummaryEvaluator, evaluate_summary_with_criteria
 from .nugget_evaluator import NuggetEvaluator
+from transcript_analysis.models.TokenTracker import token_tracker
 import argparse
+from config import CONFIG
 
 logger = logging.getLogger(__name__)
 
@@ -22,13 +24,22 @@ def main():
     parser.add_argument("--print-usage", action="store_true", help = " flag to print each single api call usage/cost")
     parser.add_argument("-o", "--output", type=str, required=True, help="path to store evaluation results (.json)")
     parser.add_argument("--mode", type = str, default = "consolidated", help = "mode for completeness checking can be consolidated or mapping")
+    parser.add_argument("--no-cache", action="store_true", help = "bypass the on-disk Bedrock response cache")
+    parser.add_argument("--total-usage", action="store_true", help = "logs the total and per-stage usage summary")
+    parser.add_argument("--metrics-output", type=str, default=None, help = ".json path to export per-stage latency/token metrics")
+    parser.add_argument("--plan", action="store_true", help = "only predict LLM calls, tokens, cost and wall time (no Bedrock calls)")
     
 
     args = parser.parse_args()
+    if args.no_cache:
+        CONFIG.response_cache_enabled = False
 
     deposition_file_path, nuggets_file, summary_path, print_usage, output_path, mode =args.deposition, args.nuggets, args.summary, args.print_usage,  args.output, args.mode
 
     evaluator = EnhancedSummaryEvaluator()
+    if args.plan:
+        evaluator.plan(deposition_file_path, nuggets_file, summary_path, mode=mode).summary()
+        return
     
     # Run evaluation -- output a dictionary (json format)
     results = evaluator.evaluate_summary(
@@ -41,6 +52,9 @@ def main():
     )
     
     print(results)
+    token_tracker.summary() if args.total_usage else None
+    if args.metrics_output:
+        token_tracker.export_json(args.metrics_output)
     
     
     
@@ -1,5 +1,6 @@
 import json
 import logging
+import os
 from typing import Dict, List
 
 import botocore
@@ -14,13 +15,16 @@ from src.vanilla_nuggetbased_evaluation.evaluation_pymodels import (
     NuggetCoverageItem,
 
 )
-from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import generate_structured_output
+from transcript_analysis.qa_fact_generation.utils.bedrock_adapter import build_cached_messages, generate_structured_output
+from transcript_analysis.qa_fact_generation.utils.context_executor import ContextThreadPoolExecutor
+from transcript_analysis.qa_fact_generation.utils.model_cascade import STANDARD
+from transcript_analysis.qa_fact_generation.utils.retry_policy import get_retry_policy
+from transcript_analysis.qa_fact_generation.utils.run_ledger import get_run_ledger
 from .data_loader import NuggetLoader
 from .evaluation_schemas import EvaluationSchemas
 from llm_conv_segmentation.main import initialize_bedrock_model
 from config import CONFIG
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from concurrent.futures import as_completed
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +45,9 @@ class NuggetEvaluator:
         max_workers: int = 4 
     ) -> Dict:
         self.logger.info("Starting nugget evaluation")
+        get_retry_policy(self.config).start_run()
+        if self.config.run_ledger_enabled:
+            get_run_ledger(self.config).start_run("nugget_evaluation", summary=os.path.basename(summary_path))
 
         summary = "\n".join(read_transcript_file(summary_path))
         nugget_data = self.nugget_loader.load_nuggets(nuggets_file)
@@ -80,26 +87,22 @@ class NuggetEvaluator:
     ) -> NuggetCoverage:
         self.logger.info("Evaluating Consolidated Nugget Coverage (CTC)")
         
-        @retry(
-            stop=stop_after_attempt(5),
-            wait=wait_exponential(multiplier=1, min=4, max=60),
-            retry=retry_if_exception_type((botocore.exceptions.ReadTimeoutError,)),
-            reraise=True
-        )
         def evaluate_single_nugget(index: int, consolidated_nugget: str, consolidated_id: str) -> NuggetCoverageItem:
-            prompt = (
-                "Evaluate whether the consolidated nugget is covered in the summary. "
+            # Instructions + summary are the same for every nugget and go first so they can be prompt-cached
+            prompt_prefix = (
+                "Evaluate whether the consolidated nugget (given after the summary) is covered in the summary. "
                 "Return a JSON object with:\n"
                 "  - \"text\": the nugget text,\n"
                 "  - \"present\": 1 if the summary covers it, otherwise 0,\n"
                 "  - \"explanation\": a short explanation of the score.\n"
                 "Return only a JSON array of such objects. Do not include any extra text.\n\n"
-                f"***NUGGETS***:\n{json.dumps(consolidated_nugget, indent=2)}\n\n***SUMMARY***:\n{summary}"
+                f"***SUMMARY***:\n{summary}\n\n"
             )
+            prompt_suffix = f"***NUGGETS***:\n{json.dumps(consolidated_nugget, indent=2)}"
 
-            messages = [{"role": "user", "content": [{"text": prompt}]}]
+            messages = build_cached_messages(prompt_prefix, prompt_suffix, self.config.model_path)
 
-            self.logger.info(f"Evaluating CTC nugget {index+1}/{len(consolidated_nuggets)}, size: {len(json.dumps(prompt))} characters")
+            self.logger.info(f"Evaluating CTC nugget {index+1}/{len(consolidated_nuggets)}, size: {len(prompt_prefix) + len(prompt_suffix)} characters")
             nci = generate_structured_output(
                 bedrock_client=self.bedrock_client,
                 messages=messages,
@@ -107,6 +110,7 @@ class NuggetEvaluator:
                 tool_schema_name="nugget_coverage",
                 description="Binary check of consolidated nugget coverage.",
                 model_id=self.config.model_path,
+                tier=STANDARD,
                 max_tokens=self.config.max_tokens,
                 print_usage=print_usage,
                 obj=NuggetCoverageItem
@@ -118,7 +122,7 @@ class NuggetEvaluator:
         formatted_consolidated_nuggets = [(i, c_nugget.text, c_nugget.consolidated_id) for i, c_nugget in enumerate(consolidated_nuggets)]
         c_nuggets = []
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_nugget = {
                 executor.submit(evaluate_single_nugget, i, nugget_text, consolidated_id): (i, nugget_text)
                 for i, nugget_text, consolidated_id in formatted_consolidated_nuggets
@@ -143,17 +147,12 @@ class NuggetEvaluator:
     ) -> DetailCoverage:
         self.logger.info("Evaluating Fine-Grained Detail Coverage (FDC)")
         
-        @retry(
-            stop=stop_after_attempt(5),
-            wait=wait_exponential(multiplier=1, min=4, max=60),
-            retry=retry_if_exception_type((botocore.exceptions.ReadTimeoutError,)),
-            reraise=True
-        )
         def evaluate_mapping_chunk(consolidated_id: str, original_nuggets: List[Dict[str, str]]) -> DetailCoverage:
             print(type(original_nuggets))
             nugget_texts = [n.text for n in original_nuggets]
-            prompt = (
-                f"For each original nugget, assess whether it is covered in the provided summary. "
+            # Instructions + summary are the same for every mapping chunk and go first so they can be prompt-cached
+            prompt_prefix = (
+                f"For each original nugget (listed after the summary), assess whether it is covered in the provided summary. "
                 f"Score: 2 = fully covered, 1 = partially mentioned, 0 = absent. "
                 f"Return a JSON object matching this schema:\n"
                 "{\n"
@@ -161,31 +160,27 @@ class NuggetEvaluator:
                 "  'score': the coverage score (integer; 0, 1, or 2)\n"
                 "  'explanation': a short explanation of the score\n"
                 "}\n"
-                f"\n\nORIGINAL NUGGETS:\n{json.dumps(nugget_texts, indent=2)}\n\nSUMMARY:\n{summary}"
+                f"\n\nSUMMARY:\n{summary}\n\n"
             )
+            prompt_suffix = f"ORIGINAL NUGGETS:\n{json.dumps(nugget_texts, indent=2)}"
 
 
-            self.logger.info(f"Evaluating FDC for consolidated ID {consolidated_id}, size: {len(json.dumps(prompt))} characters")
+            self.logger.info(f"Evaluating FDC for consolidated ID {consolidated_id}, size: {len(prompt_prefix) + len(prompt_suffix)} characters")
             result = generate_structured_output(
                 bedrock_client=self.bedrock_client,
-                messages=[{"role": "user", "content": [{"text": prompt}]}],
+                messages=build_cached_messages(prompt_prefix, prompt_suffix, self.config.model_path),
                 tool_schema=self.schemas.get_detail_coverage_schema(),
                 tool_schema_name="detail_coverage",
-                description=f"Evaluate fine-grained nugget presence for consolidated ID {consolidated_id}.",
+                # Kept constant across calls: tool definitions are part of the cached prompt prefix
+                description="Evaluate fine-grained nugget presence for the original nuggets of one consolidated nugget.",
                 model_id=self.config.model_path,
+                tier=STANDARD,
                 max_tokens=self.config.max_tokens,
                 print_usage=print_usage,
                 obj=DetailCoverage
             )
 
-            if isinstance(result.nuggets, str):
-                try:
-                    result.nuggets = json.loads(result.nuggets)
-                    result.nuggets = [DetailCoverageItem(**nugget) for nugget in result.nuggets]
-                except json.JSONDecodeError as e:
-                    self.logger.error(f"Failed to parse nuggets JSON for consolidated ID {consolidated_id}: {result.nuggets}")
-                    raise ValueError(f"Invalid JSON in nuggets: {str(e)}")
-
+            # Stringified or truncated nugget lists are repaired in generate_structured_output
             for i, nugget in enumerate(result.nuggets):
                 nugget.nugget_id = original_nuggets[i].nugget_id
                 nugget.consolidated_id = consolidated_id
@@ -194,7 +189,7 @@ class NuggetEvaluator:
             return result
 
         all_nuggets = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_mapping = {
                 executor.submit(evaluate_mapping_chunk, consolidated_id, original_nuggets): consolidated_id
                 for consolidated_id, original_nuggets in mapping.items()
@@ -1,6 +1,7 @@
 # Standard Library Imports
+import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import os
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -10,18 +11,29 @@ from llm_conv_segmentation.main import initialize_bedrock_model
 
 # Project-Specific Imports
 from transcript_analysis.qa_fact_generation.utils.file_utils import read_transcript_file
+from transcript_analysis.qa_fact_generation.utils.parse_cache import get_parsed_transcript
+from transcript_analysis.qa_fact_generation.utils.context_executor import ContextThreadPoolExecutor
+from transcript_analysis.qa_fact_generation.utils.retry_policy import get_retry_policy
+from transcript_analysis.qa_fact_generation.utils.llm import build_speaker_request
+from transcript_analysis.qa_fact_generation.utils.run_ledger import get_run_ledger
+from transcript_analysis.qa_fact_generation.utils.run_planner import RunPlan, RunPlanner
 from transcript_analysis.qa_fact_generation.utils.token_manager import TokenManager
 from vanilla_nuggetbased_evaluation.evaluation_pymodels import ConsolidatedNuggetItem
 from vanilla_nuggetbased_evaluation.evaluation_criteria.accuracy_evaluator import evaluate_accuracy
 from vanilla_nuggetbased_evaluation.evaluation_criteria.clarity_evaluator import evaluate_clarity
-from vanilla_nuggetbased_evaluation.evaluation_criteria.completeness_evaluator import evaluate_completeness
-from vanilla_nuggetbased_evaluation.evaluation_criteria.structure_evaluator import evaluate_structure
+from vanilla_nuggetbased_evaluation.evaluation_criteria.completeness_evaluator import OUTPUT_TOKENS_PER_NUGGET, aevaluate_completeness, completeness_batch_requests, evaluate_completeness
+from vanilla_nuggetbased_evaluation.evaluation_criteria.structure_evaluator import aevaluate_structure, build_structure_request, evaluate_structure
 from vanilla_nuggetbased_evaluation.utils.reporting import save_evaluation_results
 from vanilla_nuggetbased_evaluation.data_loader import NuggetLoader
 from vanilla_nuggetbased_evaluation.evaluation_schemas import EvaluationSchemas
 from transcript_analysis.models.pymodels import Conversation
-from transcript_analysis.qa_fact_generation.utils.QA_extractor import QAExtractor
-from vanilla_nuggetbased_evaluation.evaluation_criteria.citation_evaluator import calculate_citation_score, evaluate_citations
+from vanilla_nuggetbased_evaluation.evaluation_criteria.citation_evaluator import aevaluate_citations, build_citation_request, calculate_citation_score, evaluate_citations, link_combined_citations, prepend_A_speaker_name
+
+# Stands in for each nugget when planning an evaluation before the nuggets exist (~40 tokens, a typical nugget)
+PLACEHOLDER_NUGGET_TEXT = (
+    "The witness testified that the invoice dated March 14, 2019 for $12,500 was forwarded to "
+    "Mr. Smith in accounting, who confirmed the payment had already been approved."
+)
 
 
 def collect_evaluation_results(
@@ -76,7 +88,7 @@ class EnhancedSummaryEvaluator:
     """
 
     def __init__(self, max_prompt_tokens: int = 4000):
-        self.bedrock_client = initialize_bedrock_model(CONFIG)
+        self._bedrock_client = None
         self.config = CONFIG
         self.logger = logging.getLogger(__name__)
         self.nugget_loader = NuggetLoader()
@@ -84,6 +96,13 @@ class EnhancedSummaryEvaluator:
         self.max_prompt_tokens = max_prompt_tokens
         self.token_manager = TokenManager()
 
+    @property
+    def bedrock_client(self):
+        """Created on first use, so planning an evaluation needs no AWS credentials."""
+        if self._bedrock_client is None:
+            self._bedrock_client = initialize_bedrock_model(self.config)
+        return self._bedrock_client
+
     def evaluate_summary(
         self,
         deposition_file_path: str,
@@ -116,33 +135,13 @@ class EnhancedSummaryEvaluator:
             FileNotFoundError: If input files are not found.
             ValueError: If mode is invalid.
         """
-
-
-        lines = read_transcript_file(deposition_file_path)
-        extractor = QAExtractor(self.bedrock_client)
-        extractor.extract_qa_pairs(lines)
-        conversation = extractor.detect_speaker_names(self.config)
-        self.logger.info("Starting comprehensive summary evaluation")
-
-        # Validate inputs
-        for path in [deposition_file_path, nuggets_file, summary_path]:
-            if not Path(path).is_file():
-                self.logger.error(f"File not found: {path}")
-                raise FileNotFoundError(f"File not found: {path}")
-        if mode not in ["consolidated", "mapping"]:
-            self.logger.error(f"Invalid mode: {mode}")
-            raise ValueError(f"Mode must be 'consolidated' or 'mapping', got {mode}")
-
-        # Load data
-        summary = "\n".join(read_transcript_file(summary_path))
-        if mode=="consolidated":
-            nugget_data = self.nugget_loader.load_nuggets_consolidated(nuggets_file)
-        elif mode=="mapping":
-            nugget_data = self.nugget_loader.load_nuggets(nuggets_file)
-
+        self._start_run(deposition_file_path, summary_path)
+        summary, nugget_data, conversation = self._prepare_evaluation(
+            deposition_file_path, nuggets_file, summary_path, mode
+        )
 
         # Parallel evaluation of criteria
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = {
                 "coverage": executor.submit(
                     self._evaluate_completeness,
@@ -182,7 +181,216 @@ class EnhancedSummaryEvaluator:
             # Collect results
             results = collect_evaluation_results(futures, self.logger)
 
-        # Compile final result
+        return self._compile_result(summary_path, summary, nugget_data, results, output_path)
+
+    async def aevaluate_summary(
+        self,
+        deposition_file_path: str,
+        nuggets_file: str,
+        summary_path: str,
+        print_usage: bool = False,
+        output_path: Optional[str] = None,
+        top_n_nuggets: Optional[int] = None,
+        mode: str = "consolidated",
+    ) -> Dict:
+        """
+        Async counterpart of evaluate_summary.
+
+        All criteria run concurrently as tasks on the running event loop, so a
+        web handler can await the evaluation without blocking other requests.
+        Their Bedrock calls go through agenerate_structured_output, sharing its
+        semaphore and executor. Arguments, return value and exceptions match
+        evaluate_summary.
+        """
+        # In this task, so the criteria tasks below inherit the run's retry budget
+        self._start_run(deposition_file_path, summary_path)
+        summary, nugget_data, conversation = await asyncio.to_thread(
+            self._prepare_evaluation, deposition_file_path, nuggets_file, summary_path, mode
+        )
+
+        self.logger.info(f"Evaluating completeness ({mode} mode), structure and citations")
+        tasks = {
+            "coverage": asyncio.create_task(aevaluate_completeness(
+                self.logger,
+                self.token_manager.truncate_nuggets_for_prompt,
+                self.bedrock_client,
+                self.config,
+                nugget_data,
+                summary,
+                print_usage,
+                top_n_nuggets,
+                mode,
+                token_manager=self.token_manager
+            )),
+            "structure": asyncio.create_task(aevaluate_structure(
+                self.logger, self.bedrock_client, self.config, summary, print_usage
+            )),
+            "citation_analysis": asyncio.create_task(aevaluate_citations(
+                self.logger, self.bedrock_client, self.config, summary_path, conversation, deposition_file_path, print_usage
+            )),
+        }
+        await asyncio.wait(tasks.values())
+
+        results = collect_evaluation_results(tasks, self.logger)
+        return self._compile_result(summary_path, summary, nugget_data, results, output_path)
+
+    def _start_run(self, deposition_file_path: str, summary_path: str) -> None:
+        """Gives this evaluation its own retry budget and ledger run."""
+        get_retry_policy(self.config).start_run()
+        if self.config.run_ledger_enabled:
+            get_run_ledger(self.config).start_run(
+                "summary_evaluation",
+                deposition=os.path.basename(deposition_file_path),
+                summary=os.path.basename(summary_path),
+            )
+
+    def _prepare_evaluation(
+        self,
+        deposition_file_path: str,
+        nuggets_file: str,
+        summary_path: str,
+        mode: str,
+    ) -> Tuple[str, Any, Conversation]:
+        """Validates inputs and loads the summary, nuggets and speaker-annotated conversation."""
+        # Parsed and speaker-detected once per transcript, shared with nugget generation
+        conversation = get_parsed_transcript(deposition_file_path, self.config).detect_speakers(self.bedrock_client, self.config)
+        self.logger.info("Starting comprehensive summary evaluation")
+
+        # Validate inputs
+        for path in [deposition_file_path, nuggets_file, summary_path]:
+            if not Path(path).is_file():
+                self.logger.error(f"File not found: {path}")
+                raise FileNotFoundError(f"File not found: {path}")
+        if mode not in ["consolidated", "mapping"]:
+            self.logger.error(f"Invalid mode: {mode}")
+            raise ValueError(f"Mode must be 'consolidated' or 'mapping', got {mode}")
+
+        summary, nugget_data = self._load_inputs(nuggets_file, summary_path, mode)
+        return summary, nugget_data, conversation
+
+    def _load_inputs(self, nuggets_file: str, summary_path: str, mode: str) -> Tuple[str, Any]:
+        """Loads the summary text and the nuggets for mode."""
+        summary = "\n".join(read_transcript_file(summary_path))
+        if mode=="consolidated":
+            nugget_data = self.nugget_loader.load_nuggets_consolidated(nuggets_file)
+        elif mode=="mapping":
+            nugget_data = self.nugget_loader.load_nuggets(nuggets_file)
+        return summary, nugget_data
+
+    def batch_requests(
+        self,
+        nuggets_file: str,
+        summary_path: str,
+        print_usage: bool = False,
+        mode: str = "consolidated",
+    ) -> List[Dict[str, Any]]:
+        """
+        The completeness and structure calls of evaluate_summary as generate_structured_output
+        arguments (for run_batch). Citation checks need the linked deposition text and stay live.
+        """
+        summary, nugget_data = self._load_inputs(nuggets_file, summary_path, mode)
+        requests = completeness_batch_requests(
+            self.logger,
+            self.token_manager.truncate_nuggets_for_prompt,
+            self.config,
+            nugget_data,
+            summary,
+            print_usage,
+            token_manager=self.token_manager
+        )
+        requests.append(build_structure_request(self.config, summary, print_usage))
+        return requests
+
+    def plan(
+        self,
+        deposition_file_path: str,
+        nuggets_file: Optional[str],
+        summary_path: str,
+        max_workers: int = 1,
+        mode: str = "consolidated",
+        expected_nuggets: int = 0,
+    ) -> RunPlan:
+        """
+        Predict the calls, tokens, cost and wall time of evaluate_summary without calling Bedrock.
+
+        Parsing, completeness batching and citation linking run locally; criteria overlap
+        when max_workers > 1, as in evaluate_summary.
+
+        Without a nuggets_file (nuggets not generated yet), completeness is planned for
+        expected_nuggets placeholder nuggets (see estimate_nugget_count) and speaker
+        detection is left to the generation run.
+        """
+        planner = RunPlanner(self.config, "summary_evaluation")
+        parsed = get_parsed_transcript(deposition_file_path, self.config)
+        if parsed.conversation(self.config) is not None:
+            planner.note("Speakers were already detected for this transcript (parse cache)")
+        elif nuggets_file is None:
+            planner.note("Speakers are detected by the nugget generation that runs first")
+        else:
+            planner.add_requests(
+                "detect_speaker", [build_speaker_request(self.config, parsed.extractor().speaker_context(), False)],
+                concurrency=1, phase=0
+            )
+
+        if nuggets_file is None:
+            summary = "\n".join(read_transcript_file(summary_path))
+            nugget_data = {
+                f"nugget_{index}": {"nugget_text": PLACEHOLDER_NUGGET_TEXT} for index in range(expected_nuggets)
+            }
+            planner.note(f"Nuggets do not exist yet; completeness is estimated for ~{expected_nuggets} nuggets")
+        else:
+            summary, nugget_data = self._load_inputs(nuggets_file, summary_path, mode)
+        completeness = completeness_batch_requests(
+            self.logger,
+            self.token_manager.truncate_nuggets_for_prompt,
+            self.config,
+            nugget_data,
+            summary,
+            False,
+            token_manager=self.token_manager
+        )
+        for stage in ("nugget_presence", "nugget_presence_batch"):
+            requests = [request for request in completeness if request["tool_schema_name"] == stage]
+            if not requests:
+                continue
+            output_tokens = None
+            if stage == "nugget_presence_batch":
+                # Batched output grows with the number of nuggets scored
+                output_tokens = [
+                    OUTPUT_TOKENS_PER_NUGGET * request["tool_schema"]["properties"]["results"]["maxItems"]
+                    for request in requests
+                ]
+            planner.add_requests(
+                stage, requests, concurrency=self.config.llm_max_concurrency, phase=1, output_tokens=output_tokens
+            )
+        planner.add_requests(
+            "structure_evaluation", [build_structure_request(self.config, summary, False)],
+            concurrency=1, phase=1 if max_workers > 1 else 2
+        )
+        # Speaker names are only known after detection; the placeholder costs about as many tokens
+        conversation = Conversation(A_SPEAKER="WITNESS")
+        citations = [
+            build_citation_request(
+                citation["summary_fact"], prepend_A_speaker_name(conversation, citation["text"]), self.config, False
+            )
+            for citation in link_combined_citations(summary_path, deposition_file_path)
+        ]
+        planner.add_requests(
+            "citation_evaluation", citations,
+            concurrency=self.config.llm_max_concurrency, phase=1 if max_workers > 1 else 3
+        )
+        planner.note("Nuggets a batched completeness call fails to score are re-scored individually (not included)")
+        return planner.plan
+
+    def _compile_result(
+        self,
+        summary_path: str,
+        summary: str,
+        nugget_data: Any,
+        results: Dict[str, Dict[str, Any]],
+        output_path: Optional[str],
+    ) -> Dict:
+        """Builds the final result dictionary and saves it if an output path is given."""
         final_result = {
             "summary_path": summary_path,
             "summary": summary,
@@ -219,7 +427,8 @@ class EnhancedSummaryEvaluator:
             summary,
             print_usage,
             top_n_nuggets,
-            mode
+            mode,
+            token_manager=self.token_manager
         )
 
     def _evaluate_accuracy(
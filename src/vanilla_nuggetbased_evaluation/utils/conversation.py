@@ -1,6 +1,5 @@
 from typing import List, Tuple, Any
 from transcript_analysis.models.pymodels import Conversation
-import spacy
 import logging
 
 from transcript_analysis.qa_fact_generation.utils.conversation_utils import update_conversation
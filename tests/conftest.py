@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modules import each other both as src.<package> and as <package> (see setup.py)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "src")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,79 @@
+"""A converseStream answer cut off at max_tokens, mid-way through a nuggets array."""
+import json
+
+import pytest
+
+from src.utils.converse_stream import assemble_stream_response, response_to_stream_events
+
+NUGGETS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "nuggets": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"text": {"type": "string"}, "page": {"type": "integer"}},
+                "required": ["text", "page"],
+            },
+        },
+    },
+    "required": ["nuggets"],
+}
+
+CUT_OFF_INPUT = '{"nuggets": [{"text": "The witness was employed by Acme", "page": 3}, {"text": "She left in 20'
+
+
+def cut_off_stream(chunk_size: int = 16):
+    yield {"messageStart": {"role": "assistant"}}
+    yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": "t1", "name": "nuggets"}}, "contentBlockIndex": 0}}
+    for start in range(0, len(CUT_OFF_INPUT), chunk_size):
+        yield {"contentBlockDelta": {"delta": {"toolUse": {"input": CUT_OFF_INPUT[start:start + chunk_size]}},
+                                     "contentBlockIndex": 0}}
+    yield {"contentBlockStop": {"contentBlockIndex": 0}}
+    yield {"messageStop": {"stopReason": "max_tokens"}}
+    yield {"metadata": {"usage": {"inputTokens": 900, "outputTokens": 4000}, "metrics": {"latencyMs": 41000}}}
+
+
+def test_cut_off_stream_keeps_raw_text_and_usage():
+    response = assemble_stream_response(cut_off_stream())
+
+    assert response["stopReason"] == "max_tokens"
+    assert response["usage"]["outputTokens"] == 4000
+    assert response["output"]["message"]["content"][0]["toolUse"]["input"] == CUT_OFF_INPUT
+
+
+def test_cut_off_stream_replays_unchanged():
+    response = assemble_stream_response(cut_off_stream())
+
+    assert assemble_stream_response(response_to_stream_events(response)) == response
+
+
+def test_complete_stream_is_parsed():
+    complete = {
+        "output": {"message": {"role": "assistant", "content": [
+            {"toolUse": {"toolUseId": "t1", "name": "nuggets", "input": {"nuggets": [{"text": "a", "page": 1}]}}},
+        ]}},
+        "stopReason": "tool_use",
+        "usage": {"inputTokens": 10, "outputTokens": 20},
+        "metrics": {},
+    }
+
+    assert assemble_stream_response(response_to_stream_events(complete, chunk_size=5)) == complete
+
+
+def test_cut_off_stream_is_repaired_only_with_truncation():
+    pytest.importorskip("pydantic")
+    pytest.importorskip("botocore")
+    from transcript_analysis.qa_fact_generation.utils.output_repair import repair_tool_input
+
+    tool_input = assemble_stream_response(cut_off_stream())["output"]["message"]["content"][0]["toolUse"]["input"]
+
+    repaired, fixes, truncated = repair_tool_input(tool_input, NUGGETS_SCHEMA, allow_truncation=True)
+    assert truncated and fixes
+    assert repaired == {"nuggets": [{"text": "The witness was employed by Acme", "page": 3}]}
+
+    repaired, fixes, truncated = repair_tool_input(tool_input, NUGGETS_SCHEMA)
+    assert not truncated
+    assert repaired == tool_input
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(repaired)